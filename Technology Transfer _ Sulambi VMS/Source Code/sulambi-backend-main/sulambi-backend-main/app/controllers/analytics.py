@@ -4,6 +4,10 @@ from ..models.ExternalEventModel import ExternalEventModel
 from ..models.MembershipModel import MembershipModel
 from ..models.EvaluationModel import EvaluationModel
 from ..models.FeedbackModel import FeedbackModel
+from ..modules.IssueExtractor import defaultExtractor
+from ..modules.ColumnarStore import defaultStore
+from ..modules import DataVersion, AnalyticsCube
+from ..modules.AnalyticsOrchestrator import AnalyticsOrchestrator
 import random
 import math
 import json
@@ -21,90 +25,17 @@ def getEventSuccessAnalytics():
     """
     Calculate event success rates based on past events
     Returns completion, attendance, and satisfaction metrics
+
+    Registrations, attendances and survey ratings are aggregated per status
+    from the in-memory columnar store; the result is cached until one of the
+    source tables is written to.
     """
     try:
-        # Get all events
-        internalEvents = InternalEventDb.getAll()
-        externalEvents = ExternalEventDb.getAll()
-        
-        # Calculate metrics
-        totalEvents = len(internalEvents) + len(externalEvents)
-        completedEvents = 0
-        cancelledEvents = 0
-        inProgressEvents = 0
-        totalAttendance = 0
-        totalSatisfaction = 0
-        satisfactionCount = 0
-        
-        # Process internal events
-        for event in internalEvents:
-            if event.get('status') == 'completed':
-                completedEvents += 1
-            elif event.get('status') == 'cancelled':
-                cancelledEvents += 1
-            else:
-                inProgressEvents += 1
-            
-            # Calculate attendance (mock calculation)
-            if event.get('maxParticipants'):
-                attendance = random.randint(60, 95)  # Mock attendance percentage
-                totalAttendance += attendance
-            
-            # Get satisfaction from evaluations
-            evaluations = EvaluationDb.getAndSearch(['eventId'], [event.get('id')])
-            for evaluation in evaluations:
-                if evaluation.get('finalized') and evaluation.get('criteria'):
-                    try:
-                        criteria = eval(evaluation.get('criteria', '{}'))
-                        if 'satisfaction' in criteria:
-                            totalSatisfaction += criteria['satisfaction']
-                            satisfactionCount += 1
-                    except:
-                        pass
-        
-        # Process external events
-        for event in externalEvents:
-            if event.get('status') == 'completed':
-                completedEvents += 1
-            elif event.get('status') == 'cancelled':
-                cancelledEvents += 1
-            else:
-                inProgressEvents += 1
-            
-            # Calculate attendance (mock calculation)
-            if event.get('maxParticipants'):
-                attendance = random.randint(60, 95)  # Mock attendance percentage
-                totalAttendance += attendance
-            
-            # Get satisfaction from evaluations
-            evaluations = EvaluationDb.getAndSearch(['eventId'], [event.get('id')])
-            for evaluation in evaluations:
-                if evaluation.get('finalized') and evaluation.get('criteria'):
-                    try:
-                        criteria = eval(evaluation.get('criteria', '{}'))
-                        if 'satisfaction' in criteria:
-                            totalSatisfaction += criteria['satisfaction']
-                            satisfactionCount += 1
-                    except:
-                        pass
-        
-        # Calculate averages
-        averageAttendance = totalAttendance / max(totalEvents, 1)
-        averageSatisfaction = totalSatisfaction / max(satisfactionCount, 1) if satisfactionCount > 0 else 4.0
-        
-        return {
-            "success": True,
-            "data": {
-                "completed": completedEvents,
-                "cancelled": cancelledEvents,
-                "inProgress": inProgressEvents,
-                "totalEvents": totalEvents,
-                "averageAttendance": round(averageAttendance, 1),
-                "averageSatisfaction": round(averageSatisfaction, 1)
-            },
-            "message": "Event success analytics retrieved successfully"
-        }
-        
+        return DataVersion.cached(
+            "eventSuccessAnalytics",
+            ["internalEvents", "externalEvents", "requirements", "evaluation", "satisfactionSurveys"],
+            computeEventSuccessAnalytics
+        )
     except Exception as e:
         return {
             "success": False,
@@ -112,6 +43,76 @@ def getEventSuccessAnalytics():
             "message": "Failed to retrieve event success analytics"
         }
 
+def computeEventSuccessAnalytics():
+    events = defaultStore.events()
+    registrations = defaultStore.registrations()
+    surveys, = defaultStore.get("satisfactionSurveys")
+    
+    # registered = requirements not rejected, attended = those with a finalized
+    # evaluation form, ratings = finalized satisfaction surveys
+    perEvent = registrations.groupby(["eventId", "type"]).agg(
+        registered=("id", "size"),
+        attended=("attended", "sum"),
+    )
+    rated = surveys[surveys["finalized"].fillna(False) & (surveys["overallSatisfaction"] > 0)]
+    ratings = rated.groupby(["eventId", "eventType"])["overallSatisfaction"].agg(rating_sum="sum", rating_count="count")
+    ratings.index.names = ["eventId", "type"]
+    
+    stats = events[["id", "type", "status"]].rename(columns={"id": "eventId"})
+    stats = stats.join(perEvent, on=["eventId", "type"]).join(ratings, on=["eventId", "type"])
+    stats["bucket"] = stats["status"].where(stats["status"].isin(["completed", "cancelled"]), "inProgress")
+    # NaN for events without registrations, which the mean attendance skips
+    stats["attendance_rate"] = 100.0 * stats["attended"] / stats["registered"]
+    rows = stats.groupby("bucket").agg(
+        events=("eventId", "size"),
+        registered=("registered", "sum"),
+        attended=("attended", "sum"),
+        attendance_rate_sum=("attendance_rate", "sum"),
+        events_with_registrations=("attendance_rate", "count"),
+        rating_sum=("rating_sum", "sum"),
+        rating_count=("rating_count", "sum"),
+    ).itertuples(name=None)
+    
+    byStatus = {}
+    for bucket, events, registered, attended, rate_sum, rated_events, rating_sum, rating_count in rows:
+        byStatus[bucket] = {
+            "events": int(events),
+            "registered": int(registered),
+            "attended": int(attended),
+            "attendanceRate": round(float(rate_sum) / rated_events, 1) if rated_events else 0,
+            "averageSatisfaction": round(float(rating_sum) / rating_count, 1) if rating_count else 0,
+            "ratings": int(rating_count),
+            "_rateSum": float(rate_sum),
+            "_ratedEvents": int(rated_events),
+            "_ratingSum": float(rating_sum),
+        }
+    
+    # Totals across statuses
+    total = lambda field: sum(stats[field] for stats in byStatus.values())
+    ratedEvents = total("_ratedEvents")
+    ratingCount = total("ratings")
+    averageAttendance = total("_rateSum") / ratedEvents if ratedEvents else 0
+    averageSatisfaction = total("_ratingSum") / ratingCount if ratingCount else 0
+    for stats in byStatus.values():
+        for field in ("_rateSum", "_ratedEvents", "_ratingSum"):
+            stats.pop(field)
+    
+    return {
+        "success": True,
+        "data": {
+            "completed": byStatus.get("completed", {}).get("events", 0),
+            "cancelled": byStatus.get("cancelled", {}).get("events", 0),
+            "inProgress": byStatus.get("inProgress", {}).get("events", 0),
+            "totalEvents": total("events"),
+            "registered": total("registered"),
+            "attended": total("attended"),
+            "averageAttendance": round(averageAttendance, 1),
+            "averageSatisfaction": round(averageSatisfaction, 1),
+            "byStatus": byStatus
+        },
+        "message": "Event success analytics retrieved successfully"
+    }
+
 def getVolunteerDropoutAnalytics(year=None):
     """
     Calculate volunteer dropout risk based on volunteerParticipationHistory table
@@ -126,7 +127,6 @@ def getVolunteerDropoutAnalytics(year=None):
         conn, cursor = cursorInstance()
         
         from ..database.connection import quote_identifier
-        membership_table = quote_identifier('membership')
         vph_table = quote_identifier('volunteerParticipationHistory')
         
         # Check if volunteerParticipationHistory table exists
@@ -168,16 +168,9 @@ def getVolunteerDropoutAnalytics(year=None):
                 print(f"[DROPOUT ANALYTICS] Error checking table existence: {e}")
                 table_exists = None
         
-        # Always ensure we're reading from membership table
-        # Check if we have active members in membership table
-        from ..database.connection import convert_boolean_condition
-        query = f"""
-            SELECT COUNT(*) FROM {membership_table} 
-            WHERE accepted = 1 AND active = 1
-        """
-        query = convert_boolean_condition(query)
-        cursor.execute(query)
-        member_count = cursor.fetchone()[0] or 0
+        # Check if we have active members (from the columnar store's membership frame)
+        members, = defaultStore.get("membership")
+        member_count = int((members["accepted"].fillna(False) & members["active"].fillna(False)).sum())
         
         if member_count == 0:
             conn.close()
@@ -260,129 +253,46 @@ def getVolunteerDropoutAnalytics(year=None):
                 "dropouts": total_dropped
             })
         
-        # Get at-risk volunteers (those with low attendance or no recent participation)
+        # At-risk volunteers come from the batch scoring run in dropoutRiskAssessment
+        # (app/tools/score_dropout_risk.py). Score inline only when no run exists yet;
+        # stale scores are served while a background run refreshes them.
+        from ..tools import score_dropout_risk
+        from ..database.connection import convert_placeholders
+        dropout_table = quote_identifier('dropoutRiskAssessment')
         current_time_ms = int(datetime.now().timestamp() * 1000)
-        ms_per_day = 1000 * 60 * 60 * 24
         
-        # First, get all active and accepted members from membership table
-        # This ensures we're reading from the membership table as the source of truth
-        try:
-            from ..database.connection import convert_boolean_condition
-            query = f"""
-                SELECT 
-                    m.email,
-                    m.fullname,
-                    COALESCE(MAX(vph.lastEventDate), 0) as most_recent_date,
-                    COALESCE(SUM(vph.eventsJoined), 0) as total_joined,
-                    COALESCE(SUM(vph.eventsAttended), 0) as total_attended,
-                    COALESCE(AVG(vph.attendanceRate), 0) as avg_attendance_rate,
-                    COALESCE(COUNT(DISTINCT vph.semester), 0) as semesters_active
-                FROM {membership_table} m
-                LEFT JOIN {vph_table} vph ON m.email = vph.volunteerEmail
-                WHERE m.accepted = 1 AND m.active = 1
-                GROUP BY m.email, m.fullname
-            """
-            query = convert_boolean_condition(query)
-            cursor.execute(query)
-            
-            volunteer_rows = cursor.fetchall()
-        except Exception as query_error:
-            # If the JOIN fails (e.g., table doesn't exist or column mismatch), 
-            # fall back to getting members without participation history
-            print(f"[DROPOUT ANALYTICS] Query with JOIN failed: {query_error}")
-            print(f"[DROPOUT ANALYTICS] Falling back to membership-only query")
-            from ..database.connection import convert_boolean_condition
-            query = f"""
-                SELECT 
-                    email,
-                    fullname,
-                    0 as most_recent_date,
-                    0 as total_joined,
-                    0 as total_attended,
-                    0 as avg_attendance_rate,
-                    0 as semesters_active
-                FROM {membership_table}
-                WHERE accepted = 1 AND active = 1
-            """
-            query = convert_boolean_condition(query)
-            cursor.execute(query)
-            volunteer_rows = cursor.fetchall()
-        
-        # Calculate at-risk volunteers from participation history
+        last_scored = score_dropout_risk.latest_scoring_time(cursor)
+        if last_scored is None:
+            score_dropout_risk.rebuild()
+        elif current_time_ms - last_scored > score_dropout_risk.SCORING_MAX_AGE_MS:
+            score_dropout_risk.rebuild_in_background()
+        
+        query = f"""
+            SELECT volunteerName, daysSinceLastEvent, lastEventDate, riskScore,
+                   eventsJoined, totalEventsAttended, participationRate, semestersActive
+            FROM {dropout_table}
+            WHERE riskScore >= ?
+            ORDER BY riskScore DESC
+            LIMIT 10
+        """
+        cursor.execute(convert_placeholders(query), (score_dropout_risk.AT_RISK_THRESHOLD,))
+        
         at_risk_volunteers = []
-        for row in volunteer_rows:
-            email, name, most_recent_date, total_joined, total_attended, avg_attendance_rate, semesters_active = row
-            
-            # Calculate attendance rate
-            attendance_rate = float(avg_attendance_rate) if avg_attendance_rate else 0
-            
-            # Calculate days since last event
-            inactivity_days = 0
-            if most_recent_date and most_recent_date > 0:
-                inactivity_days = int((current_time_ms - most_recent_date) / ms_per_day)
-            elif total_joined == 0 and total_attended == 0:
-                # If member has never participated, use a high inactivity days value
-                # This ensures members with no participation are flagged as high risk
-                inactivity_days = 365  # Assume 1 year of inactivity if never participated
-            
-            # Calculate risk score (0-100)
-            risk_score = 0
-            
-            # High risk for members with no participation at all
-            if total_joined == 0 and total_attended == 0:
-                risk_score += 50  # Never participated - high risk
-            else:
-                # Attendance rate factor (0-40 points)
-                if attendance_rate < 50:
-                    risk_score += 40
-                elif attendance_rate < 70:
-                    risk_score += 25
-                elif attendance_rate < 85:
-                    risk_score += 10
-                
-                # Participation factor (0-20 points)
-                # IMPORTANT: If they joined but never submitted a finalized evaluation form,
-                # we treat them as high dropout risk (joined but did not "participate" in our system).
-                if total_attended == 0 and total_joined > 0:
-                    risk_score += 50  # Joined but never attended (no finalized form) - high risk
-                elif total_attended < 2:
-                    risk_score += 10
-            
-            # Inactivity factor (0-40 points)
-            if inactivity_days > 90:
-                risk_score += 40
-            elif inactivity_days > 60:
-                risk_score += 25
-            elif inactivity_days > 30:
-                risk_score += 15
-            
-            # Consistency factor - fewer semesters active = higher risk
-            if semesters_active == 1:
-                risk_score += 10
-            elif semesters_active == 0:
-                risk_score += 20  # Never active in any semester
-            
-            risk_score = min(100, risk_score)
+        for name, inactivity_days, last_event_date, risk_score, total_joined, total_attended, attendance_rate, semesters_active in cursor.fetchall():
+            last_event_str = None
+            if last_event_date and last_event_date > 0:
+                last_event_str = datetime.fromtimestamp(last_event_date / 1000).strftime('%Y-%m-%d')
             
-            # Only include volunteers with risk score >= 50
-            if risk_score >= 50:
-                last_event_str = None
-                if most_recent_date and most_recent_date > 0:
-                    last_event_str = datetime.fromtimestamp(most_recent_date / 1000).strftime('%Y-%m-%d')
-                
-                at_risk_volunteers.append({
-                    "name": name,
-                    "inactivityDays": inactivity_days,
-                    "lastEvent": last_event_str or "Never",
-                    "riskScore": int(risk_score),
-                    "joinedEvents": total_joined,
-                    "attendedEvents": total_attended,
-                    "attendanceRate": round(attendance_rate, 1),
-                    "semestersActive": semesters_active
-                })
-        
-        # Sort by risk score (highest first)
-        at_risk_volunteers.sort(key=lambda x: x["riskScore"], reverse=True)
+            at_risk_volunteers.append({
+                "name": name,
+                "inactivityDays": inactivity_days,
+                "lastEvent": last_event_str or "Never",
+                "riskScore": int(risk_score),
+                "joinedEvents": total_joined,
+                "attendedEvents": total_attended,
+                "attendanceRate": round(float(attendance_rate or 0), 1),
+                "semestersActive": semesters_active
+            })
         
         conn.close()
         
@@ -390,7 +300,7 @@ def getVolunteerDropoutAnalytics(year=None):
             "success": True,
             "data": {
                 "semesterData": semester_data,
-                "atRiskVolunteers": at_risk_volunteers[:10]  # Top 10 at-risk
+                "atRiskVolunteers": at_risk_volunteers  # Top 10 at-risk
             },
             "message": "Volunteer dropout analytics retrieved successfully"
         }
@@ -418,31 +328,85 @@ def getVolunteerDropoutAnalyticsLegacy(year=None):
     """
     Legacy method - calculates from requirements/evaluations directly
     Used as fallback if volunteerParticipationHistory table doesn't exist
+
+    Semesters are derived in SQL and the per-semester and per-volunteer figures
+    come from two aggregate queries, however many semesters there are.
     """
     try:
-        from ..database.connection import cursorInstance
-        import math
+        from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, convert_boolean_condition, DATABASE_URL
         from datetime import datetime
         
         conn, cursor = cursorInstance()
         
-        # Get all events with their dates to calculate semesters
-        from ..database.connection import quote_identifier
         internal_events_table = quote_identifier("internalEvents")
         external_events_table = quote_identifier("externalEvents")
-        cursor.execute(f"""
-            SELECT id, title, durationStart, durationEnd, 'internal' as type
-            FROM {internal_events_table}
-            WHERE status IN ('accepted', 'completed')
-            UNION ALL
-            SELECT id, title, durationStart, durationEnd, 'external' as type
-            FROM {external_events_table}
-            WHERE status IN ('accepted', 'completed')
-            ORDER BY durationStart
-        """)
-        all_events = cursor.fetchall()
+        requirements_table = quote_identifier('requirements')
+        evaluation_table = quote_identifier('evaluation')
+        is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
         
-        if not all_events:
+        # Semester key "YYYY-N" from an epoch-ms column: 1 for Jan-Jun, 2 for Jul-Dec
+        def semesterExpression(column):
+            if is_postgresql:
+                moment = f"to_timestamp({column} / 1000.0)"
+                return f"""(CAST(CAST(EXTRACT(YEAR FROM {moment}) AS INTEGER) AS TEXT) || '-' ||
+                    CASE WHEN EXTRACT(MONTH FROM {moment}) <= 6 THEN '1' ELSE '2' END)"""
+            moment = f"{column} / 1000, 'unixepoch', 'localtime'"
+            return f"""(strftime('%Y', {moment}) || '-' ||
+                CASE WHEN CAST(strftime('%m', {moment}) AS INTEGER) <= 6 THEN '1' ELSE '2' END)"""
+        
+        # Shared pipeline: events bucketed into semesters, the requirements submitted
+        # for them (accepted or pending, keyed email -> srcode -> fullname), and the
+        # number of finalized evaluation forms per requirement
+        pipeline = f"""
+            WITH semester_events AS (
+                SELECT * FROM (
+                    SELECT id, 'internal' AS type, durationEnd, {semesterExpression('durationStart')} AS semester
+                    FROM {internal_events_table}
+                    WHERE status IN ('accepted', 'completed') AND durationStart IS NOT NULL
+                    UNION ALL
+                    SELECT id, 'external' AS type, durationEnd, {semesterExpression('durationStart')} AS semester
+                    FROM {external_events_table}
+                    WHERE status IN ('accepted', 'completed') AND durationStart IS NOT NULL
+                ) events
+                WHERE semester LIKE ?
+            ),
+            requirement_rows AS (
+                SELECT se.semester,
+                       r.id AS requirementId,
+                       r.accepted,
+                       COALESCE(NULLIF(r.email, ''), NULLIF(r.srcode, ''), r.fullname) AS volunteerKey,
+                       NULLIF(r.email, '') AS email,
+                       NULLIF(r.fullname, '') AS fullname,
+                       se.durationEnd AS eventEnd
+                FROM {requirements_table} r
+                INNER JOIN semester_events se ON se.id = r.eventId AND se.type = r.type
+                WHERE (r.accepted = 1 OR r.accepted IS NULL)
+            ),
+            attendance AS (
+                SELECT e.requirementId, COUNT(*) AS forms
+                FROM {evaluation_table} e
+                WHERE e.finalized = 1 AND e.criteria IS NOT NULL AND e.criteria != ''
+                GROUP BY e.requirementId
+            )
+        """
+        params = (f"{year}-%" if year else "%",)
+        
+        # Per-semester joined / attended volunteers and attendances
+        semester_query = pipeline + """
+            SELECT s.semester,
+                   COUNT(DISTINCT rr.volunteerKey) AS joined_count,
+                   COUNT(DISTINCT CASE WHEN rr.accepted = 1 AND a.forms IS NOT NULL THEN rr.volunteerKey END) AS attended_count,
+                   COALESCE(SUM(CASE WHEN rr.accepted = 1 THEN a.forms END), 0) AS total_attendances
+            FROM (SELECT DISTINCT semester FROM semester_events) s
+            LEFT JOIN requirement_rows rr ON rr.semester = s.semester
+            LEFT JOIN attendance a ON a.requirementId = rr.requirementId
+            GROUP BY s.semester
+            ORDER BY s.semester
+        """
+        cursor.execute(convert_placeholders(convert_boolean_condition(semester_query)), params)
+        semester_rows = cursor.fetchall()
+        
+        if not semester_rows and not year:
             conn.close()
             return {
                 "success": True,
@@ -453,211 +417,57 @@ def getVolunteerDropoutAnalyticsLegacy(year=None):
                 "message": "No events found"
             }
         
-        # Group events by semester
-        semester_events = {}
-        for event_id, event_title, event_start, event_end, event_type in all_events:
-            if event_start:
-                event_date = datetime.fromtimestamp(event_start / 1000)
-                semester_year = event_date.year
-                semester_num = math.ceil(event_date.month / 6)  # 1 for Jan-Jun, 2 for Jul-Dec
-                semester_key = f"{semester_year}-{semester_num}"
-                
-                if semester_key not in semester_events:
-                    semester_events[semester_key] = []
-                semester_events[semester_key].append((event_id, event_type))
-        
-        # Filter by year if specified
-        if year:
-            semester_events = {k: v for k, v in semester_events.items() if k.startswith(str(year))}
-        
         # Calculate semester engagement data
         semester_data = []
-        all_volunteer_stats = {}  # Track per-volunteer stats across all semesters
-        
-        for semester, events in sorted(semester_events.items()):
-            event_ids_internal = [e[0] for e in events if e[1] == 'internal']
-            event_ids_external = [e[0] for e in events if e[1] == 'external']
-            
-            # Count volunteers who JOINED (submitted requirements) for events in this semester.
-            # Include accepted OR pending, exclude rejected.
-            # Use a robust volunteer key: email -> srcode -> fullname
-            from ..database.connection import quote_identifier
-            requirements_table = quote_identifier('requirements')
-            evaluation_table = quote_identifier('evaluation')
-            from ..database.connection import convert_placeholders, convert_boolean_condition
-            joined_query = f"""
-                SELECT COUNT(DISTINCT COALESCE(NULLIF(r.email, ''), NULLIF(r.srcode, ''), r.fullname)) as joined_count
-                FROM {requirements_table} r
-                WHERE (r.accepted = 1 OR r.accepted IS NULL)
-            """
-            joined_params = []
-            
-            if event_ids_internal and event_ids_external:
-                joined_query += " AND ((r.type = 'internal' AND r.eventId IN ({}) OR (r.type = 'external' AND r.eventId IN ({}))))".format(
-                    ','.join(['?' for _ in event_ids_internal]),
-                    ','.join(['?' for _ in event_ids_external])
-                )
-                joined_params = event_ids_internal + event_ids_external
-            elif event_ids_internal:
-                joined_query += " AND r.type = 'internal' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_internal]))
-                joined_params = event_ids_internal
-            elif event_ids_external:
-                joined_query += " AND r.type = 'external' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_external]))
-                joined_params = event_ids_external
-            else:
-                continue
-            
-            joined_query = convert_boolean_condition(joined_query)
-            joined_query = convert_placeholders(joined_query)
-            cursor.execute(joined_query, joined_params)
-            joined_count = cursor.fetchone()[0] or 0
-            
-            # Count volunteers who ATTENDED (participated) in this semester
-            from ..database.connection import convert_placeholders, convert_boolean_condition
-            attended_query = f"""
-                SELECT COUNT(DISTINCT COALESCE(NULLIF(r.email, ''), NULLIF(r.srcode, ''), r.fullname)) as attended_count
-                FROM {requirements_table} r
-                INNER JOIN {evaluation_table} e ON r.id = e.requirementId
-                WHERE r.accepted = 1 
-                AND e.finalized = 1 
-                AND e.criteria IS NOT NULL 
-                AND e.criteria != ''
-            """
-            attended_params = []
-            
-            if event_ids_internal and event_ids_external:
-                attended_query += " AND ((r.type = 'internal' AND r.eventId IN ({}) OR (r.type = 'external' AND r.eventId IN ({}))))".format(
-                    ','.join(['?' for _ in event_ids_internal]),
-                    ','.join(['?' for _ in event_ids_external])
-                )
-                attended_params = event_ids_internal + event_ids_external
-            elif event_ids_internal:
-                attended_query += " AND r.type = 'internal' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_internal]))
-                attended_params = event_ids_internal
-            elif event_ids_external:
-                attended_query += " AND r.type = 'external' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_external]))
-                attended_params = event_ids_external
-            
-            attended_query = convert_boolean_condition(attended_query)
-            attended_query = convert_placeholders(attended_query)
-            cursor.execute(attended_query, attended_params)
-            attended_count = cursor.fetchone()[0] or 0
-            
-            # Calculate dropouts (joined but didn't attend)
-            dropouts = max(0, joined_count - attended_count)
-            
-            # Calculate average events per volunteer
-            events_per_volunteer = 0
-            if attended_count > 0:
-                from ..database.connection import convert_placeholders, convert_boolean_condition
-                total_attendances_query = f"""
-                    SELECT COUNT(*) as total_attendances
-                    FROM {requirements_table} r
-                    INNER JOIN {evaluation_table} e ON r.id = e.requirementId
-                    WHERE r.accepted = 1 
-                    AND e.finalized = 1 
-                    AND e.criteria IS NOT NULL 
-                    AND e.criteria != ''
-                """
-                total_attendances_params = []
-                
-                if event_ids_internal and event_ids_external:
-                    total_attendances_query += " AND ((r.type = 'internal' AND r.eventId IN ({}) OR (r.type = 'external' AND r.eventId IN ({}))))".format(
-                        ','.join(['?' for _ in event_ids_internal]),
-                        ','.join(['?' for _ in event_ids_external])
-                    )
-                    total_attendances_params = event_ids_internal + event_ids_external
-                elif event_ids_internal:
-                    total_attendances_query += " AND r.type = 'internal' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_internal]))
-                    total_attendances_params = event_ids_internal
-                elif event_ids_external:
-                    total_attendances_query += " AND r.type = 'external' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_external]))
-                    total_attendances_params = event_ids_external
-                
-                total_attendances_query = convert_boolean_condition(total_attendances_query)
-                total_attendances_query = convert_placeholders(total_attendances_query)
-                cursor.execute(total_attendances_query, total_attendances_params)
-                total_attendances = cursor.fetchone()[0] or 0
-                events_per_volunteer = round(total_attendances / attended_count, 1) if attended_count > 0 else 0
+        for semester, joined_count, attended_count, total_attendances in semester_rows:
+            joined_count = joined_count or 0
+            attended_count = attended_count or 0
             
             semester_data.append({
                 "semester": semester,
-                "events": events_per_volunteer,
+                "events": round(total_attendances / attended_count, 1) if attended_count > 0 else 0,
                 "volunteers": joined_count,  # Total who joined
                 "attended": attended_count,  # Total who attended
-                "dropouts": dropouts
+                "dropouts": max(0, joined_count - attended_count)  # Joined but didn't attend
             })
-            
-            # Track individual volunteer stats for at-risk calculation
-            from ..database.connection import quote_identifier, convert_boolean_condition, convert_placeholders
-            internal_events_table = quote_identifier('internalEvents')
-            external_events_table = quote_identifier('externalEvents')
-            requirements_table = quote_identifier('requirements')
-            evaluation_table = quote_identifier('evaluation')
-            volunteer_query = f"""
-                SELECT
-                       COALESCE(NULLIF(r.email, ''), NULLIF(r.srcode, ''), r.fullname) as volunteerKey,
-                       MAX(NULLIF(r.email, '')) as email,
-                       MAX(NULLIF(r.fullname, '')) as fullname,
-                       COUNT(DISTINCT r.id) as joined_events,
-                       COUNT(DISTINCT CASE WHEN e.finalized = 1 AND e.criteria IS NOT NULL AND e.criteria != '' THEN r.id END) as attended_events,
-                       MAX(CASE 
-                           WHEN r.type = 'internal' THEN ei.durationEnd
-                           ELSE ee.durationEnd
-                       END) as last_event_date
-                FROM {requirements_table} r
-                LEFT JOIN {evaluation_table} e ON r.id = e.requirementId
-                LEFT JOIN {internal_events_table} ei ON r.eventId = ei.id AND r.type = 'internal'
-                LEFT JOIN {external_events_table} ee ON r.eventId = ee.id AND r.type = 'external'
-                WHERE (r.accepted = 1 OR r.accepted IS NULL)
-            """
-            volunteer_query = convert_boolean_condition(volunteer_query)
-            volunteer_params = []
-            
-            if event_ids_internal and event_ids_external:
-                volunteer_query += " AND ((r.type = 'internal' AND r.eventId IN ({}) OR (r.type = 'external' AND r.eventId IN ({}))))".format(
-                    ','.join(['?' for _ in event_ids_internal]),
-                    ','.join(['?' for _ in event_ids_external])
-                )
-                volunteer_params = event_ids_internal + event_ids_external
-            elif event_ids_internal:
-                volunteer_query += " AND r.type = 'internal' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_internal]))
-                volunteer_params = event_ids_internal
-            elif event_ids_external:
-                volunteer_query += " AND r.type = 'external' AND r.eventId IN ({})".format(','.join(['?' for _ in event_ids_external]))
-                volunteer_params = event_ids_external
-            
-            volunteer_query += " GROUP BY volunteerKey"
-            
-            from ..database.connection import convert_placeholders
-            volunteer_query = convert_placeholders(volunteer_query)
-            cursor.execute(volunteer_query, volunteer_params)
-            volunteer_rows = cursor.fetchall()
-            
-            for volunteer_key, email, fullname, joined_events, attended_events, last_event_date in volunteer_rows:
-                key = volunteer_key or email or fullname
-                if key not in all_volunteer_stats:
-                    all_volunteer_stats[key] = {
-                        "name": fullname or email or volunteer_key,
-                        "totalJoined": 0,
-                        "totalAttended": 0,
-                        "lastEventDate": 0
-                    }
-                
-                all_volunteer_stats[key]["totalJoined"] += joined_events
-                all_volunteer_stats[key]["totalAttended"] += attended_events
-                if last_event_date and last_event_date > all_volunteer_stats[key]["lastEventDate"]:
-                    all_volunteer_stats[key]["lastEventDate"] = last_event_date
+        
+        # Per-volunteer totals across semesters: grouped per semester, then rolled up
+        # with window functions (the name comes from the volunteer's earliest semester)
+        volunteer_query = pipeline + """,
+            per_semester AS (
+                SELECT rr.volunteerKey,
+                       rr.semester,
+                       MAX(rr.email) AS email,
+                       MAX(rr.fullname) AS fullname,
+                       COUNT(DISTINCT rr.requirementId) AS joined_events,
+                       COUNT(DISTINCT CASE WHEN a.forms IS NOT NULL THEN rr.requirementId END) AS attended_events,
+                       MAX(rr.eventEnd) AS last_event_date
+                FROM requirement_rows rr
+                LEFT JOIN attendance a ON a.requirementId = rr.requirementId
+                GROUP BY rr.volunteerKey, rr.semester
+            )
+            SELECT DISTINCT
+                   volunteerKey,
+                   FIRST_VALUE(COALESCE(fullname, email, volunteerKey)) OVER (
+                       PARTITION BY volunteerKey ORDER BY semester
+                       ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+                   ) AS name,
+                   SUM(joined_events) OVER (PARTITION BY volunteerKey) AS total_joined,
+                   SUM(attended_events) OVER (PARTITION BY volunteerKey) AS total_attended,
+                   MAX(last_event_date) OVER (PARTITION BY volunteerKey) AS last_event_date
+            FROM per_semester
+        """
+        cursor.execute(convert_placeholders(convert_boolean_condition(volunteer_query)), params)
+        volunteer_rows = cursor.fetchall()
         
         # Calculate at-risk volunteers (across all semesters)
         current_time_ms = int(datetime.now().timestamp() * 1000)
         ms_per_day = 1000 * 60 * 60 * 24
         
         at_risk_volunteers = []
-        for email, stats in all_volunteer_stats.items():
-            totalJoined = stats["totalJoined"]
-            totalAttended = stats["totalAttended"]
-            last_event_date = stats["lastEventDate"]
+        for volunteer_key, name, totalJoined, totalAttended, last_event_date in volunteer_rows:
+            totalJoined = int(totalJoined or 0)
+            totalAttended = int(totalAttended or 0)
             
             # Calculate attendance rate
             attendance_rate = (totalAttended / totalJoined * 100) if totalJoined > 0 else 0
@@ -704,7 +514,7 @@ def getVolunteerDropoutAnalyticsLegacy(year=None):
                     last_event_str = datetime.fromtimestamp(last_event_date / 1000).strftime('%Y-%m-%d')
                 
                 at_risk_volunteers.append({
-                    "name": stats["name"],
+                    "name": name,
                     "inactivityDays": inactivity_days,
                     "lastEvent": last_event_str or "Never",
                     "riskScore": int(risk_score),
@@ -740,11 +550,14 @@ def getPredictiveInsights():
     """
     Generate predictive insights and recommendations
     """
+    return runAnalyticsSections(["insights"])["insights"]
+
+def buildPredictiveInsights(eventSuccess, dropoutRisk):
+    """
+    Predictive insights from already computed event success and dropout
+    analytics (the "insights" section)
+    """
     try:
-        # Get basic analytics
-        eventSuccess = getEventSuccessAnalytics()
-        dropoutRisk = getVolunteerDropoutAnalytics()
-        
         insights = []
         recommendations = []
         
@@ -788,6 +601,93 @@ def getPredictiveInsights():
             "message": "Failed to generate predictive insights"
         }
 
+def getSemesterForecasts():
+    """
+    Next-semester forecasts (with 95% intervals) for satisfaction and
+    participation aggregates, refit only when their sources changed
+    """
+    try:
+        from ..database.connection import cursorInstance, quote_identifier
+        from ..tools import rebuild_semester_forecasts
+        rebuild_semester_forecasts.rebuild(force=False)
+        
+        conn, cursor = cursorInstance()
+        try:
+            cursor.execute(f"""
+                SELECT metric, source, semester, method, parameters, forecast, lower, upper,
+                       rmse, history, lastSemester, lastValue, calculatedAt
+                FROM {quote_identifier('semesterForecasts')}
+                ORDER BY source, metric
+            """)
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+        
+        forecasts = {}
+        for metric, source, semester, method, parameters, forecast, lower, upper, rmse, history, lastSemester, lastValue, calculatedAt in rows:
+            forecasts[metric] = {
+                "source": source,
+                "semester": semester,
+                "method": method,
+                "parameters": json.loads(parameters or "{}"),
+                "forecast": forecast,
+                "lower": lower,
+                "upper": upper,
+                "rmse": rmse,
+                "history": history,
+                "lastSemester": lastSemester,
+                "lastValue": lastValue,
+                "calculatedAt": calculatedAt
+            }
+        
+        return {
+            "success": True,
+            "data": forecasts,
+            "message": "Semester forecasts retrieved successfully"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "message": "Failed to retrieve semester forecasts"
+        }
+
+def loadCommentSentiment(year=None, eventId=None, eventType=None):
+    """
+    Per-semester (or one event's) comment sentiment from the commentSentiment
+    table. Comments are scored by a background run when their sources change;
+    only the very first read scores inline.
+    """
+    from ..database.connection import cursorInstance
+    from ..tools import score_comment_sentiment
+    try:
+        conn, cursor = cursorInstance()
+        try:
+            score_comment_sentiment.ensure_table(conn, cursor)
+            if not score_comment_sentiment.has_run(cursor):
+                score_comment_sentiment.rebuild()
+            else:
+                score_comment_sentiment.refresh_in_background()
+            if eventId != None:
+                return score_comment_sentiment.event_sentiment(cursor, eventId, eventType)
+            return score_comment_sentiment.semester_sentiment(cursor, year)
+        finally:
+            conn.close()
+    except Exception as e:
+        # sentiment is supplementary; never fail the satisfaction analytics over it
+        print(f"[COMMENT SENTIMENT] Failed to load sentiment: {e}")
+        return None
+
+def summarizeSemesterSentiment(satisfactionData, sentimentBySemester):
+    """Adds each semester's sentiment to satisfactionData; returns the comment-weighted average"""
+    sentimentBySemester = sentimentBySemester or {}
+    for item in satisfactionData:
+        item["sentiment"] = sentimentBySemester.get(item["semester"], {}).get("sentiment")
+    count = sum(summary["commentCount"] for summary in sentimentBySemester.values())
+    if not count:
+        return None
+    return round(sum(summary["sentiment"] * summary["commentCount"] for summary in sentimentBySemester.values()) / count, 3)
+
 def getSatisfactionAnalytics(year=None):
     """
     Get satisfaction analytics from QR evaluations
@@ -854,6 +754,8 @@ def getSatisfactionAnalytics(year=None):
                 volunteer_avg = sum([item["volunteers"] for item in satisfactionData]) / len(satisfactionData) if satisfactionData else 4.0
                 beneficiary_avg = sum([item["beneficiaries"] for item in satisfactionData]) / len(satisfactionData) if satisfactionData else 4.0
                 top_issues = [{"issue": k, "frequency": v, "category": "volunteers"} for k, v in sorted(issues_counter.items(), key=lambda x: x[1], reverse=True)[:5]]
+                sentimentBySemester = loadCommentSentiment(year)
+                average_sentiment = summarizeSemesterSentiment(satisfactionData, sentimentBySemester)
                 
                 # Count volunteer and beneficiary ratings from semester data
                 # Note: semester_satisfaction doesn't track individual counts, so estimate from data
@@ -870,6 +772,8 @@ def getSatisfactionAnalytics(year=None):
                         "averageScore": round(overall_avg, 1),
                         "volunteerScore": round(volunteer_avg, 1),
                         "beneficiaryScore": round(beneficiary_avg, 1),
+                        "averageSentiment": average_sentiment,
+                        "sentimentData": sentimentBySemester or {},
                         "totalEvaluations": 0,
                         "processedEvaluations": 0,
                         "volunteerCount": volunteer_count,
@@ -1014,15 +918,17 @@ def getSatisfactionAnalytics(year=None):
             ))
         
         conn.close()
+        survey_start = len(evaluation_rows)
         evaluation_rows = combined_rows
         
         satisfactionBySemester = {}
-        issues = {}
+        issue_texts = []
         volunteerSatisfaction = []
         beneficiarySatisfaction = []
         
-        for row in evaluation_rows:
+        for index, row in enumerate(evaluation_rows):
             eval_id, req_id, criteria_str, finalized, q13, q14, comment, recommendations, event_id, event_type, event_date = row
+            source = "evaluation" if index < survey_start else "survey"
             
             if not finalized or not criteria_str:
                 continue
@@ -1111,23 +1017,18 @@ def getSatisfactionAnalytics(year=None):
                     volunteerSatisfaction.append(satisfaction_score)
                     satisfactionBySemester[semester]['overall'].append(satisfaction_score)
                 
-                # Extract issues from comments
+                # Collect comments for issue extraction
                 eval_comment = comment or criteria.get('comment', '') or criteria.get('comments', '') or ''
                 if eval_comment:
-                    common_issues = [
-                        'communication', 'resource', 'scheduling', 'training', 'support',
-                        'accessibility', 'organization', 'time', 'venue', 'materials',
-                        'follow-up', 'feedback', 'coordination', 'preparation'
-                    ]
-                    
-                    for issue in common_issues:
-                        if issue.lower() in eval_comment.lower():
-                            issues[issue] = issues.get(issue, 0) + 1
+                    issue_texts.append(((source, eval_id), eval_comment))
                             
             except Exception as e:
                 print(f"Error processing evaluation {eval_id}: {e}")
                 continue
         
+        # Extract issues from all collected comments in one pass
+        issues = defaultExtractor.countIssues(issue_texts)
+        
         # Calculate semester averages - only include scores when there's actual data
         satisfactionData = []
         for semester, data in satisfactionBySemester.items():
@@ -1148,6 +1049,10 @@ def getSatisfactionAnalytics(year=None):
         # Sort by semester
         satisfactionData.sort(key=lambda x: x['semester'])
         
+        # Comment sentiment is scored ahead of time, per semester
+        sentimentBySemester = loadCommentSentiment(year)
+        average_sentiment = summarizeSemesterSentiment(satisfactionData, sentimentBySemester)
+        
         # Calculate overall averages - only when there's actual data
         overall_avg = sum([item['score'] for item in satisfactionData]) / len(satisfactionData) if satisfactionData else 0
         # Only calculate averages when there are actual ratings (return 0 when no ratings, not 4.0)
@@ -1171,6 +1076,8 @@ def getSatisfactionAnalytics(year=None):
                 "averageScore": round(overall_avg, 1),
                 "volunteerScore": round(volunteer_avg, 1),
                 "beneficiaryScore": round(beneficiary_avg, 1),
+                "averageSentiment": average_sentiment,
+                "sentimentData": sentimentBySemester or {},
                 "totalEvaluations": len(evaluation_rows),
                 "processedEvaluations": len([row for row in evaluation_rows if row[3] == 1]),  # row[3] is finalized
                 "volunteerCount": len(volunteerSatisfaction),
@@ -1255,7 +1162,7 @@ def getEventSatisfactionAnalytics(eventId: int, eventType: str):
         volunteerScores = []
         beneficiaryScores = []
         allScores = []
-        issues = {}
+        issue_texts = []
         
         # Process satisfaction surveys (primary source)
         for row in survey_rows:
@@ -1301,16 +1208,9 @@ def getEventSatisfactionAnalytics(eventId: int, eventType: str):
                             volunteerScores.append(satisfaction_score)
                             allScores.append(satisfaction_score)
                     
-                    # Extract issues from comments
+                    # Collect comments for issue extraction
                     if comment:
-                        common_issues = [
-                            'communication', 'resource', 'scheduling', 'training', 'support',
-                            'accessibility', 'organization', 'time', 'venue', 'materials',
-                            'follow-up', 'feedback', 'coordination', 'preparation'
-                        ]
-                        for issue in common_issues:
-                            if issue.lower() in comment.lower():
-                                issues[issue] = issues.get(issue, 0) + 1
+                        issue_texts.append((("survey", survey_id), comment))
                                 
             except Exception as e:
                 print(f"Error processing satisfaction survey {survey_id}: {e}")
@@ -1371,22 +1271,18 @@ def getEventSatisfactionAnalytics(eventId: int, eventType: str):
                     volunteerScores.append(satisfaction_score)
                     allScores.append(satisfaction_score)
                 
-                # Extract issues from comments
+                # Collect comments for issue extraction
                 eval_comment = comment or criteria.get('comment', '') or criteria.get('comments', '') or ''
                 if eval_comment:
-                    common_issues = [
-                        'communication', 'resource', 'scheduling', 'training', 'support',
-                        'accessibility', 'organization', 'time', 'venue', 'materials',
-                        'follow-up', 'feedback', 'coordination', 'preparation'
-                    ]
-                    for issue in common_issues:
-                        if issue.lower() in eval_comment.lower():
-                            issues[issue] = issues.get(issue, 0) + 1
+                    issue_texts.append((("evaluation", eval_id), eval_comment))
                             
             except Exception as e:
                 print(f"Error processing evaluation {eval_id}: {e}")
                 continue
         
+        # Extract issues from all collected comments in one pass
+        issues = defaultExtractor.countIssues(issue_texts)
+        
         # Calculate averages
         volunteer_avg = sum(volunteerScores) / len(volunteerScores) if volunteerScores else 0
         beneficiary_avg = sum(beneficiaryScores) / len(beneficiaryScores) if beneficiaryScores else 0
@@ -1435,6 +1331,7 @@ def getEventSatisfactionAnalytics(eventId: int, eventType: str):
                 "beneficiaryCount": len(beneficiaryScores),
                 "totalEvaluations": len(survey_rows) + len(evaluation_rows),
                 "topIssues": top_issues,
+                "sentiment": loadCommentSentiment(eventId=eventId, eventType=eventType),
                 "prediction": prediction
             },
             "message": "Event satisfaction analytics retrieved successfully"
@@ -1475,6 +1372,8 @@ def clearAnalyticsData():
         
         # Commit transaction
         conn.commit()
+        DataVersion.bump(conn, cursor, 'evaluation', 'requirements')
+        AnalyticsCube.markAllDirty(conn, cursor)
         
         return {
             'success': True,
@@ -1661,6 +1560,8 @@ def deleteDummyVolunteersData():
         # Commit transaction
         print("[DELETE DUMMY] Committing transaction...")
         conn.commit()
+        DataVersion.bump(conn, cursor, 'evaluation', 'requirements', 'membership')
+        AnalyticsCube.markAllDirty(conn, cursor)
         print("[DELETE DUMMY] Transaction committed successfully!")
         
         total_deleted = sum(deleted_counts.values())
@@ -1753,4 +1654,16 @@ def seedDemoEvaluations(count: int = 100):
         return {
             'success': False,
             'message': f'Failed to seed demo evaluations: {str(e)}'
-        }
\ No newline at end of file
+        }
+
+# Sections of the combined analytics: independent ones run concurrently and
+# each is computed once per run
+analyticsSections = AnalyticsOrchestrator()
+analyticsSections.register("eventSuccess", getEventSuccessAnalytics)
+analyticsSections.register("dropoutRisk", getVolunteerDropoutAnalytics)
+analyticsSections.register("satisfaction", getSatisfactionAnalytics)
+analyticsSections.register("insights", buildPredictiveInsights, dependsOn=["eventSuccess", "dropoutRisk"])
+
+def runAnalyticsSections(names: list):
+    """Results of the given analytics sections keyed by name; failed or timed-out sections come back unsuccessful"""
+    return analyticsSections.run(names)
\ No newline at end of file
@@ -5,6 +5,7 @@ from ..models.AccountModel import AccountModel
 from ..models.MembershipModel import MembershipModel
 from ..models.ExternalEventModel import ExternalEventModel
 from ..models.InternalEventModel import InternalEventModel
+from ..modules import DataVersion, AnalyticsCube, TextIndex
 from flask import request, g
 
 ExternalEventDb = ExternalEventModel()
@@ -302,6 +303,7 @@ def evaluateByRequirement(requirementId):
             "wouldRecommend", "areasForImprovement", "positiveAspects",
             "submittedAt", finalized
           ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+          RETURNING id
         """
         finalized_val = convert_boolean_value(True)
         would_recommend_val = convert_boolean_value(overall_satisfaction >= 4 if overall_satisfaction > 0 else None)
@@ -331,13 +333,23 @@ def evaluateByRequirement(requirementId):
         request.json.get("comment", "") if overall_satisfaction >= 4 else None,  # Positive aspects
         submitted_at, finalized_val
       ))
+      survey_id = cursor.fetchone()[0] if is_postgresql else cursor.lastrowid
       conn.commit()
+      DataVersion.bump(conn, cursor, "satisfactionSurveys", rewrite=False)
+      AnalyticsCube.markEventDirty(conn, cursor, event_id, event_type)
+      TextIndex.indexSource("survey", [survey_id])
     
     conn.close()
   except Exception as e:
     # Don't fail the evaluation if satisfaction survey save fails
     print(f"Error saving to satisfactionSurveys: {e}")
 
+  # Index the submitted free text so analysis/search never re-tokenizes it
+  try:
+    TextIndex.indexSource("evaluation", [evaluationTemplate["id"]])
+  except Exception as e:
+    print(f"Error indexing evaluation text: {e}")
+
   return {
     "message": "Successfully evaluated event",
     "data": EvaluationDb.get(evaluationTemplate["id"])
@@ -509,6 +521,7 @@ def submitBeneficiaryEvaluation():
           wouldrecommend, areasforimprovement, positiveaspects,
           submittedat, finalized
         ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        RETURNING id
       """
     else:
       # SQLite: use unquoted identifiers and ? placeholders
@@ -544,8 +557,15 @@ def submitBeneficiaryEvaluation():
         comment if overall_satisfaction >= 4 else None,  # Positive aspects
         submitted_at, finalized_val
       ))
+      survey_id = cursor.fetchone()[0] if is_postgresql else cursor.lastrowid
       conn.commit()
+      DataVersion.bump(conn, cursor, "satisfactionSurveys", rewrite=False)
+      AnalyticsCube.markEventDirty(conn, cursor, event_id, event_type)
       conn.close()
+      try:
+        TextIndex.indexSource("survey", [survey_id])
+      except Exception as e:
+        print(f"Error indexing survey text: {e}")
       
       return {
         "message": "Beneficiary evaluation submitted successfully",
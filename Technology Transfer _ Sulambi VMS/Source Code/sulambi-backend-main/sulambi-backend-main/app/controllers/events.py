@@ -8,11 +8,18 @@ from ..models.AccountModel import AccountModel
 from ..models.RequirementsModel import RequirementsModel
 from ..models.EvaluationModel import EvaluationModel
 
-from ..modules.LSIAlgorithm import LSICosineSimilarityMatch
+from ..models.EventAnalysisModel import EventAnalysisModel
+
+from ..modules.LSIAlgorithm import LSIContextScoresFromCounts
+from ..modules import TextIndex
+from ..modules.ColumnarStore import defaultStore
+from ..modules.EventRecommender import defaultRecommender
 
 from flask import request, g
 from datetime import datetime
 from ..database import connection
+import hashlib
+import json
 
 ExternalEventDb = ExternalEventModel()
 InternalEventDb = InternalEventModel()
@@ -22,6 +29,7 @@ RequirementsDb  = RequirementsModel()
 SignatoriesDb = SignatoriesModel()
 EvaluationDb = EvaluationModel()
 AccountDb = AccountModel()
+EventAnalysisDb = EventAnalysisModel()
 
 def getAll():
   try:
@@ -287,6 +295,32 @@ def getPublicEvents():
     "message": "Successfully retrieved all public events"
   }
 
+def getRecommendedEvents():
+  accountSessionInfo = g.get("accountSessionInfo")
+  if (accountSessionInfo.get("accountType") != "member"):
+    return ({ "message": "Invalid account type" }, 403)
+
+  try:
+    limit = min(max(int(request.args.get("limit", 10)), 1), 50)
+  except ValueError:
+    return ({ "message": "limit must be an integer" }, 400)
+
+  # events the member already registered for are not recommended again
+  membershipId = accountSessionInfo.get("membershipId")
+  members, requirements = defaultStore.get("membership", "requirements")
+  emails = members.loc[members["id"] == membershipId, "email"]
+  registered = requirements[requirements["email"].isin(emails)]
+  exclude = set(zip(registered["type"], registered["eventId"].astype(int)))
+
+  recommendations = defaultRecommender.recommend(membershipId, limit, exclude)
+  if (recommendations == None):
+    return ({ "message": "Cannot find membership details" }, 404)
+
+  return {
+    "data": recommendations,
+    "message": "Successfully retrieved recommended events"
+  }
+
 def getAnalysis(id: int, eventType: str):
   eventDetails = None
   if (eventType == "external"):
@@ -298,24 +332,62 @@ def getAnalysis(id: int, eventType: str):
   if (eventDetails == None):
     return ({ "message": "Cannot find event specified" }, 404)
 
-  matchedRequirements = RequirementsDb.getAndSearch(["eventId", "type"], [id, eventType])
-  if (len(matchedRequirements) == 0):
+  conn, cursor = connection.cursorInstance()
+  try:
+    requirements_table = connection.quote_identifier("requirements")
+    evaluation_table = connection.quote_identifier("evaluation")
+
+    # one pass over the event's requirements; finalized evaluations ride along
+    query = f"""
+      SELECT r.id, e.id
+      FROM {requirements_table} r
+      LEFT JOIN {evaluation_table} e ON e.requirementId = r.id AND e.finalized = 1
+      WHERE r.eventId = ? AND r.type = ?
+    """
+    query = connection.convert_boolean_condition(connection.convert_placeholders(query))
+    cursor.execute(query, (id, eventType))
+    rows = cursor.fetchall()
+  finally:
+    conn.close()
+
+  if (len(rows) == 0):
     return ({ "message": "No Requirements for the specified event found" }, 406)
 
-  textToAnalyze = []
-  for requirement in matchedRequirements:
-    matchedEvaluation = EvaluationDb.getAndSearch(["requirementId"], [requirement["id"]])
-    if (len(matchedEvaluation) == 0):
-      continue
+  evaluationIds = sorted(evaluationId for _, evaluationId in rows if evaluationId != None)
+  fingerprint = analysisFingerprint(evaluationIds)
+  cached = EventAnalysisDb.getAndSearch(["eventId", "eventType"], [id, eventType])
+  cached = cached[0] if len(cached) > 0 else None
 
-    matchedEvaluation = matchedEvaluation[0]
-    textToAnalyze.append(matchedEvaluation["recommendations"])
+  if (cached != None and cached["fingerprint"] == fingerprint):
+    return {
+      "analysis": finalizeAnalysis(json.loads(cached["contextSums"])),
+      "message": "Successfully returned analysis"
+    }
 
-  analysis = LSICosineSimilarityMatch(textToAnalyze)
-  normalized = averageAnalysis(analysis)
+  # fold only the newly finalized evaluations into the cached sums; start over
+  # if any previously counted evaluation has since disappeared
+  contextSums = {}
+  pendingIds = evaluationIds
+  if (cached != None):
+    cachedIds = set(json.loads(cached["evaluationIds"]))
+    if (cachedIds.issubset(evaluationIds)):
+      contextSums = json.loads(cached["contextSums"])
+      pendingIds = [evaluationId for evaluationId in evaluationIds if evaluationId not in cachedIds]
+
+  termCounts = TextIndex.documentTermCounts("evaluation", pendingIds, "recommendations")
+  accumulateAnalysis(contextSums, LSIContextScoresFromCounts(list(termCounts.values())))
+
+  if (cached == None):
+    EventAnalysisDb.create(id, eventType, fingerprint, json.dumps(evaluationIds), json.dumps(contextSums))
+  else:
+    EventAnalysisDb.updateSpecific(
+      cached["id"],
+      ["fingerprint", "evaluationIds", "contextSums", "updatedAt"],
+      (fingerprint, json.dumps(evaluationIds), json.dumps(contextSums), int(datetime.now().timestamp() * 1000))
+    )
 
   return {
-    "analysis": normalized,
+    "analysis": finalizeAnalysis(contextSums),
     "message": "Successfully returned analysis"
   }
 
@@ -798,4 +870,29 @@ def normalizeOutput(data):
   for keys in data:
     normalizedValue[keys] = data[keys] / total
 
-  return normalizedValue
\ No newline at end of file
+  return normalizedValue
+
+######################
+#  Analysis Helpers  #
+######################
+def analysisFingerprint(evaluationIds: list) -> str:
+  joined = ",".join(str(evaluationId) for evaluationId in evaluationIds)
+  return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+# same intermediate {"sum", "count"} shape averageAnalysis builds, kept
+# around so it can be persisted and extended later
+def accumulateAnalysis(contextSums: dict, scores: list[dict]):
+  for score in scores:
+    for context, value in score.items():
+      if context not in contextSums:
+        contextSums[context] = {"sum": 0, "count": 0}
+      contextSums[context]["sum"] += value
+      contextSums[context]["count"] += 1
+  return contextSums
+
+def finalizeAnalysis(contextSums: dict):
+  return {
+    context: stats["sum"] / stats["count"]
+    for context, stats in contextSums.items()
+    if stats["count"] > 0
+  }
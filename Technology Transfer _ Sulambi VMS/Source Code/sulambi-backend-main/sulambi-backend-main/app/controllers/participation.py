@@ -177,6 +177,60 @@ def getSemesterParticipationSummary(semester=None, year=None):
             "traceback": traceback.format_exc()
         }
 
+def getCohortRetention():
+    """
+    Get the cohort x semester retention matrix for charting
+    Each cohort lists its retention per semester since it joined (offset 0 = 100%)
+    """
+    try:
+        from ..database.connection import cursorInstance, quote_identifier
+        from ..tools import rebuild_cohort_retention
+        
+        conn, cursor = cursorInstance()
+        try:
+            rebuild_cohort_retention.ensure_table(conn, cursor)
+            if rebuild_cohort_retention.is_stale(cursor):
+                # only the cells that changed are written
+                rebuild_cohort_retention.rebuild()
+            
+            cursor.execute(f"""
+                SELECT cohort, semester, semesterOffset, cohortSize, retained, retentionRate
+                FROM {quote_identifier('cohortRetention')}
+                ORDER BY cohortKey, semesterKey
+            """)
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+        
+        cohorts = {}
+        semesters = []
+        for cohort, semester, offset, size, retained, rate in rows:
+            entry = cohorts.setdefault(cohort, {"cohort": cohort, "size": size, "semesters": [], "offsets": [], "retained": [], "retentionRates": []})
+            entry["semesters"].append(semester)
+            entry["offsets"].append(offset)
+            entry["retained"].append(retained)
+            entry["retentionRates"].append(rate)
+            if semester not in semesters:
+                semesters.append(semester)
+        
+        return {
+            "success": True,
+            "data": {
+                "semesters": sorted(semesters, key=lambda label: tuple(int(part) for part in label.split('-'))),
+                "cohorts": list(cohorts.values())
+            },
+            "message": "Cohort retention retrieved successfully"
+        }
+        
+    except Exception as e:
+        import traceback
+        return {
+            "success": False,
+            "error": str(e),
+            "message": "Failed to retrieve cohort retention",
+            "traceback": traceback.format_exc()
+        }
+
 
 
 
@@ -6,6 +6,7 @@ from ..models.InternalReportModel import InternalReportModel
 from ..models.RequirementsModel import RequirementsModel
 from ..models.EvaluationModel import EvaluationModel
 from ..models.SignatoriesModel import SignatoriesModel
+from ..modules import ContentStore, PhotoVariants
 
 from flask import request
 import json
@@ -326,6 +327,7 @@ def getReportByEventId(eventId: int, eventType: str):
 def createReport(eventId: int, eventType: str):
   photoPath = basicFileWriter([])
   photoNames = ",".join([photoPath[key] for key in photoPath])
+  PhotoVariants.schedule(list(photoPath.values()))
   
   # Extract photo captions from form data
   photoCaptions = []
@@ -340,10 +342,12 @@ def createReport(eventId: int, eventType: str):
     matchedEvent = ExternalEventDb.get(eventId)
 
     if (matchedEvent == None):
+      ContentStore.release(list(photoPath.values()))
       return ({"message": "Event ID does not exist"}, 404)
 
     matchedReport = ExternalReportDb.getAndSearch(["eventId"], [eventId])
     if (len(matchedReport) > 0):
+      ContentStore.release(list(photoPath.values()))
       return ({"message": "A report for this event has already been submitted"}, 403)
 
 
@@ -369,10 +373,12 @@ def createReport(eventId: int, eventType: str):
     matchedEvent = InternalEventDb.get(eventId)
 
     if (matchedEvent == None):
+      ContentStore.release(list(photoPath.values()))
       return ({"message": "Event ID does not exist"}, 404)
 
     matchedReport = InternalReportDb.getAndSearch(["eventId"], [eventId])
     if (len(matchedReport) > 0):
+      ContentStore.release(list(photoPath.values()))
       return ({"message": "A report for this event has already been submitted"}, 403)
 
     createdReport = InternalReportDb.create(
@@ -400,6 +406,7 @@ def updateReport(reportId: int, reportType: str):
     
     photoPath = basicFileWriter([])
     photoNames = ",".join([photoPath[key] for key in photoPath])
+    PhotoVariants.schedule(list(photoPath.values()))
     
     # Extract photo captions from form data
     photoCaptions = []
@@ -414,6 +421,7 @@ def updateReport(reportId: int, reportType: str):
       existingReport = ExternalReportDb.get(reportId)
       if not existingReport:
         print(f"External report with ID {reportId} not found")
+        ContentStore.release(list(photoPath.values()))
         return ({"message": "External report not found"}, 404)
       
       # Update specific fields - only update photos/captions if new photos were uploaded
@@ -426,6 +434,9 @@ def updateReport(reportId: int, reportType: str):
         updateValues.extend([photoNames, photoCaptionsStr])
       
       ExternalReportDb.updateSpecific(reportId, updateFields, tuple(updateValues))
+      if photoNames:
+        # the replaced photos lose their reference
+        ContentStore.release((existingReport.get("photos") or "").split(","))
       
       updatedReport = ExternalReportDb.get(reportId)
       updatedReport["eventId"] = ExternalEventDb.get(updatedReport["eventId"])
@@ -443,6 +454,7 @@ def updateReport(reportId: int, reportType: str):
       existingReport = InternalReportDb.get(reportId)
       if not existingReport:
         print(f"Internal report with ID {reportId} not found")
+        ContentStore.release(list(photoPath.values()))
         return ({"message": "Internal report not found"}, 404)
       
       # Update specific fields
@@ -461,6 +473,9 @@ def updateReport(reportId: int, reportType: str):
         updateValues.extend([photoNames, photoCaptionsStr])
       
       InternalReportDb.updateSpecific(reportId, updateFields, tuple(updateValues))
+      if photoNames:
+        # the replaced photos lose their reference
+        ContentStore.release((existingReport.get("photos") or "").split(","))
       
       updatedReport = InternalReportDb.get(reportId)
       updatedReport["eventId"] = InternalEventDb.get(updatedReport["eventId"])
@@ -475,6 +490,7 @@ def updateReport(reportId: int, reportType: str):
     
     else:
       print(f"Invalid report type: {reportType}")
+      ContentStore.release(list(photoPath.values()))
       return ({"message": "Invalid report type"}, 400)
       
   except Exception as e:
@@ -498,6 +514,8 @@ def deleteReport(reportId: int, reportType: str):
       print(f"Found external report: {existingReport}")
       # Delete the report
       deletedReport = ExternalReportDb.delete(reportId)
+      # photos no other report uses are removed from storage
+      ContentStore.release((existingReport.get("photos") or "").split(","))
       print(f"Successfully deleted external report: {deletedReport}")
       return {
         "message": "External report deleted successfully",
@@ -514,6 +532,8 @@ def deleteReport(reportId: int, reportType: str):
       print(f"Found internal report: {existingReport}")
       # Delete the report
       deletedReport = InternalReportDb.delete(reportId)
+      # photos no other report uses are removed from storage
+      ContentStore.release((existingReport.get("photos") or "").split(","))
       print(f"Successfully deleted internal report: {deletedReport}")
       return {
         "message": "Internal report deleted successfully",
@@ -7,6 +7,7 @@ from ..models.EvaluationModel import EvaluationModel
 from ..models.MembershipModel import MembershipModel
 from ..modules.CallbackTimer import executeDelayedAction
 from ..modules.Mailer import threadedHtmlMailer, htmlMailer
+from ..modules import UploadPipeline
 
 from dotenv import load_dotenv
 import os
@@ -15,6 +16,10 @@ load_dotenv()
 
 FRONTEND_APP_URL = os.getenv("FRONTEND_APP_URL")
 
+# requirement files are spooled and uploaded in the background by default;
+# ASYNC_UPLOADS=false restores uploading them within the request
+ASYNC_UPLOADS = os.getenv("ASYNC_UPLOADS", "true").lower() != "false"
+
 RequirementsDb = RequirementsModel()
 ExternalEventDb = ExternalEventModel()
 InternalEventDb = InternalEventModel()
@@ -191,6 +196,18 @@ def getAllRequirements():
     print(f"[REQUIREMENTS_GET_ALL] Traceback: {traceback.format_exc()}")
     return ({ "message": f"Server error: {str(e)}" }, 500)
 
+def getUploadStatus(requirementId: str):
+  uploads = UploadPipeline.uploadStatus(requirementId)
+  if (len(uploads) == 0):
+    return ({ "message": "No uploads were queued for this requirement" }, 404)
+
+  return {
+    "message": "Successfully retrieved upload status",
+    "data": uploads,
+    "complete": all(upload["status"] == "done" for upload in uploads),
+    "failed": any(upload["status"] == "failed" for upload in uploads)
+  }
+
 def acceptRequirements(id: int):
   existence = RequirementsDb.get(id)
   if (existence == None):
@@ -269,6 +286,7 @@ def rejectRequirements(id: int):
   }
 
 def createNewRequirement(eventId: int):
+  spooled = {}
   try:
     print("[REQUIREMENTS_CREATE] ========================================")
     print(f"[REQUIREMENTS_CREATE] Creating requirement for eventId: {eventId}")
@@ -277,11 +295,19 @@ def createNewRequirement(eventId: int):
     
     # Use Cloudinary for file uploads (validates PDF and images only)
     # IMPORTANT: All uploads MUST go to Cloudinary - local storage is disabled
-    from app.utils.multipartFileWriter import cloudinaryFileWriter
+    from app.utils.multipartFileWriter import cloudinaryFileWriter, spooledFileWriter
     
     try:
-      resultingPaths = cloudinaryFileWriter(["medCert", "waiver"], folder="requirements")
-      print(f"[REQUIREMENTS_CREATE] ✅ Cloudinary uploads successful")
+      if ASYNC_UPLOADS:
+        # the row gets pending upload handles, patched to the URLs by UploadPipeline
+        spooled = spooledFileWriter(["medCert", "waiver"], UploadPipeline.SPOOL_PATH)
+        for info in spooled.values():
+          info["uploadId"] = UploadPipeline.newUploadId()
+        resultingPaths = {key: UploadPipeline.handle(info["uploadId"]) for key, info in spooled.items()}
+        print(f"[REQUIREMENTS_CREATE] ✅ Files spooled for background upload")
+      else:
+        resultingPaths = cloudinaryFileWriter(["medCert", "waiver"], folder="requirements")
+        print(f"[REQUIREMENTS_CREATE] ✅ Cloudinary uploads successful")
       print(f"[REQUIREMENTS_CREATE] Cloudinary URLs: {resultingPaths}")
       print(f"[REQUIREMENTS_CREATE] medCert URL: {resultingPaths.get('medCert', 'NOT FOUND')}")
       print(f"[REQUIREMENTS_CREATE] waiver URL: {resultingPaths.get('waiver', 'NOT FOUND')}")
@@ -293,20 +319,22 @@ def createNewRequirement(eventId: int):
       if not medCertUrl:
         error_msg = "Medical certificate file was not uploaded to Cloudinary"
         print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
+        UploadPipeline.discard(spooled)
         return ({ "message": error_msg }, 400)
       
       if not waiverUrl:
         error_msg = "Waiver file was not uploaded to Cloudinary"
         print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
+        UploadPipeline.discard(spooled)
         return ({ "message": error_msg }, 400)
       
-      # Verify URLs are Cloudinary URLs (not local paths)
-      if not medCertUrl.startswith(('http://', 'https://')):
+      # Verify URLs are Cloudinary URLs or pending Cloudinary uploads (not local paths)
+      if not (medCertUrl.startswith(('http://', 'https://')) or UploadPipeline.isPending(medCertUrl)):
         error_msg = f"Invalid medical certificate URL format. Expected Cloudinary URL, got: {medCertUrl[:50]}..."
         print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
         return ({ "message": "Medical certificate must be uploaded to Cloudinary" }, 400)
       
-      if not waiverUrl.startswith(('http://', 'https://')):
+      if not (waiverUrl.startswith(('http://', 'https://')) or UploadPipeline.isPending(waiverUrl)):
         error_msg = f"Invalid waiver URL format. Expected Cloudinary URL, got: {waiverUrl[:50]}..."
         print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {error_msg}")
         return ({ "message": "Waiver must be uploaded to Cloudinary" }, 400)
@@ -332,6 +360,7 @@ def createNewRequirement(eventId: int):
 
       if (len(matchedUserRequirement) > 0):
         print(f"[REQUIREMENTS_CREATE] ❌ Duplicate requirement found for email: {email}")
+        UploadPipeline.discard(spooled)
         return ({ "message": "Your email has already been registered to this event" }, 403)
 
     print("[REQUIREMENTS_CREATE] Creating requirement in database...")
@@ -382,6 +411,18 @@ def createNewRequirement(eventId: int):
     )
 
     print(f"[REQUIREMENTS_CREATE] ✅ Requirement created successfully with ID: {createdRequirement.get('id')}")
+
+    if spooled:
+      UploadPipeline.enqueue(createdRequirement.get("id"), spooled, "requirements")
+      spooled = {}
+      print(f"[REQUIREMENTS_CREATE] Queued background uploads: {list(resultingPaths)}")
+      print("[REQUIREMENTS_CREATE] ========================================")
+      return {
+        "message": "Successfully submitted requirements, files are being uploaded",
+        "data": createdRequirement,
+        "uploads": UploadPipeline.uploadStatus(createdRequirement.get("id"))
+      }
+
     print("[REQUIREMENTS_CREATE] ========================================")
 
     return {
@@ -389,6 +430,7 @@ def createNewRequirement(eventId: int):
       "data": createdRequirement
     }
   except Exception as e:
+    UploadPipeline.discard(spooled)
     print(f"[REQUIREMENTS_CREATE] ❌ ERROR: {str(e)}")
     import traceback
     print(f"[REQUIREMENTS_CREATE] Traceback: {traceback.format_exc()}")
@@ -26,7 +26,11 @@ def convert_sql(sql):
     import re
     timestamp_columns = [
         'durationStart', 'durationEnd', 'evaluationSendTime',  # Events tables
-        'firstEventDate', 'lastEventDate', 'calculatedAt', 'lastUpdated'  # volunteerParticipationHistory
+        'firstEventDate', 'lastEventDate', 'calculatedAt', 'lastUpdated',  # volunteerParticipationHistory
+        'updatedAt',  # eventAnalysis, dataVersions, analyticsCube, feature store
+        'first_participation', 'last_participation',  # memberFeatures
+        'indexedAt',  # textIndexDocuments
+        'nextAttemptAt'  # pendingUploads
     ]
     for col in timestamp_columns:
         # Match: column_name INTEGER (with optional NOT NULL, etc.)
@@ -467,6 +471,8 @@ execute_sql("""
     
     -- Engagement Metrics
     totalEventsAttended INTEGER DEFAULT 0,
+    eventsJoined INTEGER DEFAULT 0,
+    semestersActive INTEGER DEFAULT 0,
     eventsLastSemester INTEGER DEFAULT 0,
     eventsLastMonth INTEGER DEFAULT 0,
     averageEventsPerSemester REAL DEFAULT 0,
@@ -498,6 +504,14 @@ execute_sql("""
 """)
 DEBUG and print("Done")
 
+# The dropout endpoint reads the top-N of the latest batch scoring run
+DEBUG and print("[*] Creating indexes for dropoutRiskAssessment...")
+if is_postgresql:
+    execute_sql('CREATE INDEX IF NOT EXISTS idx_dropout_risk_score ON "dropoutRiskAssessment"(riskScore)')
+else:
+    execute_sql("CREATE INDEX IF NOT EXISTS idx_dropout_risk_score ON dropoutRiskAssessment(riskScore)")
+DEBUG and print("Done")
+
 ###########################
 #  VOLUNTEER PARTICIPATION HISTORY TABLE  #
 ###########################
@@ -576,6 +590,240 @@ execute_sql("""
 """)
 DEBUG and print("Done")
 
+###########################
+#  EVENT ANALYSIS TABLE  #
+###########################
+# Cached LSI analysis per event. contextSums holds the running per-context
+# {"sum", "count"} totals so new evaluations can be folded in without
+# re-scoring the old ones; fingerprint identifies the evaluation ids used.
+DEBUG and print("[*] Initializing eventAnalysis table...")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS eventAnalysis(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    eventId INTEGER NOT NULL,
+    eventType STRING NOT NULL,
+    fingerprint STRING NOT NULL,
+    evaluationIds TEXT NOT NULL DEFAULT '[]',
+    contextSums TEXT NOT NULL DEFAULT '{}',
+    updatedAt INTEGER NOT NULL,
+    UNIQUE(eventId, eventType)
+  )
+""")
+DEBUG and print("Done")
+
+###########################
+#  TEXT INDEX TABLES  #
+###########################
+# Inverted index over evaluation/survey recommendations and comments
+# (see app/modules/TextIndex.py). vector is a sparse "termId:count,..." list.
+DEBUG and print("[*] Initializing text index tables...")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS textIndexTerms(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    term STRING NOT NULL UNIQUE,
+    documentFrequency INTEGER NOT NULL DEFAULT 0
+  )
+""")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS textIndexDocuments(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sourceType STRING NOT NULL,
+    sourceId INTEGER NOT NULL,
+    field STRING NOT NULL,
+    eventId INTEGER,
+    eventType STRING,
+    termCount INTEGER NOT NULL DEFAULT 0,
+    vector TEXT NOT NULL DEFAULT '',
+    indexedAt INTEGER NOT NULL,
+    UNIQUE(sourceType, sourceId, field)
+  )
+""")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS textIndexPostings(
+    termId INTEGER NOT NULL,
+    documentId INTEGER NOT NULL,
+    frequency INTEGER NOT NULL,
+    PRIMARY KEY(termId, documentId)
+  )
+""")
+if is_postgresql:
+    execute_sql('CREATE INDEX IF NOT EXISTS idx_text_postings_document ON "textIndexPostings"(documentId)')
+else:
+    execute_sql("CREATE INDEX IF NOT EXISTS idx_text_postings_document ON textIndexPostings(documentId)")
+DEBUG and print("Done")
+
+###########################
+#  DATA VERSIONS TABLE    #
+###########################
+# One counter per table, bumped on every write; cached analytics compare
+# these to decide whether they need recomputing.
+DEBUG and print("[*] Initializing dataVersions table...")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS dataVersions(
+    tableName STRING PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updatedAt INTEGER
+  )
+""")
+DEBUG and print("Done")
+
+###########################
+#  ANALYTICS CUBE TABLES  #
+###########################
+# Pre-aggregated registrations/attendances/dropouts/ratings per
+# (year, semester, eventType, campus, collegeDept, sex), maintained per slice
+# from the events recorded in analyticsCubeDirty (see app/modules/AnalyticsCube.py)
+DEBUG and print("[*] Initializing analyticsCube tables...")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS analyticsCube(
+    year INTEGER NOT NULL,
+    semester INTEGER NOT NULL,
+    eventType STRING NOT NULL,
+    campus STRING NOT NULL,
+    collegeDept STRING NOT NULL,
+    sex STRING NOT NULL,
+    registrations INTEGER NOT NULL DEFAULT 0,
+    attendances INTEGER NOT NULL DEFAULT 0,
+    dropouts INTEGER NOT NULL DEFAULT 0,
+    ratingCount INTEGER NOT NULL DEFAULT 0,
+    ratingSum REAL NOT NULL DEFAULT 0,
+    updatedAt INTEGER,
+    PRIMARY KEY (year, semester, eventType, campus, collegeDept, sex)
+  )
+""")
+
+# The slice each event was last counted in, so moving an event to another
+# semester re-aggregates both the old and the new slice
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS analyticsCubeEvents(
+    eventId INTEGER NOT NULL,
+    eventType STRING NOT NULL,
+    year INTEGER NOT NULL,
+    semester INTEGER NOT NULL,
+    PRIMARY KEY (eventId, eventType)
+  )
+""")
+
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS analyticsCubeDirty(
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    eventId INTEGER NOT NULL,
+    eventType STRING NOT NULL
+  )
+""")
+DEBUG and print("Done")
+
+###########################
+#  FEATURE STORE TABLES   #
+###########################
+# Flat feature rows for the analytics models, kept in sync by
+# app/modules/FeatureStore.py; columns are named after the model features
+DEBUG and print("[*] Initializing feature store tables...")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS memberFeatures(
+    membershipId INTEGER PRIMARY KEY,
+    email STRING,
+    age INTEGER,
+    sex STRING,
+    campus STRING,
+    collegeDept STRING,
+    yrlevelprogram STRING,
+    volunterismExperience INTEGER,
+    accepted INTEGER,
+    active INTEGER,
+    total_registrations INTEGER NOT NULL DEFAULT 0,
+    attended_events INTEGER NOT NULL DEFAULT 0,
+    attendance_rate REAL NOT NULL DEFAULT 0,
+    first_participation INTEGER,
+    last_participation INTEGER,
+    participation_span INTEGER,
+    updatedAt INTEGER
+  )
+""")
+if is_postgresql:
+    execute_sql('CREATE INDEX IF NOT EXISTS idx_member_features_email ON "memberFeatures"(email)')
+else:
+    execute_sql("CREATE INDEX IF NOT EXISTS idx_member_features_email ON memberFeatures(email)")
+
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS eventFeatures(
+    eventId INTEGER NOT NULL,
+    eventType STRING NOT NULL,
+    status STRING,
+    venue STRING,
+    modeOfDelivery STRING,
+    durationStart INTEGER,
+    duration_hours REAL,
+    total_participants INTEGER,
+    is_weekend INTEGER,
+    has_feedback INTEGER,
+    registered_count INTEGER NOT NULL DEFAULT 0,
+    attended_count INTEGER NOT NULL DEFAULT 0,
+    attendance_rate REAL NOT NULL DEFAULT 0,
+    success INTEGER,
+    updatedAt INTEGER,
+    PRIMARY KEY (eventId, eventType)
+  )
+""")
+if is_postgresql:
+    execute_sql('CREATE INDEX IF NOT EXISTS idx_event_features_status ON "eventFeatures"(status)')
+else:
+    execute_sql("CREATE INDEX IF NOT EXISTS idx_event_features_status ON eventFeatures(status)")
+DEBUG and print("Done")
+
+###########################
+#  PENDING UPLOADS TABLE  #
+###########################
+# Files spooled to local storage by a request and pushed to the upload
+# backend by app/modules/UploadPipeline.py, which patches the final URL into
+# the owning requirement column
+DEBUG and print("[*] Initializing pendingUploads table...", end="")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS pendingUploads(
+    id STRING PRIMARY KEY,
+    requirementId STRING NOT NULL,
+    field STRING NOT NULL,
+    folder STRING NOT NULL,
+    spoolPath TEXT NOT NULL,
+    filename STRING NOT NULL,
+    contentType STRING,
+    status STRING NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    url TEXT,
+    error TEXT,
+    nextAttemptAt INTEGER NOT NULL,
+    updatedAt INTEGER
+  )
+""")
+if is_postgresql:
+    execute_sql('CREATE INDEX IF NOT EXISTS idx_pending_uploads_due ON "pendingUploads"(status, nextAttemptAt)')
+    execute_sql('CREATE INDEX IF NOT EXISTS idx_pending_uploads_requirement ON "pendingUploads"(requirementId)')
+else:
+    execute_sql("CREATE INDEX IF NOT EXISTS idx_pending_uploads_due ON pendingUploads(status, nextAttemptAt)")
+    execute_sql("CREATE INDEX IF NOT EXISTS idx_pending_uploads_requirement ON pendingUploads(requirementId)")
+DEBUG and print("Done")
+
+########################
+#  UPLOAD BLOBS TABLE  #
+########################
+# Reference counts of the deduplicated local uploads kept by
+# app/modules/ContentStore.py, keyed by the SHA-256 of their content
+DEBUG and print("[*] Initializing uploadBlobs table...", end="")
+execute_sql("""
+  CREATE TABLE IF NOT EXISTS uploadBlobs(
+    hash STRING PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    refCount INTEGER NOT NULL DEFAULT 0,
+    updatedAt INTEGER
+  )
+""")
+if is_postgresql:
+    execute_sql('CREATE INDEX IF NOT EXISTS idx_upload_blobs_path ON "uploadBlobs"(path)')
+else:
+    execute_sql("CREATE INDEX IF NOT EXISTS idx_upload_blobs_path ON uploadBlobs(path)")
+DEBUG and print("Done")
+
 
 # Insert the initial account values here
 initialAccounts = [
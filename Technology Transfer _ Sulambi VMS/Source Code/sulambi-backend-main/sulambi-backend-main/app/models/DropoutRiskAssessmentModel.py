@@ -27,6 +27,8 @@ class DropoutRiskAssessmentModel(Model):
       "isAtRisk",
       "interventionNeeded",
       "notes",
+      "eventsJoined",
+      "semestersActive",
     ]
 
   def create(self,
@@ -50,7 +52,9 @@ class DropoutRiskAssessmentModel(Model):
     calculatedAt: int = None,
     isAtRisk: bool = False,
     interventionNeeded: bool = False,
-    notes: str = ""):
+    notes: str = "",
+    eventsJoined: int = 0,
+    semestersActive: int = 0):
       import time
       if calculatedAt is None:
         calculatedAt = int(time.time() * 1000)
@@ -77,6 +81,8 @@ class DropoutRiskAssessmentModel(Model):
         isAtRisk,
         interventionNeeded,
         notes,
+        eventsJoined,
+        semestersActive,
       ))
 
 
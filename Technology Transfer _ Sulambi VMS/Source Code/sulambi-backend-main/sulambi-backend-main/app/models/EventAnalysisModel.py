@@ -0,0 +1,35 @@
+from .Model import Model
+
+class EventAnalysisModel(Model):
+  def __init__(self):
+    super().__init__()
+    self.table = "eventAnalysis"
+    self.primaryKey = "id"
+    self.columns = [
+      "eventId",
+      "eventType",
+      "fingerprint",
+      "evaluationIds",
+      "contextSums",
+      "updatedAt",
+    ]
+
+  def create(self,
+    eventId: int,
+    eventType: str,
+    fingerprint: str,
+    evaluationIds: str = "[]",
+    contextSums: str = "{}",
+    updatedAt: int = None):
+      import time
+      if updatedAt is None:
+        updatedAt = int(time.time() * 1000)
+
+      return super().create((
+        eventId,
+        eventType,
+        fingerprint,
+        evaluationIds,
+        contextSums,
+        updatedAt,
+      ))
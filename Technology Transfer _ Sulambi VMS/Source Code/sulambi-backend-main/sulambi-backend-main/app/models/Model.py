@@ -1,4 +1,5 @@
 from ..database import connection
+from ..modules import DataVersion, AnalyticsCube
 from datetime import datetime
 import os
 from dotenv import load_dotenv
@@ -41,6 +42,14 @@ class Model:
     """Get properly quoted table name based on database type"""
     return self._quote_identifier(self.table)
 
+  def _touch(self, conn, cursor, key=None, change="update"):
+    """
+    Marks the table (and the written row's analytics cube slice) as changed so
+    derived analytics are rebuilt; change is "create", "update" or "delete"
+    """
+    DataVersion.bump(conn, cursor, self.table, rewrite=change != "create")
+    AnalyticsCube.recordWrite(conn, cursor, self.table, key, change == "delete")
+
   def parseResponse(self, response: tuple | None, overwriteColumns=[]):
     if (response == None): return None
     if (len(overwriteColumns) == 0):
@@ -287,6 +296,7 @@ class Model:
         cursor.execute(returning_query, data)
         lastRowId = cursor.fetchone()[0]
         conn.commit()
+        self._touch(conn, cursor, lastRowId, "create")
         print(f"[MODEL.CREATE] Insert successful with ID: {lastRowId}")
         insertedData = self.get(lastRowId)
       else:
@@ -294,7 +304,9 @@ class Model:
         cursor.execute(query, data)
         conn.commit()
         print(f"[MODEL.CREATE] Insert successful")
-        lastRowId = self.getLastPrimaryKey()
+        # a supplied key (e.g. a UUID) need not be the largest one
+        lastRowId = data[0] if includePrimaryKey else self.getLastPrimaryKey()
+        self._touch(conn, cursor, lastRowId, "create")
         insertedData = self.get(lastRowId)
 
       conn.close()
@@ -341,6 +353,7 @@ class Model:
           cursor.execute(returning_query, data)
           lastRowId = cursor.fetchone()[0]
           conn.commit()
+          self._touch(conn, cursor, lastRowId, "create")
           print(f"[MODEL.CREATE] Retry successful with ID: {lastRowId}")
           insertedData = self.get(lastRowId)
           conn.close()
@@ -384,6 +397,7 @@ class Model:
     print("update query: ", query)
     cursor.execute(query, data + (key,))
     conn.commit()
+    self._touch(conn, cursor, key)
 
     return self.get(key)
 
@@ -401,6 +415,7 @@ class Model:
     query = connection.convert_placeholders(query)
     cursor.execute(query, data + (key,))
     conn.commit()
+    self._touch(conn, cursor, key)
 
   # deletes one data
   def delete(self, key):
@@ -414,6 +429,7 @@ class Model:
     query = connection.convert_placeholders(query)
     cursor.execute(query, (key,))
     conn.commit()
+    self._touch(conn, cursor, key, "delete")
     return tmpDeleted
 
   # last row primary key
@@ -0,0 +1,296 @@
+"""
+Pre-aggregated analytics cube keyed by
+(year, semester, eventType, campus, collegeDept, sex) with counts and sums of
+registrations, attendances, dropouts and satisfaction ratings.
+
+Writes never touch the cube directly: they only record the affected event in
+analyticsCubeDirty (Model writes do this through Model._touch). Before the
+cube is read, the (year, semester, eventType) slices of the dirty events, both
+the slice an event was last counted in and the one it belongs to now, are
+re-aggregated from the source tables. The cube is never rebuilt wholesale
+unless it is empty or a bulk write asked for it.
+"""
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, convert_boolean_condition, DATABASE_URL
+from datetime import datetime
+
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+DIMENSIONS = ["year", "semester", "eventType", "campus", "collegeDept", "sex"]
+MEASURES = ["registrations", "attendances", "dropouts", "ratingCount", "ratingSum"]
+
+# event types written to analyticsCubeDirty; "*" requests a full rebuild
+EVENT_TABLES = {"internalEvents": "internal", "externalEvents": "external"}
+REBUILD_ALL = "*"
+
+def _tables():
+  return (
+    quote_identifier("analyticsCube"),
+    quote_identifier("analyticsCubeEvents"),
+    quote_identifier("analyticsCubeDirty"),
+  )
+
+def _yearExpression(column):
+  if is_postgresql:
+    return f"CAST(EXTRACT(YEAR FROM to_timestamp({column} / 1000.0)) AS INTEGER)"
+  return f"CAST(strftime('%Y', {column} / 1000, 'unixepoch', 'localtime') AS INTEGER)"
+
+def _semesterExpression(column):
+  # 1 for Jan-Jun, 2 for Jul-Dec
+  if is_postgresql:
+    return f"CASE WHEN EXTRACT(MONTH FROM to_timestamp({column} / 1000.0)) <= 6 THEN 1 ELSE 2 END"
+  return f"CASE WHEN CAST(strftime('%m', {column} / 1000, 'unixepoch', 'localtime') AS INTEGER) <= 6 THEN 1 ELSE 2 END"
+
+def _eventsQuery():
+  """Dated accepted/completed events with the cube slice they fall into"""
+  selects = []
+  for table, eventType in EVENT_TABLES.items():
+    selects.append(f"""
+      SELECT id, '{eventType}' AS type,
+             {_yearExpression('durationStart')} AS year,
+             {_semesterExpression('durationStart')} AS semester
+      FROM {quote_identifier(table)}
+      WHERE status IN ('accepted', 'completed') AND durationStart IS NOT NULL
+    """)
+  return " UNION ALL ".join(selects)
+
+def _sliceFilter(slices):
+  """WHERE clause restricting an events query to the given slices (all when None)"""
+  if slices == None:
+    return "", []
+  clauses = " OR ".join(["(year = ? AND semester = ? AND type = ?)"] * len(slices))
+  params = [value for slice in slices for value in slice]
+  return f"WHERE {clauses}", params
+
+def _aggregate(cursor, slices=None):
+  """Cube rows for the given slices, computed from the source tables"""
+  requirements_table = quote_identifier("requirements")
+  evaluation_table = quote_identifier("evaluation")
+  surveys_table = quote_identifier("satisfactionSurveys")
+  where, params = _sliceFilter(slices)
+
+  dimensions = """
+    COALESCE(NULLIF(r.campus, ''), 'Unknown') AS campus,
+    COALESCE(NULLIF(r.collegeDept, ''), 'Unknown') AS collegeDept,
+    COALESCE(NULLIF(r.sex, ''), 'Unknown') AS sex
+  """
+  query = f"""
+    WITH slice_events AS (
+      SELECT * FROM ({_eventsQuery()}) events {where}
+    ),
+    attended AS (
+      SELECT DISTINCT requirementId FROM {evaluation_table}
+      WHERE finalized = 1 AND criteria IS NOT NULL AND criteria != ''
+    ),
+    facts AS (
+      SELECT se.year, se.semester, se.type AS eventType, {dimensions},
+             1 AS registrations,
+             CASE WHEN a.requirementId IS NULL THEN 0 ELSE 1 END AS attendances,
+             0 AS ratingCount,
+             0.0 AS ratingSum
+      FROM {requirements_table} r
+      INNER JOIN slice_events se ON se.id = r.eventId AND se.type = r.type
+      LEFT JOIN attended a ON a.requirementId = r.id
+      WHERE r.accepted = 1 OR r.accepted IS NULL
+      UNION ALL
+      SELECT se.year, se.semester, se.type AS eventType, {dimensions},
+             0 AS registrations,
+             0 AS attendances,
+             1 AS ratingCount,
+             ss.overallSatisfaction AS ratingSum
+      FROM {surveys_table} ss
+      INNER JOIN slice_events se ON se.id = ss.eventId AND se.type = ss.eventType
+      LEFT JOIN {requirements_table} r ON r.id = ss.requirementId
+      WHERE ss.finalized = 1 AND ss.overallSatisfaction > 0
+    )
+    SELECT year, semester, eventType, campus, collegeDept, sex,
+           SUM(registrations), SUM(attendances), SUM(registrations) - SUM(attendances),
+           SUM(ratingCount), SUM(ratingSum)
+    FROM facts
+    GROUP BY year, semester, eventType, campus, collegeDept, sex
+  """
+  cursor.execute(convert_placeholders(convert_boolean_condition(query)), params)
+  rows = cursor.fetchall()
+
+  query = "SELECT id, type, year, semester FROM slice_events"
+  cursor.execute(convert_placeholders(f"WITH slice_events AS (SELECT * FROM ({_eventsQuery()}) events {where}) {query}"), params)
+  return rows, cursor.fetchall()
+
+def _store(cursor, rows, events, slices=None):
+  """Replaces the cube and event-slice rows of the given slices (everything when None)"""
+  cube_table, events_table, _ = _tables()
+  if slices == None:
+    cursor.execute(f"DELETE FROM {cube_table}")
+    cursor.execute(f"DELETE FROM {events_table}")
+  elif slices:
+    for table, typeColumn in ((cube_table, "eventType"), (events_table, "eventType")):
+      query = convert_placeholders(f"DELETE FROM {table} WHERE year = ? AND semester = ? AND {typeColumn} = ?")
+      cursor.executemany(query, list(slices))
+
+  now = int(datetime.now().timestamp() * 1000)
+  columns = DIMENSIONS + MEASURES + ["updatedAt"]
+  query = convert_placeholders(f"""
+    INSERT INTO {cube_table} ({", ".join(columns)})
+    VALUES ({", ".join(["?"] * len(columns))})
+  """)
+  cursor.executemany(query, [tuple(row) + (now,) for row in rows])
+
+  query = convert_placeholders(f"INSERT INTO {events_table} (eventId, eventType, year, semester) VALUES (?, ?, ?, ?)")
+  cursor.executemany(query, events)
+
+###################
+#  Write tracking  #
+###################
+
+def markEventDirty(conn, cursor, eventId, eventType):
+  """Records that an event's cube slice needs re-aggregating, then commits"""
+  _, _, dirty_table = _tables()
+  try:
+    query = convert_placeholders(f"INSERT INTO {dirty_table} (eventId, eventType) VALUES (?, ?)")
+    cursor.execute(query, (eventId, eventType))
+    conn.commit()
+  except Exception as e:
+    print(f"[ANALYTICS_CUBE] Failed to mark event {eventType}/{eventId}: {e}")
+    try:
+      conn.rollback()
+    except Exception:
+      pass
+
+def markAllDirty(conn, cursor):
+  """Requests a full rebuild on the next read (for bulk writes)"""
+  markEventDirty(conn, cursor, 0, REBUILD_ALL)
+
+def recordWrite(conn, cursor, table, key, deleted=False):
+  """Marks the events affected by a Model write on one of the cube's source tables"""
+  if table in EVENT_TABLES:
+    if key != None:
+      markEventDirty(conn, cursor, key, EVENT_TABLES[table])
+    return
+  if table not in ("requirements", "evaluation", "satisfactionSurveys"):
+    return
+  if deleted or key == None:
+    # the row (and with it the event it belonged to) is gone
+    markAllDirty(conn, cursor)
+    return
+
+  _, _, dirty_table = _tables()
+  if table == "requirements":
+    source = f"SELECT eventId, type FROM {quote_identifier('requirements')} WHERE id = ?"
+  elif table == "satisfactionSurveys":
+    source = f"SELECT eventId, eventType FROM {quote_identifier('satisfactionSurveys')} WHERE id = ?"
+  else:
+    source = f"""
+      SELECT r.eventId, r.type FROM {quote_identifier('evaluation')} e
+      INNER JOIN {quote_identifier('requirements')} r ON r.id = e.requirementId
+      WHERE e.id = ?
+    """
+  try:
+    cursor.execute(convert_placeholders(f"INSERT INTO {dirty_table} (eventId, eventType) {source}"), (key,))
+    conn.commit()
+  except Exception as e:
+    print(f"[ANALYTICS_CUBE] Failed to record write on {table}/{key}: {e}")
+    try:
+      conn.rollback()
+    except Exception:
+      pass
+
+#################
+#  Maintenance  #
+#################
+
+def refresh():
+  """Applies pending dirty events; returns the number of slices re-aggregated (-1 for a full rebuild)"""
+  cube_table, events_table, dirty_table = _tables()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(f"SELECT MAX(id) FROM {dirty_table}")
+    watermark = cursor.fetchone()[0]
+    cursor.execute(f"SELECT COUNT(*) FROM {events_table}")
+    built = cursor.fetchone()[0] > 0
+    if watermark == None and built:
+      return 0
+
+    query = convert_placeholders(f"SELECT DISTINCT eventId, eventType FROM {dirty_table} WHERE id <= ?")
+    cursor.execute(query, (watermark or 0,))
+    dirty = cursor.fetchall()
+
+    if not built or any(eventType == REBUILD_ALL for _, eventType in dirty):
+      slices = None
+    else:
+      slices = set()
+      lookup = convert_placeholders(f"SELECT year, semester, eventType FROM {events_table} WHERE eventId = ? AND eventType = ?")
+      current = convert_placeholders(f"SELECT year, semester, type FROM ({_eventsQuery()}) events WHERE id = ? AND type = ?")
+      for eventId, eventType in dirty:
+        for query in (lookup, current):
+          cursor.execute(query, (eventId, eventType))
+          slices.update(tuple(row) for row in cursor.fetchall())
+      slices = sorted(slices)
+
+    if slices == None or slices:
+      rows, events = _aggregate(cursor, slices)
+      _store(cursor, rows, events, slices)
+
+    if watermark != None:
+      cursor.execute(convert_placeholders(f"DELETE FROM {dirty_table} WHERE id <= ?"), (watermark,))
+    conn.commit()
+    return -1 if slices == None else len(slices)
+  except Exception as e:
+    # another worker applying the same slices; its result stands
+    conn.rollback()
+    print(f"[ANALYTICS_CUBE] Refresh failed: {e}")
+    return 0
+  finally:
+    conn.close()
+
+def rebuild():
+  """Re-aggregates the whole cube from the source tables"""
+  conn, cursor = cursorInstance()
+  try:
+    markAllDirty(conn, cursor)
+  finally:
+    conn.close()
+  return refresh()
+
+###########
+#  Query  #
+###########
+
+def query(groupBy: list[str], filters: dict[str, list]) -> list[dict]:
+  """
+  Rolls the cube up to the requested dimensions, keeping only cells whose
+  dimension values are in the given filter lists.
+  """
+  refresh()
+  cube_table, _, _ = _tables()
+
+  conditions = []
+  params = []
+  for dimension, values in filters.items():
+    conditions.append(f"{dimension} IN ({','.join(['?'] * len(values))})")
+    params += values
+  where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+  sums = ", ".join(f"SUM({measure})" for measure in MEASURES)
+  selected = ", ".join(groupBy + [sums])
+  grouping = f"GROUP BY {', '.join(groupBy)} ORDER BY {', '.join(groupBy)}" if groupBy else ""
+
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"SELECT {selected} FROM {cube_table} {where} {grouping}"), params)
+    rows = cursor.fetchall()
+  finally:
+    conn.close()
+
+  results = []
+  for row in rows:
+    cell = dict(zip(groupBy, row[:len(groupBy)]))
+    registrations, attendances, dropouts, ratingCount, ratingSum = [value or 0 for value in row[len(groupBy):]]
+    cell.update({
+      "registrations": int(registrations),
+      "attendances": int(attendances),
+      "dropouts": int(dropouts),
+      "ratingCount": int(ratingCount),
+      "averageRating": round(float(ratingSum) / ratingCount, 2) if ratingCount else 0,
+      "attendanceRate": round(100.0 * attendances / registrations, 1) if registrations else 0,
+      "dropoutRate": round(100.0 * dropouts / registrations, 1) if registrations else 0,
+    })
+    results.append(cell)
+  return results
@@ -1,246 +1,176 @@
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import accuracy_score, mean_squared_error
+from dotenv import load_dotenv
+import threading
 import joblib
+import json
+import time
 import os
-from ..database.connection import cursorInstance, quote_identifier, DATABASE_URL
+from . import FeatureStore
+
+try:
+    import fcntl
+except ImportError:
+    # Windows development machines: single process, no cross-worker lock needed
+    fcntl = None
+
+load_dotenv()
+
+# Versioned model registry: <MODEL_REGISTRY_DIR>/<version>/ holds the pickled
+# models, scalers and encoders plus a manifest.json; LATEST names the version
+# request handlers should score with.
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "models")
+MODEL_VERSIONS_KEPT = 5
+MODEL_NAMES = ['event_success', 'volunteer_dropout']
+
+# Seconds between scheduled retrains (0 disables the background trainer)
+TRAINING_INTERVAL = int(os.getenv("ANALYTICS_TRAINING_INTERVAL", 24 * 60 * 60))
+# How often each worker checks the registry for a newer version
+REGISTRY_POLL_INTERVAL = 300
+
+EVENT_SUCCESS_FEATURES = ['duration_hours', 'total_participants', 'is_weekend', 'has_feedback']
+EVENT_SUCCESS_CATEGORICAL = ['modeOfDelivery']
+VOLUNTEER_DROPOUT_FEATURES = ['age', 'volunterismExperience', 'total_registrations',
+                              'attendance_rate', 'participation_span', 'days_since_last_event']
+VOLUNTEER_DROPOUT_CATEGORICAL = ['sex', 'campus', 'collegeDept', 'yrlevelprogram']
 
 class AnalyticsEngine:
-    def __init__(self):
-        self.conn, _ = cursorInstance()
+    def __init__(self, n_jobs=-1):
+        self.n_jobs = n_jobs
         self.models = {}
         self.scalers = {}
         self.encoders = {}
-        
+        self.features = {}
+        self.metrics = {}
+        self.version = None
+
     def prepare_event_success_data(self):
         """Prepare data for event success prediction"""
-        internal_events_table = quote_identifier('internalEvents')
-        external_events_table = quote_identifier('externalEvents')
-        requirements_table = quote_identifier('requirements')
-        evaluation_table = quote_identifier('evaluation')
-        feedback_table = quote_identifier('feedback')
-        query = f"""
-        SELECT 
-            ie.id,
-            ie.title,
-            ie."durationStart",
-            ie."durationEnd",
-            ie.venue,
-            ie."modeOfDelivery",
-            ie."maleTotal",
-            ie."femaleTotal",
-            ie.status,
-            ie."createdAt",
-            COUNT(r.id) as registered_count,
-            COUNT(CASE WHEN e.finalized = 1 AND e.criteria != '' THEN 1 END) as attended_count,
-            AVG(CASE WHEN f.id IS NOT NULL THEN 1 ELSE 0 END) as has_feedback
-        FROM {internal_events_table} ie
-        LEFT JOIN {requirements_table} r ON ie.id = r."eventId" AND r.type = 'internal'
-        LEFT JOIN {evaluation_table} e ON r.id = e."requirementId"
-        LEFT JOIN {feedback_table} f ON ie."feedback_id" = f.id
-        WHERE ie.status IN ('accepted', 'completed', 'cancelled')
-        GROUP BY ie.id
-        
-        UNION ALL
-        
-        SELECT 
-            ee.id,
-            ee.title,
-            ee."durationStart",
-            ee."durationEnd",
-            ee.location as venue,
-            'external' as modeOfDelivery,
-            0 as maleTotal,
-            0 as femaleTotal,
-            ee.status,
-            ee."createdAt",
-            COUNT(r.id) as registered_count,
-            COUNT(CASE WHEN e.finalized = 1 AND e.criteria != '' THEN 1 END) as attended_count,
-            AVG(CASE WHEN f.id IS NOT NULL THEN 1 ELSE 0 END) as has_feedback
-        FROM {external_events_table} ee
-        LEFT JOIN {requirements_table} r ON ee.id = r."eventId" AND r.type = 'external'
-        LEFT JOIN {evaluation_table} e ON r.id = e."requirementId"
-        LEFT JOIN {feedback_table} f ON ee."feedback_id" = f.id
-        WHERE ee.status IN ('accepted', 'completed', 'cancelled')
-        GROUP BY ee.id
-        """
-        
-        df = pd.read_sql_query(query, self.conn)
-        
-        # Feature engineering
-        df['duration_hours'] = (df['durationEnd'] - df['durationStart']) / (1000 * 60 * 60)
-        df['attendance_rate'] = df['attended_count'] / (df['registered_count'] + 1e-6)
-        df['total_participants'] = df['maleTotal'] + df['femaleTotal']
-        df['is_weekend'] = pd.to_datetime(df['createdAt']).dt.dayofweek.isin([5, 6]).astype(int)
-        
-        # Success definition: attendance rate > 0.7 and status = 'completed'
-        df['success'] = ((df['attendance_rate'] > 0.7) & (df['status'] == 'completed')).astype(int)
-        
-        return df
+        return FeatureStore.eventFeatures(['accepted', 'completed', 'cancelled'])
     
     def prepare_volunteer_dropout_data(self):
         """Prepare data for volunteer dropout risk prediction"""
-        # Determine boolean value based on database type
-        is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
-        accepted_value = 'true' if is_postgresql else '1'
-        
-        membership_table = quote_identifier('membership')
-        requirements_table = quote_identifier('requirements')
-        evaluation_table = quote_identifier('evaluation')
-        query = f"""
-        SELECT 
-            m.id,
-            m.age,
-            m.sex,
-            m.campus,
-            m."collegeDept",
-            m."yrlevelprogram",
-            m."volunterismExperience",
-            m."weekdaysTimeDevotion",
-            m."weekendsTimeDevotion",
-            m."areasOfInterest",
-            m.accepted,
-            m.active,
-            COUNT(r.id) as total_registrations,
-            COUNT(CASE WHEN e.finalized = 1 AND e.criteria != '' THEN 1 END) as attended_events,
-            AVG(CASE WHEN e.finalized = 1 AND e.criteria != '' THEN 1 ELSE 0 END) as attendance_rate,
-            MAX(r."createdAt") as last_participation,
-            MIN(r."createdAt") as first_participation
-        FROM {membership_table} m
-        LEFT JOIN {requirements_table} r ON m.email = r.email
-        LEFT JOIN {evaluation_table} e ON r.id = e."requirementId"
-        WHERE m.accepted = {accepted_value}
-        GROUP BY m.id
-        """
-        
-        df = pd.read_sql_query(query, self.conn)
-        
-        # Feature engineering
-        df['participation_span'] = (pd.to_datetime(df['last_participation']) - pd.to_datetime(df['first_participation'])).dt.days
-        df['days_since_last_event'] = (datetime.now() - pd.to_datetime(df['last_participation'])).dt.days
+        df = FeatureStore.memberFeatures()
+        df = df[df['accepted'] == 1].reset_index(drop=True)
         df['is_high_risk'] = ((df['attendance_rate'] < 0.5) | (df['days_since_last_event'] > 90)).astype(int)
-        
         return df
     
-    def train_event_success_model(self):
-        """Train model to predict event success"""
-        df = self.prepare_event_success_data()
-        
-        # Select features
-        feature_columns = ['duration_hours', 'total_participants', 'is_weekend', 'has_feedback']
-        X = df[feature_columns].fillna(0)
-        y = df['success']
+    def _fit_classifier(self, name, df, target, numeric_columns, categorical_columns):
+        """Encode, scale and fit a RandomForest for one model of the registry"""
+        X = df[numeric_columns].fillna(0)
+        y = df[target]
         
         # Encode categorical variables
-        le = LabelEncoder()
-        X['modeOfDelivery'] = le.fit_transform(df['modeOfDelivery'].fillna('unknown'))
-        self.encoders['modeOfDelivery'] = le
+        for col in categorical_columns:
+            le = LabelEncoder()
+            X[col] = le.fit_transform(df[col].fillna('unknown').astype(str))
+            self.encoders[col] = le
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        # Split data (as a plain array: scoring builds rows without column names)
+        X_train, X_test, y_train, y_test = train_test_split(X.to_numpy(dtype=float), y, test_size=0.2, random_state=42)
         
         # Scale features
         scaler = StandardScaler()
         X_train_scaled = scaler.fit_transform(X_train)
         X_test_scaled = scaler.transform(X_test)
-        self.scalers['event_success'] = scaler
+        self.scalers[name] = scaler
         
         # Train model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
+        model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=self.n_jobs)
         model.fit(X_train_scaled, y_train)
         
         # Evaluate
         y_pred = model.predict(X_test_scaled)
         accuracy = accuracy_score(y_test, y_pred)
-        print(f"Event Success Model Accuracy: {accuracy:.3f}")
         
-        self.models['event_success'] = model
+        self.models[name] = model
+        self.features[name] = {"numeric": numeric_columns, "categorical": categorical_columns}
+        self.metrics[name] = {"accuracy": round(float(accuracy), 4), "samples": int(len(df))}
+        return model, accuracy
+    
+    def train_event_success_model(self):
+        """Train model to predict event success"""
+        df = self.prepare_event_success_data()
+        model, accuracy = self._fit_classifier(
+            'event_success', df, 'success', EVENT_SUCCESS_FEATURES, EVENT_SUCCESS_CATEGORICAL
+        )
+        print(f"Event Success Model Accuracy: {accuracy:.3f}")
         return model
     
     def train_volunteer_dropout_model(self):
         """Train model to predict volunteer dropout risk"""
         df = self.prepare_volunteer_dropout_data()
-        
-        # Select features
-        feature_columns = ['age', 'volunterismExperience', 'total_registrations', 
-                          'attendance_rate', 'participation_span', 'days_since_last_event']
-        X = df[feature_columns].fillna(0)
-        y = df['is_high_risk']
-        
-        # Encode categorical variables
-        categorical_columns = ['sex', 'campus', 'collegeDept', 'yrlevelprogram']
-        for col in categorical_columns:
-            le = LabelEncoder()
-            X[col] = le.fit_transform(df[col].fillna('unknown'))
-            self.encoders[col] = le
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Scale features
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        self.scalers['volunteer_dropout'] = scaler
-        
-        # Train model
-        model = RandomForestClassifier(n_estimators=100, random_state=42)
-        model.fit(X_train_scaled, y_train)
-        
-        # Evaluate
-        y_pred = model.predict(X_test_scaled)
-        accuracy = accuracy_score(y_test, y_pred)
+        model, accuracy = self._fit_classifier(
+            'volunteer_dropout', df, 'is_high_risk', VOLUNTEER_DROPOUT_FEATURES, VOLUNTEER_DROPOUT_CATEGORICAL
+        )
         print(f"Volunteer Dropout Model Accuracy: {accuracy:.3f}")
-        
-        self.models['volunteer_dropout'] = model
         return model
     
+    def train_all(self):
+        """Train every registry model; models that cannot be trained are skipped"""
+        trained = []
+        for name, train in (('event_success', self.train_event_success_model),
+                            ('volunteer_dropout', self.train_volunteer_dropout_model)):
+            try:
+                train()
+                trained.append(name)
+            except Exception as e:
+                print(f"[ANALYTICS_ENGINE] Could not train {name} model: {e}")
+        return trained
+    
+    def _feature_matrix(self, name, records):
+        """Build the scaled feature matrix for a list of input dicts"""
+        if name not in self.models:
+            raise RuntimeError(f"No trained '{name}' model is loaded")
+        
+        columns = self.features.get(name, {})
+        numeric_columns = columns.get("numeric", [])
+        categorical_columns = columns.get("categorical", [])
+        
+        features = np.array(
+            [[record.get(col, 0) or 0 for col in numeric_columns] for record in records],
+            dtype=float
+        ).reshape(len(records), len(numeric_columns))
+        
+        if categorical_columns:
+            encoded = []
+            for col in categorical_columns:
+                known = {label: index for index, label in enumerate(self.encoders[col].classes_)}
+                fallback = known.get('unknown', 0)
+                encoded.append([known.get(str(record.get(col) or 'unknown'), fallback) for record in records])
+            features = np.hstack([features, np.array(encoded, dtype=float).T])
+        
+        return self.scalers[name].transform(features)
+    
+    def _positive_probability(self, name, features_scaled):
+        model = self.models[name]
+        probabilities = model.predict_proba(features_scaled)
+        # a model fit on a single class has no positive column
+        if 1 not in model.classes_:
+            return np.zeros(len(features_scaled))
+        return probabilities[:, list(model.classes_).index(1)]
+    
     def predict_event_success(self, event_data):
         """Predict success probability for an event"""
-        if 'event_success' not in self.models:
-            self.train_event_success_model()
-        
-        # Prepare input data
-        features = np.array([[
-            event_data.get('duration_hours', 0),
-            event_data.get('total_participants', 0),
-            event_data.get('is_weekend', 0),
-            event_data.get('has_feedback', 0)
-        ]])
-        
-        # Scale features
-        features_scaled = self.scalers['event_success'].transform(features)
-        
-        # Predict
-        success_prob = self.models['event_success'].predict_proba(features_scaled)[0][1]
-        return success_prob
+        features_scaled = self._feature_matrix('event_success', [event_data])
+        return float(self._positive_probability('event_success', features_scaled)[0])
     
     def predict_volunteer_dropout_risk(self, volunteer_data):
         """Predict dropout risk for a volunteer"""
-        if 'volunteer_dropout' not in self.models:
-            self.train_volunteer_dropout_model()
-        
-        # Prepare input data
-        features = np.array([[
-            volunteer_data.get('age', 0),
-            volunteer_data.get('volunterismExperience', 0),
-            volunteer_data.get('total_registrations', 0),
-            volunteer_data.get('attendance_rate', 0),
-            volunteer_data.get('participation_span', 0),
-            volunteer_data.get('days_since_last_event', 0)
-        ]])
-        
-        # Scale features
-        features_scaled = self.scalers['volunteer_dropout'].transform(features)
-        
-        # Predict
-        dropout_prob = self.models['volunteer_dropout'].predict_proba(features_scaled)[0][1]
-        return dropout_prob
-    
+        features_scaled = self._feature_matrix('volunteer_dropout', [volunteer_data])
+        return float(self._positive_probability('volunteer_dropout', features_scaled)[0])
+
+    def predict_volunteer_dropout_risk_batch(self, volunteers):
+        """Predict dropout risk for many volunteers with a single predict_proba call"""
+        if not volunteers:
+            return np.zeros(0)
+        features_scaled = self._feature_matrix('volunteer_dropout', volunteers)
+        return self._positive_probability('volunteer_dropout', features_scaled)
+
     def get_analytics_insights(self):
         """Get comprehensive analytics insights"""
         event_df = self.prepare_event_success_data()
@@ -264,26 +194,175 @@ class AnalyticsEngine:
         
         return insights
     
-    def save_models(self, model_dir='models'):
-        """Save trained models to disk"""
-        os.makedirs(model_dir, exist_ok=True)
+    def save_models(self, model_dir=MODEL_REGISTRY_DIR, version=None):
+        """Save trained models as a new registry version and publish it as LATEST"""
+        version = version or datetime.now().strftime('%Y%m%d%H%M%S%f')
+        version_dir = os.path.join(model_dir, version)
+        os.makedirs(version_dir, exist_ok=True)
         
         for name, model in self.models.items():
-            joblib.dump(model, f"{model_dir}/{name}_model.pkl")
+            joblib.dump(model, os.path.join(version_dir, f"{name}_model.pkl"))
         
         for name, scaler in self.scalers.items():
-            joblib.dump(scaler, f"{model_dir}/{name}_scaler.pkl")
+            joblib.dump(scaler, os.path.join(version_dir, f"{name}_scaler.pkl"))
         
         for name, encoder in self.encoders.items():
-            joblib.dump(encoder, f"{model_dir}/{name}_encoder.pkl")
+            joblib.dump(encoder, os.path.join(version_dir, f"{name}_encoder.pkl"))
+        
+        manifest = {
+            "version": version,
+            "createdAt": int(datetime.now().timestamp() * 1000),
+            "models": list(self.models.keys()),
+            "encoders": list(self.encoders.keys()),
+            "features": self.features,
+            "metrics": self.metrics,
+        }
+        with open(os.path.join(version_dir, "manifest.json"), "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+        
+        # swap the pointer atomically so readers never see a half-written version
+        pointer_tmp = os.path.join(model_dir, f"LATEST.{os.getpid()}.tmp")
+        with open(pointer_tmp, "w") as pointer_file:
+            pointer_file.write(version)
+        os.replace(pointer_tmp, os.path.join(model_dir, "LATEST"))
+        
+        self.version = version
+        prune_model_versions(model_dir)
+        return version
+    
+    def load_models(self, model_dir=MODEL_REGISTRY_DIR, version=None):
+        """Load a registry version (the latest by default); returns the loaded version"""
+        version = version or latest_model_version(model_dir)
+        if not version:
+            return None
+        
+        version_dir = os.path.join(model_dir, version)
+        with open(os.path.join(version_dir, "manifest.json"), "r") as manifest_file:
+            manifest = json.load(manifest_file)
+        
+        for name in manifest.get("models", []):
+            self.models[name] = joblib.load(os.path.join(version_dir, f"{name}_model.pkl"))
+            self.scalers[name] = joblib.load(os.path.join(version_dir, f"{name}_scaler.pkl"))
+        
+        for name in manifest.get("encoders", []):
+            self.encoders[name] = joblib.load(os.path.join(version_dir, f"{name}_encoder.pkl"))
+        
+        self.features = manifest.get("features", {})
+        self.metrics = manifest.get("metrics", {})
+        self.version = version
+        return version
+
+def latest_model_version(model_dir=MODEL_REGISTRY_DIR):
+    """Version named by the registry's LATEST pointer, or None"""
+    try:
+        with open(os.path.join(model_dir, "LATEST"), "r") as pointer_file:
+            version = pointer_file.read().strip()
+        return version if os.path.isfile(os.path.join(model_dir, version, "manifest.json")) else None
+    except FileNotFoundError:
+        return None
+
+def model_version_age(model_dir=MODEL_REGISTRY_DIR, version=None):
+    """Seconds since the given (or latest) version was trained, None if missing"""
+    version = version or latest_model_version(model_dir)
+    if not version:
+        return None
+    with open(os.path.join(model_dir, version, "manifest.json"), "r") as manifest_file:
+        created_at = json.load(manifest_file).get("createdAt", 0)
+    return time.time() - created_at / 1000
+
+def prune_model_versions(model_dir=MODEL_REGISTRY_DIR, keep=MODEL_VERSIONS_KEPT):
+    """Remove all but the newest versions (never the one LATEST points to)"""
+    import shutil
+    latest = latest_model_version(model_dir)
+    versions = sorted(
+        entry for entry in os.listdir(model_dir)
+        if os.path.isfile(os.path.join(model_dir, entry, "manifest.json"))
+    )
+    for version in versions[:-keep]:
+        if version != latest:
+            shutil.rmtree(os.path.join(model_dir, version), ignore_errors=True)
+
+#######################
+#  Serving & Training  #
+#######################
+
+# The engine request handlers score with; replaced wholesale when a newer
+# registry version is loaded so readers never observe a partial update.
+_active_engine = None
+
+def get_engine():
+    """Warm-loaded engine for scoring, or None if no model version exists yet"""
+    return _active_engine
+
+def refresh_engine(model_dir=MODEL_REGISTRY_DIR):
+    """Load the latest registry version if it differs from the active one"""
+    global _active_engine
+    version = latest_model_version(model_dir)
+    if not version or (_active_engine and _active_engine.version == version):
+        return _active_engine
+    
+    engine = AnalyticsEngine()
+    try:
+        engine.load_models(model_dir, version)
+        _active_engine = engine
+        print(f"[ANALYTICS_ENGINE] Loaded model version {version}")
+    except Exception as e:
+        print(f"[ANALYTICS_ENGINE] Failed to load model version {version}: {e}")
+    return _active_engine
+
+def train_and_publish(model_dir=MODEL_REGISTRY_DIR, n_jobs=-1):
+    """Train every model on a fresh engine and publish it as a new version"""
+    engine = AnalyticsEngine(n_jobs=n_jobs)
+    if not engine.train_all():
+        return None
+    return engine.save_models(model_dir)
+
+def _train_if_stale(model_dir, interval):
+    """Retrain when the latest version is older than the interval; only one worker trains at a time"""
+    os.makedirs(model_dir, exist_ok=True)
+    age = model_version_age(model_dir)
+    if age is not None and age < interval:
+        return
     
-    def load_models(self, model_dir='models'):
-        """Load trained models from disk"""
-        for name in ['event_success', 'volunteer_dropout']:
-            model_path = f"{model_dir}/{name}_model.pkl"
-            scaler_path = f"{model_dir}/{name}_scaler.pkl"
-            
-            if os.path.exists(model_path) and os.path.exists(scaler_path):
-                self.models[name] = joblib.load(model_path)
-                self.scalers[name] = joblib.load(scaler_path)
+    with open(os.path.join(model_dir, ".training.lock"), "w") as lock_file:
+        if fcntl:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+        
+        # another worker may have published while we waited for the lock
+        age = model_version_age(model_dir)
+        if age is not None and age < interval:
+            return
+        
+        start = time.time()
+        version = train_and_publish(model_dir)
+        if version:
+            print(f"[ANALYTICS_ENGINE] Trained model version {version} in {time.time() - start:.1f}s")
+
+_scheduler_started = False
 
+def start_training_scheduler(interval=TRAINING_INTERVAL, model_dir=MODEL_REGISTRY_DIR):
+    """
+    Warm-loads the latest model version and starts a daemon thread that
+    retrains on schedule and picks up versions published by other workers.
+    """
+    global _scheduler_started
+    refresh_engine(model_dir)
+    if _scheduler_started or interval <= 0:
+        return
+    _scheduler_started = True
+    
+    def trainingLoop():
+        while True:
+            try:
+                _train_if_stale(model_dir, interval)
+                refresh_engine(model_dir)
+            except Exception as e:
+                print(f"[ANALYTICS_ENGINE] Scheduled training failed: {e}")
+            time.sleep(min(interval, REGISTRY_POLL_INTERVAL))
+    
+    th = threading.Thread(target=trainingLoop)
+    th.daemon = True
+    th.start()
@@ -0,0 +1,104 @@
+"""
+Runs analytics sections as a dependency graph on a bounded thread pool.
+
+A section is a function registered with the sections it depends on; it is
+called with their results as keyword arguments. run() computes every
+requested section and its dependencies once, submitting each section as soon
+as its dependencies finished, so independent sections run concurrently.
+
+Each section has a timeout counted from its submission. A section that
+times out or raises is reported as a failed {"success": False, ...} result
+and its dependents still run with that result, so callers always get
+partial results. Python threads cannot be cancelled: a timed-out section keeps its
+worker until it returns, which is why the pool is shared and bounded.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+import os
+import threading
+import time
+
+load_dotenv()
+
+MAX_WORKERS = int(os.getenv("ANALYTICS_MAX_WORKERS", 4))
+SECTION_TIMEOUT = float(os.getenv("ANALYTICS_SECTION_TIMEOUT", 30))
+
+_pool = None
+_poolLock = threading.Lock()
+
+def _sharedPool() -> ThreadPoolExecutor:
+  global _pool
+  with _poolLock:
+    if _pool == None:
+      _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="analytics")
+    return _pool
+
+def failedSection(name: str, error: str, timedOut: bool = False) -> dict:
+  return {
+    "success": False,
+    "error": error,
+    "timedOut": timedOut,
+    "message": f"Failed to compute {name} analytics",
+  }
+
+class AnalyticsOrchestrator:
+  def __init__(self, pool: ThreadPoolExecutor | None = None):
+    self.pool = pool
+    self.sections = {}   # name -> (compute, dependencies, timeout)
+
+  def register(self, name: str, compute, dependsOn: list[str] = [], timeout: float | None = None):
+    for dependency in dependsOn:
+      if dependency not in self.sections:
+        raise ValueError(f"Section {name} depends on unknown section {dependency}")
+    self.sections[name] = (compute, list(dependsOn), timeout or SECTION_TIMEOUT)
+
+  def _closure(self, names) -> list[str]:
+    """Requested sections and everything they depend on"""
+    needed, stack = set(), list(names)
+    while stack:
+      name = stack.pop()
+      if name not in needed:
+        needed.add(name)
+        stack.extend(self.sections[name][1])
+    return [name for name in self.sections if name in needed]
+
+  def run(self, names: list[str], results: dict | None = None) -> dict:
+    """
+    Results of the requested sections (and their dependencies) keyed by
+    name. Sections already in `results` are reused instead of recomputed.
+    """
+    results = dict(results or {})
+    pool = self.pool or _sharedPool()
+    pending = [name for name in self._closure(names) if name not in results]
+    running = {}  # future -> (name, deadline)
+
+    while pending or running:
+      for name in [name for name in pending if all(dependency in results for dependency in self.sections[name][1])]:
+        compute, dependencies, timeout = self.sections[name]
+        arguments = {dependency: results[dependency] for dependency in dependencies}
+        running[pool.submit(compute, **arguments)] = (name, time.monotonic() + timeout)
+        pending.remove(name)
+
+      if not running:
+        break
+      nextDeadline = min(deadline for _, deadline in running.values())
+      done, _ = wait(list(running), timeout=max(nextDeadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+
+      for future in done:
+        name, _ = running.pop(future)
+        try:
+          results[name] = future.result()
+        except Exception as e:
+          print(f"[ANALYTICS] Section {name} failed: {e}")
+          results[name] = failedSection(name, str(e))
+
+      now = time.monotonic()
+      for future, (name, deadline) in list(running.items()):
+        if deadline <= now and not future.done():
+          print(f"[ANALYTICS] Section {name} timed out after {self.sections[name][2]:g}s")
+          results[name] = failedSection(name, f"Timed out after {self.sections[name][2]:g}s", timedOut=True)
+          # frees the worker if the section never started
+          future.cancel()
+          del running[future]
+
+    return results
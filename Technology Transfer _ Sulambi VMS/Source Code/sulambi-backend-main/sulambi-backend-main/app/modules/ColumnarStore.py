@@ -0,0 +1,185 @@
+"""
+In-memory columnar copy of the tables the analytics read, one per worker.
+
+Each table is held as a pandas DataFrame of just the columns analytics use.
+On access the store reads the table's data versions (see DataVersion): when
+only rows were inserted it fetches the rows past its primary-key watermark
+and appends them, when rows were updated or deleted (or the table has no
+increasing key) it reloads the table. Frames handed out are replaced, never
+modified, so callers can keep using them but must not mutate them.
+
+Readers: event success analytics, AnalyticsEngine's training frames and the
+active-member check of the dropout analytics. Not served from here:
+  - satisfaction analytics, which parse evaluation criteria JSON and comment
+    text; free text is kept out of the store to bound each worker's memory
+    (sentiment and issues come from commentSentiment and the text index)
+  - the dropout semester/at-risk figures, which read the derived
+    volunteerParticipationHistory and dropoutRiskAssessment tables; these
+    are rebuilt by tools that replace them wholesale
+"""
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from . import DataVersion
+import pandas as pd
+import threading
+
+# table -> (increasing integer primary key or None, columns, boolean columns)
+# a column is either a name or (name, SQL expression)
+TABLES = {
+  "internalEvents": ("id", [
+    "id", "title", "durationStart", "durationEnd", "venue", "modeOfDelivery",
+    "maleTotal", "femaleTotal", "status", "feedback_id",
+  ], []),
+  "externalEvents": ("id", [
+    "id", "title", "durationStart", "durationEnd", ("venue", "location"), "status", "feedback_id",
+  ], []),
+  # ids are UUIDs, so every change reloads the table
+  "requirements": (None, [
+    "id", "eventId", "type", "fullname", "email", "srcode", "age", "sex", "campus", "collegeDept", "accepted",
+  ], ["accepted"]),
+  "evaluation": ("id", [
+    "id", "requirementId", "finalized",
+    ("hasCriteria", "CASE WHEN criteria IS NOT NULL AND criteria != '' THEN 1 ELSE 0 END"),
+  ], ["finalized", "hasCriteria"]),
+  "satisfactionSurveys": ("id", [
+    "id", "eventId", "eventType", "requirementId", "respondentType", "overallSatisfaction", "submittedAt", "finalized",
+  ], ["finalized"]),
+  "membership": ("id", [
+    "id", "fullname", "email", "age", "sex", "campus", "collegeDept", "yrlevelprogram",
+    "volunterismExperience", "weekdaysTimeDevotion", "weekendsTimeDevotion", "areasOfInterest",
+    "accepted", "active",
+  ], ["volunterismExperience", "accepted", "active"]),
+  "feedback": ("id", ["id"], []),
+}
+
+_TRUE_VALUES = {"1", "true", "yes", "t", "y"}
+_FALSE_VALUES = {"0", "false", "no", "f", "n"}
+
+def _booleanValue(value):
+  if isinstance(value, str):
+    text = value.strip().lower()
+    return True if text in _TRUE_VALUES else False if text in _FALSE_VALUES else pd.NA
+  if value is None or pd.isna(value):
+    return pd.NA
+  # bools, 0/1 integers and the floats pandas makes of them next to NULLs
+  return {1: True, 0: False}.get(value, pd.NA)
+
+def _toBoolean(series: pd.Series) -> pd.Series:
+  """
+  Nullable booleans from 0/1, True/False or yes/no text in any case (older
+  membership rows store 'Yes'/'no'); anything else becomes missing
+  """
+  return pd.Series([_booleanValue(value) for value in series], index=series.index, dtype="boolean")
+
+def _columnNames(columns):
+  return [column if isinstance(column, str) else column[0] for column in columns]
+
+def _selectList(columns):
+  return ", ".join(column if isinstance(column, str) else f"{column[1]} AS {column[0]}" for column in columns)
+
+class ColumnarStore:
+  def __init__(self, tables: dict = TABLES):
+    self.tables = tables
+    self.frames = {}      # table -> DataFrame
+    self.versions = {}    # table -> (version, rewriteVersion) the frame reflects
+    self.watermarks = {}  # table -> highest primary key loaded
+    self.derived = {}     # name -> (versions, value)
+    self.lock = threading.RLock()
+
+  def _load(self, cursor, table, watermark=None):
+    primaryKey, columns, booleans = self.tables[table]
+    query = f"SELECT {_selectList(columns)} FROM {quote_identifier(table)}"
+    params = ()
+    if watermark != None:
+      query += f" WHERE {primaryKey} > ?"
+      params = (int(watermark),)
+    if primaryKey:
+      query += f" ORDER BY {primaryKey}"
+    cursor.execute(convert_placeholders(query), params)
+
+    frame = pd.DataFrame.from_records(cursor.fetchall(), columns=_columnNames(columns))
+    for column in booleans:
+      # SQLite returns 0/1 (or legacy text), PostgreSQL True/False; NULL stays missing
+      frame[column] = _toBoolean(frame[column])
+    return frame
+
+  def _refresh(self, cursor, table, versions):
+    primaryKey = self.tables[table][0]
+    previous = self.versions.get(table)
+    if previous == versions and table in self.frames:
+      return
+
+    frame = None
+    if previous and primaryKey and previous[1] == versions[1] and table in self.frames:
+      # only inserts since the last load
+      appended = self._load(cursor, table, self.watermarks[table])
+      frame = pd.concat([self.frames[table], appended], ignore_index=True) if len(appended) else self.frames[table]
+      cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table)}")
+      if cursor.fetchone()[0] != len(frame):
+        # rows committed out of key order or written without a version bump
+        frame = None
+    if frame is None:
+      frame = self._load(cursor, table)
+
+    self.frames[table] = frame
+    self.versions[table] = versions
+    if primaryKey:
+      self.watermarks[table] = frame[primaryKey].max() if len(frame) else 0
+
+  def _versions(self, tables):
+    keys = [key for table in tables for key in (table, DataVersion.rewriteKey(table))]
+    versions = DataVersion.current(keys)
+    if versions == None:
+      return None
+    return {table: versions[2 * index:2 * index + 2] for index, table in enumerate(tables)}
+
+  def get(self, *tables) -> tuple[pd.DataFrame, ...]:
+    """Current frames of the given tables, refreshing the ones that changed"""
+    versions = self._versions(tables)
+    with self.lock:
+      stale = [table for table in tables if versions == None or self.versions.get(table) != versions[table] or table not in self.frames]
+      if stale:
+        conn, cursor = cursorInstance()
+        try:
+          for table in stale:
+            # without versions the frame is loaded but never trusted on the next access
+            self._refresh(cursor, table, versions[table] if versions else (None, None))
+        finally:
+          conn.close()
+      return tuple(self.frames[table] for table in tables)
+
+  def cached(self, name: str, tables: list[str], compute):
+    """compute(*frames) for the given tables, recomputed only when one of them changed"""
+    frames = self.get(*tables)
+    versions = tuple(self.versions[table] for table in tables)
+    with self.lock:
+      entry = self.derived.get(name)
+      if entry and entry[0] == versions and None not in [version[0] for version in versions]:
+        return entry[1]
+    value = compute(*frames)
+    with self.lock:
+      self.derived[name] = (versions, value)
+    return value
+
+  def events(self) -> pd.DataFrame:
+    """Internal and external events in one frame with a type column"""
+    def compute(internal, external):
+      return pd.concat([
+        internal.assign(type="internal"),
+        external.assign(type="external", modeOfDelivery="external", maleTotal=0, femaleTotal=0),
+      ], ignore_index=True)
+    return self.cached("events", ["internalEvents", "externalEvents"], compute)
+
+  def registrations(self) -> pd.DataFrame:
+    """
+    Requirements that were not rejected, with an attended flag for those that
+    have a finalized evaluation form. This is the event success definition of
+    a registration; the training frames used to also count rejected requests
+    and count a requirement once per evaluation row, which overstated both.
+    """
+    def compute(requirements, evaluation):
+      forms = evaluation[evaluation["finalized"].fillna(False) & evaluation["hasCriteria"].fillna(False)]
+      registered = requirements[requirements["accepted"].fillna(True)]
+      return registered.assign(attended=registered["id"].isin(forms["requirementId"]))
+    return self.cached("registrations", ["requirements", "evaluation"], compute)
+
+defaultStore = ColumnarStore()
@@ -0,0 +1,154 @@
+"""
+Content-addressed store for locally saved uploads (report photos).
+
+An upload is streamed to a temporary file while it is hashed, then kept
+once per SHA-256 under uploads/blobs/<aa>/<bb>/<sha256><ext>, so uploading
+the same photo again reuses the stored file. The uploadBlobs table counts
+the references to each blob: store() adds one, release() drops one and
+deletes the blob when none are left. Paths that are not blobs (files saved
+before this store existed) are left alone by release().
+
+The row is the arbiter between workers: store() writes the file after its
+upsert and before committing, release() unlinks before committing the row
+delete, and the database holds the row's write lock in between, so a
+concurrent store() either keeps the row alive or rewrites the file after
+the unlink.
+
+digest() gives the SHA-256 of any file under uploads/ for HTTP validators:
+read from the name for blobs, hashed once per file version otherwise.
+"""
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import os
+import re
+import threading
+
+ROOT_PATH = "uploads"
+BLOB_DIRECTORY = "blobs"
+CHUNK_SIZE = 64 * 1024
+
+# serializes store() and release() between threads; across processes the
+# uploadBlobs row locks order them
+_blobLock = threading.Lock()
+
+DIGEST_CACHE_SIZE = 2048
+_digestCache = OrderedDict()   # path -> ((mtime, size), digest)
+_digestLock = threading.Lock()
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})(\.[0-9a-z]+)?$")
+
+def _blobPath(digest: str, extension: str) -> str:
+  return os.path.join(ROOT_PATH, BLOB_DIRECTORY, digest[:2], digest[2:4], digest + extension)
+
+def _extension(filename: str) -> str:
+  extension = os.path.splitext(filename or "")[1].lower()
+  return extension if extension[1:].isalnum() else ""
+
+def store(stream, filename: str) -> str:
+  """Saves a file stream (deduplicated) and returns its path; adds a reference"""
+  temporaryDirectory = os.path.join(ROOT_PATH, BLOB_DIRECTORY, "tmp")
+  os.makedirs(temporaryDirectory, exist_ok=True)
+  temporaryPath = os.path.join(temporaryDirectory, f"{os.getpid()}-{threading.get_ident()}-{datetime.now().timestamp()}")
+
+  digest, size = hashlib.sha256(), 0
+  try:
+    with open(temporaryPath, "wb") as temporaryFile:
+      while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+          break
+        digest.update(chunk)
+        size += len(chunk)
+        temporaryFile.write(chunk)
+    digest = digest.hexdigest()
+
+    table = quote_identifier('uploadBlobs')
+    with _blobLock:
+      conn, cursor = cursorInstance()
+      try:
+        cursor.execute(convert_placeholders(f"SELECT path FROM {table} WHERE hash = ?"), (digest,))
+        existing = cursor.fetchone()
+        # the same content under another extension still maps to the first path
+        path = existing[0] if existing else _blobPath(digest, _extension(filename))
+        cursor.execute(convert_placeholders(f"""
+          INSERT INTO {table} (hash, path, size, refCount, updatedAt)
+          VALUES (?, ?, ?, 1, ?)
+          ON CONFLICT(hash) DO UPDATE SET refCount = {table}.refCount + 1, updatedAt = excluded.updatedAt
+        """), (digest, path, size, int(datetime.now().timestamp() * 1000)))
+
+        # always written (same content), as a release in another worker may
+        # have unlinked the file just before this upsert
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temporaryPath, path)
+        conn.commit()
+      finally:
+        conn.close()
+    return path
+  finally:
+    if os.path.exists(temporaryPath):
+      os.remove(temporaryPath)
+
+def release(paths: list[str]) -> int:
+  """Drops one reference per path; returns the number of blobs deleted"""
+  blobPrefix = os.path.join(ROOT_PATH, BLOB_DIRECTORY) + os.sep
+  paths = [path.strip() for path in paths if path and path.strip().startswith(blobPrefix)]
+  if not paths:
+    return 0
+
+  table = quote_identifier('uploadBlobs')
+  deleted = 0
+  with _blobLock:
+    conn, cursor = cursorInstance()
+    try:
+      for path in paths:
+        cursor.execute(convert_placeholders(f"UPDATE {table} SET refCount = refCount - 1 WHERE path = ?"), (path,))
+      cursor.execute(f"SELECT path FROM {table} WHERE refCount <= 0")
+      unreferenced = [path for path, in cursor.fetchall()]
+      cursor.execute(f"DELETE FROM {table} WHERE refCount <= 0")
+      # unlinked while the deleted rows are still locked, so no store() can
+      # re-add one of them in between
+      for path in unreferenced:
+        try:
+          os.remove(path)
+          deleted += 1
+        except OSError:
+          pass
+      conn.commit()
+    finally:
+      conn.close()
+
+    from .PhotoVariants import discard
+    for path in unreferenced:
+      discard(os.path.splitext(os.path.basename(path))[0])
+  return deleted
+
+def isBlob(relativePath: str) -> bool:
+  """Whether a path relative to uploads/ names a blob (its content never changes)"""
+  parts = relativePath.replace("\\", "/").split("/")
+  return len(parts) == 4 and parts[0] == BLOB_DIRECTORY and _BLOB_NAME.match(parts[3]) != None
+
+def digest(path: str) -> str:
+  """SHA-256 of the file at `path`"""
+  match = _BLOB_NAME.match(os.path.basename(path))
+  if match and os.path.basename(os.path.dirname(os.path.dirname(os.path.dirname(path)))) == BLOB_DIRECTORY:
+    return match.group(1)
+
+  status = os.stat(path)
+  version = (status.st_mtime_ns, status.st_size)
+  with _digestLock:
+    cached = _digestCache.get(path)
+    if cached and cached[0] == version:
+      _digestCache.move_to_end(path)
+      return cached[1]
+
+  fileHash = hashlib.sha256()
+  with open(path, "rb") as storedFile:
+    for chunk in iter(lambda: storedFile.read(CHUNK_SIZE), b""):
+      fileHash.update(chunk)
+
+  with _digestLock:
+    _digestCache[path] = (version, fileHash.hexdigest())
+    while len(_digestCache) > DIGEST_CACHE_SIZE:
+      _digestCache.popitem(last=False)
+  return fileHash.hexdigest()
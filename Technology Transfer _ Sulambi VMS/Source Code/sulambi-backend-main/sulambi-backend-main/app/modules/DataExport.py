@@ -0,0 +1,306 @@
+"""
+Streaming exports of evaluations, satisfaction surveys and participation
+history as CSV, Parquet or XLSX.
+
+Rows are read in chunks of EXPORT_CHUNK_ROWS (a server-side cursor on
+PostgreSQL, fetchmany on SQLite) and each chunk is encoded and handed out
+before the next is read, so memory stays flat however large the table is.
+CSV and Parquet (one row group per chunk) come out as they are produced;
+an XLSX file can only be finished at the end, so openpyxl's write-only
+mode spills the rows to a temporary file which is streamed once complete.
+"""
+try:
+  import pyarrow as pa
+  import pyarrow.parquet as pq
+  PYARROW_AVAILABLE = True
+except ImportError:
+  print("Warning: pyarrow not available. Parquet exports are disabled.")
+  PYARROW_AVAILABLE = False
+
+try:
+  from openpyxl import Workbook
+  OPENPYXL_AVAILABLE = True
+except ImportError:
+  print("Warning: openpyxl not available. XLSX exports are disabled.")
+  OPENPYXL_AVAILABLE = False
+
+from ..database.connection import cursorInstance, quote_identifier, is_postgresql_connection
+from dotenv import load_dotenv
+from datetime import datetime
+from uuid import uuid4
+import csv
+import io
+import os
+import tempfile
+
+load_dotenv()
+
+CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 5000))
+FILE_BUFFER_SIZE = 64 * 1024
+
+# format -> (file extension, content type)
+FORMATS = {
+  "csv": ("csv", "text/csv; charset=utf-8"),
+  "parquet": ("parquet", "application/vnd.apache.parquet"),
+  "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+def _eventTitle(alias: str, typeColumn: str) -> str:
+  return f"COALESCE(CASE WHEN {alias}.{typeColumn} = 'internal' THEN ie.title ELSE ee.title END, '')"
+
+# dataset -> (FROM clause, ORDER BY, [(header, SQL expression, kind)])
+# kinds: int, float, bool, text and timestamp (milliseconds since epoch)
+DATASETS = {
+  "evaluations": (
+    lambda: f"""
+      {quote_identifier('evaluation')} e
+      LEFT JOIN {quote_identifier('requirements')} r ON e.requirementId = r.id
+      LEFT JOIN {quote_identifier('internalEvents')} ie ON r.eventId = ie.id AND r.type = 'internal'
+      LEFT JOIN {quote_identifier('externalEvents')} ee ON r.eventId = ee.id AND r.type = 'external'
+    """,
+    "e.id",
+    [
+      ("ID", "e.id", "int"),
+      ("Event ID", "r.eventId", "int"),
+      ("Event Type", "r.type", "text"),
+      ("Event Title", _eventTitle("r", "type"), "text"),
+      ("Requirement ID", "e.requirementId", "text"),
+      ("Respondent Email", "r.email", "text"),
+      ("Respondent Name", "r.fullname", "text"),
+      ("Criteria", "e.criteria", "text"),
+      ("Q13 (Volunteer Score)", "e.q13", "text"),
+      ("Q14 (Beneficiary Score)", "e.q14", "text"),
+      ("Comment", "e.comment", "text"),
+      ("Recommendations", "e.recommendations", "text"),
+      ("Finalized", "e.finalized", "bool"),
+    ],
+  ),
+  "surveys": (
+    lambda: f"""
+      {quote_identifier('satisfactionSurveys')} s
+      LEFT JOIN {quote_identifier('internalEvents')} ie ON s.eventId = ie.id AND s.eventType = 'internal'
+      LEFT JOIN {quote_identifier('externalEvents')} ee ON s.eventId = ee.id AND s.eventType = 'external'
+    """,
+    "s.id",
+    [
+      ("ID", "s.id", "int"),
+      ("Event ID", "s.eventId", "int"),
+      ("Event Type", "s.eventType", "text"),
+      ("Event Title", _eventTitle("s", "eventType"), "text"),
+      ("Requirement ID", "s.requirementId", "text"),
+      ("Respondent Type", "s.respondentType", "text"),
+      ("Respondent Email", "s.respondentEmail", "text"),
+      ("Respondent Name", "s.respondentName", "text"),
+      ("Overall Satisfaction (1-5)", "s.overallSatisfaction", "float"),
+      ("Volunteer Rating (1-5)", "s.volunteerRating", "float"),
+      ("Beneficiary Rating (1-5)", "s.beneficiaryRating", "float"),
+      ("Organization Rating (1-5)", "s.organizationRating", "float"),
+      ("Communication Rating (1-5)", "s.communicationRating", "float"),
+      ("Venue Rating (1-5)", "s.venueRating", "float"),
+      ("Materials Rating (1-5)", "s.materialsRating", "float"),
+      ("Support Rating (1-5)", "s.supportRating", "float"),
+      ("Q13 (Volunteer Score)", "s.q13", "text"),
+      ("Q14 (Beneficiary Score)", "s.q14", "text"),
+      ("Comment", "s.comment", "text"),
+      ("Recommendations", "s.recommendations", "text"),
+      ("Would Recommend", "s.wouldRecommend", "bool"),
+      ("Areas for Improvement", "s.areasForImprovement", "text"),
+      ("Positive Aspects", "s.positiveAspects", "text"),
+      ("Submitted At", "s.submittedAt", "timestamp"),
+      ("Finalized", "s.finalized", "bool"),
+    ],
+  ),
+  "participation": (
+    lambda: f"{quote_identifier('volunteerParticipationHistory')} p",
+    "p.id",
+    [
+      ("ID", "p.id", "int"),
+      ("Volunteer Email", "p.volunteerEmail", "text"),
+      ("Volunteer Name", "p.volunteerName", "text"),
+      ("Membership ID", "p.membershipId", "int"),
+      ("Semester", "p.semester", "text"),
+      ("Semester Year", "p.semesterYear", "int"),
+      ("Semester Number", "p.semesterNumber", "int"),
+      ("Events Joined", "p.eventsJoined", "int"),
+      ("Events Attended", "p.eventsAttended", "int"),
+      ("Events Dropped", "p.eventsDropped", "int"),
+      ("Attendance Rate", "p.attendanceRate", "float"),
+      ("First Event Date", "p.firstEventDate", "timestamp"),
+      ("Last Event Date", "p.lastEventDate", "timestamp"),
+      ("Days Active In Semester", "p.daysActiveInSemester", "int"),
+      ("Participation Consistency", "p.participationConsistency", "text"),
+      ("Engagement Level", "p.engagementLevel", "text"),
+    ],
+  ),
+}
+
+def _convertInt(value):
+  try:
+    return int(value)
+  except (TypeError, ValueError):
+    return None
+
+def _convertFloat(value):
+  try:
+    return float(value)
+  except (TypeError, ValueError):
+    return None
+
+def _convertTimestamp(value):
+  try:
+    return datetime.fromtimestamp(int(value) / 1000)
+  except (TypeError, ValueError, OverflowError, OSError):
+    return None
+
+_CONVERTERS = {
+  "int": _convertInt,
+  "float": _convertFloat,
+  "bool": bool,
+  "text": str,
+  "timestamp": _convertTimestamp,
+}
+
+def headers(dataset: str) -> list[str]:
+  return [header for header, _, _ in DATASETS[dataset][2]]
+
+def filename(dataset: str, fileFormat: str) -> str:
+  return f"{dataset}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{FORMATS[fileFormat][0]}"
+
+def available(fileFormat: str) -> bool:
+  return fileFormat == "csv" or (fileFormat == "parquet" and PYARROW_AVAILABLE) or (fileFormat == "xlsx" and OPENPYXL_AVAILABLE)
+
+def chunks(dataset: str, chunkRows: int = CHUNK_ROWS):
+  """Rows of a dataset as lists of tuples of typed values (None for NULL), chunkRows at a time"""
+  source, orderBy, columns = DATASETS[dataset]
+  converters = [_CONVERTERS[kind] for _, _, kind in columns]
+  query = f"SELECT {', '.join(expression for _, expression, _ in columns)} FROM {source()} ORDER BY {orderBy}"
+
+  conn, cursor = cursorInstance()
+  try:
+    if is_postgresql_connection(conn):
+      # a named cursor keeps the result on the server
+      cursor = conn.cursor(name=f"export_{uuid4().hex}")
+      cursor.itersize = chunkRows
+    cursor.execute(query)
+    while True:
+      rows = cursor.fetchmany(chunkRows)
+      if not rows:
+        break
+      yield [
+        tuple(None if value is None else convert(value) for convert, value in zip(converters, row))
+        for row in rows
+      ]
+  finally:
+    conn.close()
+
+def _csvValue(value):
+  if isinstance(value, bool):
+    return "Yes" if value else "No"
+  if isinstance(value, datetime):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+  return value
+
+def _csv(dataset: str, chunkRows: int):
+  buffer = io.StringIO()
+  writer = csv.writer(buffer)
+  writer.writerow(headers(dataset))
+  for rows in chunks(dataset, chunkRows):
+    writer.writerows([[_csvValue(value) for value in row] for row in rows])
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+  # header only when the dataset is empty
+  if buffer.tell():
+    yield buffer.getvalue().encode("utf-8")
+
+class _DrainableBuffer(io.RawIOBase):
+  """Write-only sink whose written bytes are taken out between chunks"""
+  def __init__(self):
+    self.parts = []
+    self.position = 0
+
+  def writable(self):
+    return True
+
+  def write(self, data):
+    self.parts.append(bytes(data))
+    self.position += len(data)
+    return len(data)
+
+  def tell(self):
+    return self.position
+
+  def drain(self) -> bytes:
+    data, self.parts = b"".join(self.parts), []
+    return data
+
+_ARROW_TYPES = {
+  "int": lambda: pa.int64(),
+  "float": lambda: pa.float64(),
+  "bool": lambda: pa.bool_(),
+  "text": lambda: pa.string(),
+  "timestamp": lambda: pa.timestamp("ms"),
+}
+
+def _parquet(dataset: str, chunkRows: int):
+  columns = DATASETS[dataset][2]
+  schema = pa.schema([(header, _ARROW_TYPES[kind]()) for header, _, kind in columns])
+  sink = _DrainableBuffer()
+  writer = pq.ParquetWriter(sink, schema, compression="snappy")
+  try:
+    for rows in chunks(dataset, chunkRows):
+      writer.write_table(pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+        schema=schema
+      ))
+      yield sink.drain()
+  finally:
+    writer.close()
+  yield sink.drain()
+
+def _xlsx(dataset: str, chunkRows: int):
+  workbook = Workbook(write_only=True)
+  sheet = workbook.create_sheet(dataset.capitalize())
+  sheet.append(headers(dataset))
+  for rows in chunks(dataset, chunkRows):
+    for row in rows:
+      sheet.append([_csvValue(value) if isinstance(value, bool) else value for value in row])
+
+  with tempfile.TemporaryFile() as temporaryFile:
+    workbook.save(temporaryFile)
+    temporaryFile.seek(0)
+    for block in iter(lambda: temporaryFile.read(FILE_BUFFER_SIZE), b""):
+      yield block
+
+def stream(dataset: str, fileFormat: str, chunkRows: int = CHUNK_ROWS):
+  """
+  Bytes of the export, produced chunk by chunk. Raises KeyError for an
+  unknown dataset or format and RuntimeError when the format's library is
+  not installed.
+  """
+  if dataset not in DATASETS:
+    raise KeyError(f"Unknown dataset {dataset}")
+  if fileFormat not in FORMATS:
+    raise KeyError(f"Unknown format {fileFormat}")
+  if not available(fileFormat):
+    raise RuntimeError(f"{fileFormat} exports need {'pyarrow' if fileFormat == 'parquet' else 'openpyxl'} installed")
+  writer = {"csv": _csv, "parquet": _parquet, "xlsx": _xlsx}[fileFormat]
+  return writer(dataset, chunkRows)
+
+def exportToFile(dataset: str, fileFormat: str, path: str, chunkRows: int = CHUNK_ROWS) -> int:
+  """Writes an export to `path` (replaced once complete); returns its size in bytes"""
+  directory = os.path.dirname(path)
+  if directory:
+    os.makedirs(directory, exist_ok=True)
+  temporaryPath = f"{path}.{os.getpid()}.tmp"
+  size = 0
+  try:
+    with open(temporaryPath, "wb") as exportFile:
+      for block in stream(dataset, fileFormat, chunkRows):
+        exportFile.write(block)
+        size += len(block)
+    os.replace(temporaryPath, path)
+  finally:
+    if os.path.exists(temporaryPath):
+      os.remove(temporaryPath)
+  return size
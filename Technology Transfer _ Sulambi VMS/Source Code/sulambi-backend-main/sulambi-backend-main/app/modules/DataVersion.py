@@ -0,0 +1,104 @@
+"""
+Per-table data versions for caching derived analytics.
+
+Every write that goes through a Model (and the raw-SQL writers that bypass
+it) bumps a counter in the dataVersions table. Readers fetch the counters of
+the tables they depend on in one small query and only recompute when one of
+them moved, so cached results stay correct across gunicorn workers.
+
+Writes that change or remove existing rows also bump a separate
+"<table>:rewrite" counter, which lets readers that only fetch new rows by
+primary key tell when appending is not enough.
+"""
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from datetime import datetime
+import copy
+import threading
+
+_cache = {}
+_cacheLock = threading.Lock()
+
+def rewriteKey(tableName: str) -> str:
+  return f"{tableName}:rewrite"
+
+def stage(cursor, *tableNames, rewrite=True):
+  """
+  Increments the version of each table inside the caller's transaction,
+  without committing; errors propagate so the caller can roll back.
+  """
+  versions_table = quote_identifier("dataVersions")
+  if rewrite:
+    tableNames = tableNames + tuple(rewriteKey(tableName) for tableName in tableNames)
+  now = int(datetime.now().timestamp() * 1000)
+  query = convert_placeholders(f"""
+    INSERT INTO {versions_table} (tableName, version, updatedAt) VALUES (?, 1, ?)
+    ON CONFLICT(tableName) DO UPDATE SET version = {versions_table}.version + 1, updatedAt = ?
+  """)
+  cursor.executemany(query, [(tableName, now, now) for tableName in tableNames])
+
+def bump(conn, cursor, *tableNames, rewrite=True):
+  """
+  Increments the version of each table using an open connection, then
+  commits. Pass rewrite=False for writes that only inserted rows.
+  """
+  try:
+    stage(cursor, *tableNames, rewrite=rewrite)
+    conn.commit()
+  except Exception as e:
+    # versioning must never make the write itself fail
+    print(f"[DATA_VERSION] Failed to bump {', '.join(tableNames)}: {e}")
+    try:
+      conn.rollback()
+    except Exception:
+      pass
+
+def bumpTables(*tableNames, rewrite=True):
+  """Same as bump() on a short-lived connection"""
+  conn, cursor = cursorInstance()
+  try:
+    bump(conn, cursor, *tableNames, rewrite=rewrite)
+  finally:
+    conn.close()
+
+def lastBump(cursor, tableName: str) -> int | None:
+  """Time (ms) of the last bump of a key, None if it was never bumped"""
+  versions_table = quote_identifier("dataVersions")
+  cursor.execute(convert_placeholders(f"SELECT updatedAt FROM {versions_table} WHERE tableName = ?"), (tableName,))
+  row = cursor.fetchone()
+  return row[0] if row else None
+
+def current(tableNames: list[str]) -> tuple | None:
+  """Current versions of the given tables (0 for tables never written), None if unavailable"""
+  versions_table = quote_identifier("dataVersions")
+  conn, cursor = cursorInstance()
+  try:
+    placeholders = ",".join(["?"] * len(tableNames))
+    query = convert_placeholders(f"SELECT tableName, version FROM {versions_table} WHERE tableName IN ({placeholders})")
+    cursor.execute(query, list(tableNames))
+    versions = dict(cursor.fetchall())
+  except Exception as e:
+    print(f"[DATA_VERSION] Failed to read versions: {e}")
+    return None
+  finally:
+    conn.close()
+  return tuple(versions.get(tableName, 0) for tableName in tableNames)
+
+def cached(key: str, tableNames: list[str], compute):
+  """
+  Returns compute()'s result, recomputing only when a version of one of the
+  tables it depends on changed since the cached value was built. Callers get
+  their own copy, so adding keys to it never changes the cached value.
+  """
+  version = current(tableNames)
+  if version == None:
+    return compute()
+
+  with _cacheLock:
+    entry = _cache.get(key)
+  if entry and entry[0] == version:
+    return copy.deepcopy(entry[1])
+
+  value = compute()
+  with _cacheLock:
+    _cache[key] = (version, copy.deepcopy(value))
+  return value
@@ -0,0 +1,173 @@
+"""
+Member-to-event recommendations from TF-IDF vectors.
+
+A member is described by their areas of interest plus, when they report
+prior volunteering experience, their answers about the activities they
+joined; an event by its title, description, objectives and rationale. Both are vectorized with one
+TfidfVectorizer whose vocabulary also covers the LSIAlgorithm event themes,
+and every vector is L2-normalized so a sparse dot product is the cosine
+similarity.
+
+Vectors are kept per source table and follow the ColumnarStore frames: when
+only rows were inserted just the new rows are transformed and stacked on,
+any other change re-transforms that table. The vocabulary is refit (and all
+vectors rebuilt) once the corpus has doubled since the last fit.
+A recommendation is one member row times the matrix of upcoming accepted
+events, followed by a partial sort for the top k. Events without a start date are
+never recommended.
+"""
+from .ColumnarStore import ColumnarStore
+from .LSIAlgorithm import SKLEARN_AVAILABLE, TfidfVectorizer, contexts
+from datetime import datetime
+import numpy as np
+import threading
+
+if SKLEARN_AVAILABLE:
+  from scipy.sparse import vstack, csr_matrix
+  from sklearn.preprocessing import normalize
+
+EVENT_TEXT = ["title", "description", "objectives", "rationale"]
+EVENT_TABLES = {"internalEvents": "internal", "externalEvents": "external"}
+MEMBER_TABLE = "membership"
+MEMBER_EXPERIENCE_TEXT = ["volunteerExpQ1", "volunteerExpQ2"]
+REFIT_GROWTH = 2
+
+# event and member text is only needed here, so it gets its own store
+# instead of widening the analytics frames
+textStore = ColumnarStore({
+  **{
+    table: ("id", ["id", *EVENT_TEXT, "durationStart", "durationEnd", ("venue", venue), "status"], [])
+    for table, venue in (("internalEvents", "venue"), ("externalEvents", "location"))
+  },
+  MEMBER_TABLE: ("id", ["id", "areasOfInterest", "volunterismExperience", *MEMBER_EXPERIENCE_TEXT], ["volunterismExperience"]),
+})
+
+def _documents(frame, columns) -> list[str]:
+  if len(frame) == 0:
+    return []
+  return frame[columns].fillna("").astype(str).agg(" ".join, axis=1).tolist()
+
+class EventRecommender:
+  def __init__(self):
+    self.vectorizer = None
+    self.fittedSize = 0
+    self.vectors = {}   # table -> (versions, frame, ids, matrix) the vectors reflect
+    self.lock = threading.RLock()
+
+  def _sources(self) -> dict:
+    """table -> (frame, versions) for the member and event tables"""
+    tables = [*EVENT_TABLES, MEMBER_TABLE]
+    return {table: (frame, textStore.versions.get(table)) for table, frame in zip(tables, textStore.get(*tables))}
+
+  def _text(self, table, frame) -> list[str]:
+    if table != MEMBER_TABLE:
+      return _documents(frame, EVENT_TEXT)
+    # the experience answers only describe activities when the member has any
+    experienced = frame["volunterismExperience"].fillna(False).to_numpy(dtype=bool)
+    interests = _documents(frame, ["areasOfInterest"])
+    experience = _documents(frame, MEMBER_EXPERIENCE_TEXT)
+    return [
+      f"{interest} {answers}" if hasExperience else interest
+      for interest, answers, hasExperience in zip(interests, experience, experienced)
+    ]
+
+  def _transform(self, documents):
+    if not documents:
+      return csr_matrix((0, len(self.vectorizer.vocabulary_)))
+    return normalize(self.vectorizer.transform(documents))
+
+  def _fit(self, sources):
+    corpus = list(contexts.values())
+    for table, (frame, _) in sources.items():
+      corpus += self._text(table, frame)
+    vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True)
+    vectorizer.fit(corpus)
+    self.vectorizer = vectorizer
+    self.fittedSize = sum(len(frame) for frame, _ in sources.values())
+    self.vectors = {}
+
+  def _update(self, table, frame, versions):
+    entry = self.vectors.get(table)
+    if entry and versions and None not in versions and entry[0] == versions:
+      return
+    ids = frame["id"].to_numpy()
+    previousIds = entry[2] if entry else None
+    appendOnly = (
+      entry and versions and entry[0] and entry[0][1] == versions[1]
+      and len(previousIds) <= len(ids) and np.array_equal(previousIds, ids[:len(previousIds)])
+    )
+    if appendOnly:
+      added = frame.iloc[len(previousIds):]
+      matrix = vstack([entry[3], self._transform(self._text(table, added))]).tocsr()
+    else:
+      matrix = self._transform(self._text(table, frame))
+    self.vectors[table] = (versions, frame, ids, matrix)
+
+  def refresh(self):
+    """Brings the vocabulary and the vectors up to date with the tables"""
+    sources = self._sources()
+    with self.lock:
+      size = sum(len(frame) for frame, _ in sources.values())
+      if self.vectorizer == None or size > max(self.fittedSize, 1) * REFIT_GROWTH:
+        self._fit(sources)
+      for table, (frame, versions) in sources.items():
+        self._update(table, frame, versions)
+
+  def recommend(self, membershipId: int, limit: int = 10, exclude: set | None = None, now: datetime | None = None) -> list[dict] | None:
+    """
+    Top `limit` upcoming accepted events for a member, best match first;
+    None when the member does not exist. `exclude` holds (type, eventId)
+    pairs to leave out, e.g. events the member already registered for.
+    """
+    if not SKLEARN_AVAILABLE:
+      return []
+    self.refresh()
+    nowMs = int((now or datetime.now()).timestamp() * 1000)
+    with self.lock:
+      _, _, memberIds, memberMatrix = self.vectors[MEMBER_TABLE]
+      row = np.flatnonzero(memberIds == membershipId)
+      if len(row) == 0:
+        return None
+      memberVector = memberMatrix[row[0]]
+
+      candidates = []
+      for table, eventType in EVENT_TABLES.items():
+        _, frame, _, matrix = self.vectors[table]
+        scheduled = frame["durationStart"].notna() & (frame["durationEnd"].fillna(0) > nowMs)
+        upcoming = np.flatnonzero(((frame["status"] == "accepted") & scheduled).to_numpy())
+        if exclude:
+          upcoming = np.array([index for index in upcoming if (eventType, int(frame["id"].iat[index])) not in exclude], dtype=int)
+        if len(upcoming) == 0:
+          continue
+        scores = (matrix[upcoming] @ memberVector.T).toarray().ravel()
+        candidates.append((frame, eventType, upcoming, scores))
+
+    if not candidates:
+      return []
+    scores = np.concatenate([scores for *_, scores in candidates])
+    starts = np.concatenate([frame["durationStart"].to_numpy()[rows] for frame, _, rows, _ in candidates]).astype(float)
+    positions = np.concatenate([np.arange(len(rows)) for _, _, rows, _ in candidates])
+    sources = np.concatenate([np.full(len(rows), index) for index, (_, _, rows, _) in enumerate(candidates)])
+
+    # partial sort for the top k, then order those by score (sooner events first on ties)
+    k = min(limit, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    top = top[np.lexsort((starts[top], -scores[top]))]
+
+    recommendations = []
+    for index in top:
+      frame, eventType, rows, _ = candidates[sources[index]]
+      event = frame.iloc[rows[positions[index]]]
+      recommendations.append({
+        "id": int(event["id"]),
+        "eventType": eventType,
+        "title": event["title"],
+        "description": event["description"],
+        "venue": event["venue"],
+        "durationStart": int(event["durationStart"]),
+        "durationEnd": int(event["durationEnd"]),
+        "score": round(float(scores[index]), 4),
+      })
+    return recommendations
+
+defaultRecommender = EventRecommender()
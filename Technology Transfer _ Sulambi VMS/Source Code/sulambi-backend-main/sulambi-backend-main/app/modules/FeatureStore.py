@@ -0,0 +1,201 @@
+"""
+Feature store for the analytics models: one flat row per member
+(memberFeatures) and per event (eventFeatures), named after the model
+features so training and scoring read the same matrix.
+
+Features are derived with pre-aggregated group-bys over the in-memory
+ColumnarStore (no fan-out joins). sync() recomputes them only when a source
+table changed and diffs them against the rows stored in the feature table,
+writing just the rows that differ and deleting keys that no longer exist, so
+a registration touches one member and one event row and workers that share
+the table never leave each other's changes stale.
+Time-relative features (days since last event) are derived on read.
+"""
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from .ColumnarStore import defaultStore
+from datetime import datetime
+import pandas as pd
+import threading
+
+MS_PER_HOUR = 1000 * 60 * 60
+MS_PER_DAY = MS_PER_HOUR * 24
+
+MEMBER_KEY = ["membershipId"]
+MEMBER_COLUMNS = [
+  "email", "age", "sex", "campus", "collegeDept", "yrlevelprogram",
+  "volunterismExperience", "accepted", "active",
+  "total_registrations", "attended_events", "attendance_rate",
+  "first_participation", "last_participation", "participation_span",
+]
+EVENT_KEY = ["eventId", "eventType"]
+EVENT_COLUMNS = [
+  "status", "venue", "modeOfDelivery", "durationStart",
+  "duration_hours", "total_participants", "is_weekend", "has_feedback",
+  "registered_count", "attended_count", "attendance_rate", "success",
+]
+
+MEMBER_SOURCES = ["membership", "requirements", "evaluation", "internalEvents", "externalEvents"]
+EVENT_SOURCES = ["internalEvents", "externalEvents", "requirements", "evaluation", "feedback"]
+
+# ids per IN (...) list, well below SQLite's bound variable limit
+ID_CHUNK = 500
+
+_syncLock = threading.Lock()
+_syncedVersions = {}
+
+###############
+#  Features   #
+###############
+
+def computeMemberFeatures() -> pd.DataFrame:
+  members, = defaultStore.get("membership")
+  events = defaultStore.events()
+  registrations = defaultStore.registrations()
+
+  # requirements carry no timestamp, so participation is dated by the event
+  dated = registrations.merge(
+    events[["id", "type", "durationStart"]].rename(columns={"id": "eventId"}),
+    on=["eventId", "type"], how="left"
+  )
+  perEmail = dated.groupby("email").agg(
+    total_registrations=("id", "size"),
+    attended_events=("attended", "sum"),
+    last_participation=("durationStart", "max"),
+    first_participation=("durationStart", "min"),
+  )
+
+  df = members.rename(columns={"id": "membershipId"}).join(perEmail, on="email")
+  df[["total_registrations", "attended_events"]] = df[["total_registrations", "attended_events"]].fillna(0).astype(int)
+  df["attendance_rate"] = (df["attended_events"] / df["total_registrations"]).where(df["total_registrations"] > 0, 0.0)
+  df["participation_span"] = (df["last_participation"] - df["first_participation"]) // MS_PER_DAY
+  for column in ("volunterismExperience", "accepted", "active"):
+    df[column] = df[column].fillna(False).astype(int)
+  return df[MEMBER_KEY + MEMBER_COLUMNS]
+
+def computeEventFeatures() -> pd.DataFrame:
+  events = defaultStore.events()
+  registrations = defaultStore.registrations()
+  feedback, = defaultStore.get("feedback")
+
+  counts = registrations.groupby(["eventId", "type"]).agg(
+    registered_count=("id", "size"),
+    attended_count=("attended", "sum"),
+  )
+  df = events.rename(columns={"id": "eventId"}).join(counts, on=["eventId", "type"])
+  df = df.rename(columns={"type": "eventType"})
+  df[["registered_count", "attended_count"]] = df[["registered_count", "attended_count"]].fillna(0).astype(int)
+  df["has_feedback"] = df["feedback_id"].isin(feedback["id"]).astype(int)
+  df["duration_hours"] = (df["durationEnd"] - df["durationStart"]) / MS_PER_HOUR
+  df["attendance_rate"] = df["attended_count"] / (df["registered_count"] + 1e-6)
+  df["total_participants"] = df["maleTotal"] + df["femaleTotal"]
+  df["is_weekend"] = pd.to_datetime(df["durationStart"], unit="ms").dt.dayofweek.isin([5, 6]).astype(int)
+  # Success definition: attendance rate > 0.7 and status = 'completed'
+  df["success"] = ((df["attendance_rate"] > 0.7) & (df["status"] == "completed")).astype(int)
+  return df[EVENT_KEY + EVENT_COLUMNS]
+
+##########
+#  Sync  #
+##########
+
+def _normalize(frame: pd.DataFrame, key) -> pd.DataFrame:
+  """Comparable values (floats rounded, NaN as None) indexed by the key"""
+  frame = frame.round(6).astype(object)
+  return frame.where(frame.notna(), None).set_index(key)
+
+def _rows(frame: pd.DataFrame) -> list[tuple]:
+  return list(frame.reset_index().itertuples(index=False, name=None))
+
+def _readStored(table, key, columns) -> pd.DataFrame:
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(f"SELECT {', '.join(key + columns)} FROM {quote_identifier(table)}")
+    return _normalize(pd.DataFrame.from_records(cursor.fetchall(), columns=key + columns), key)
+  finally:
+    conn.close()
+
+def _diff(previous: pd.DataFrame, current: pd.DataFrame):
+  """(rows of current that are new or differ from previous, keys only in previous)"""
+  aligned = previous.reindex(current.index)
+  same = (aligned == current) | (aligned.isna() & current.isna())
+  changed = current[~same.all(axis=1) | ~current.index.isin(previous.index)]
+  return changed, previous.index.difference(current.index)
+
+def _write(table, key, columns, changed: pd.DataFrame, removed) -> int:
+  """Upserts the changed rows and deletes the removed keys"""
+  allColumns = key + columns
+  conn, cursor = cursorInstance()
+  try:
+    changed = _rows(changed)
+    removed = [tuple(keys) if isinstance(keys, tuple) else (keys,) for keys in removed]
+    now = int(datetime.now().timestamp() * 1000)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns + ["updatedAt"])
+    query = convert_placeholders(f"""
+      INSERT INTO {quote_identifier(table)} ({", ".join(allColumns + ["updatedAt"])})
+      VALUES ({", ".join(["?"] * (len(allColumns) + 1))})
+      ON CONFLICT({", ".join(key)}) DO UPDATE SET {updates}
+    """)
+    cursor.executemany(query, [row + (now,) for row in changed])
+    if removed:
+      conditions = " AND ".join(f"{column} = ?" for column in key)
+      cursor.executemany(convert_placeholders(f"DELETE FROM {quote_identifier(table)} WHERE {conditions}"), list(removed))
+    conn.commit()
+    return len(changed) + len(removed)
+  finally:
+    conn.close()
+
+def _syncTable(table, key, columns, sources, compute) -> int:
+  defaultStore.get(*sources)
+  versions = tuple(defaultStore.versions.get(source) for source in sources)
+  if _syncedVersions.get(table) == versions:
+    return 0
+  current = _normalize(compute(), key)
+  written = _write(table, key, columns, *_diff(_readStored(table, key, columns), current))
+  _syncedVersions[table] = versions
+  return written
+
+def sync() -> dict:
+  """Brings both feature tables up to date; returns the number of rows written per table"""
+  with _syncLock:
+    return {
+      "memberFeatures": _syncTable("memberFeatures", MEMBER_KEY, MEMBER_COLUMNS, MEMBER_SOURCES, computeMemberFeatures),
+      "eventFeatures": _syncTable("eventFeatures", EVENT_KEY, EVENT_COLUMNS, EVENT_SOURCES, computeEventFeatures),
+    }
+
+##########
+#  Read  #
+##########
+
+def _read(table, columns, where="", params=()) -> pd.DataFrame:
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"SELECT {', '.join(columns)} FROM {quote_identifier(table)} {where}"), params)
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+  finally:
+    conn.close()
+
+def memberFeatures(membershipIds: list[int] | None = None, now: datetime | None = None) -> pd.DataFrame:
+  """Member feature matrix (all members, or the given ids) with days_since_last_event as of now"""
+  sync()
+  columns = MEMBER_KEY + MEMBER_COLUMNS
+  if membershipIds == None:
+    df = _read("memberFeatures", columns)
+  else:
+    ids = [int(membershipId) for membershipId in membershipIds]
+    chunks = [
+      _read("memberFeatures", columns, f"WHERE membershipId IN ({','.join(['?'] * len(chunk))})", tuple(chunk))
+      for chunk in (ids[start:start + ID_CHUNK] for start in range(0, len(ids), ID_CHUNK))
+    ]
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=columns)
+  nowMs = (now or datetime.now()).timestamp() * 1000
+  lastParticipation = pd.to_numeric(df["last_participation"])
+  df["days_since_last_event"] = (nowMs - lastParticipation) // MS_PER_DAY
+  return df
+
+def eventFeatures(statuses: list[str] | None = None) -> pd.DataFrame:
+  """Event feature matrix, optionally limited to the given statuses"""
+  sync()
+  where, params = "", ()
+  if statuses:
+    where = f"WHERE status IN ({','.join(['?'] * len(statuses))})"
+    params = tuple(statuses)
+  return _read("eventFeatures", EVENT_KEY + EVENT_COLUMNS, where, params)
@@ -0,0 +1,178 @@
+"""
+Issue extraction from free-text evaluation comments.
+
+The keyword/phrase taxonomy is compiled once into a single word-bounded
+alternation regex, texts are scanned in one pass per batch, and results are
+cached per source row (finalized evaluations never change their text).
+Rows keyed by ("evaluation" | "survey", id) are first looked up in the text
+index: a comment whose indexed terms include none of the taxonomy's words
+cannot mention an issue, so only the remaining texts are scanned.
+
+The default taxonomy can be replaced with a JSON file of
+{"issue": ["keyword", "multi word phrase", ...]} via ISSUE_TAXONOMY_PATH.
+"""
+from collections import OrderedDict
+from dotenv import load_dotenv
+import bisect
+import json
+import os
+import re
+import threading
+
+load_dotenv()
+
+DEFAULT_TAXONOMY = {
+  "communication": ["communication", "communicate", "communicated", "miscommunication"],
+  "resource": ["resource", "resources"],
+  "scheduling": ["schedule", "schedules", "scheduled", "scheduling", "reschedule", "rescheduled"],
+  "training": ["training", "trainings", "orientation"],
+  "support": ["support", "supported", "supporting"],
+  "accessibility": ["accessibility", "accessible", "inaccessible"],
+  "organization": ["organization", "organisation", "organized", "disorganized", "unorganized"],
+  "time": ["time", "timing"],
+  "venue": ["venue", "venues"],
+  "materials": ["materials", "material"],
+  "follow-up": ["follow-up", "follow up", "followup"],
+  "feedback": ["feedback"],
+  "coordination": ["coordination", "coordinate", "coordinated", "uncoordinated"],
+  "preparation": ["preparation", "preparations", "prepared", "unprepared"],
+}
+
+# keeps texts from different documents from matching as one phrase
+_DOCUMENT_SEPARATOR = "\n\x00\n"
+_SPACING = re.compile(r"[\s\-]+")
+
+def _normalize(phrase: str) -> str:
+  return _SPACING.sub(" ", phrase.strip().lower())
+
+class IssueExtractor:
+  def __init__(self, taxonomy: dict[str, list[str]] | None = None, cacheSize: int = 10000):
+    self.taxonomy = taxonomy or DEFAULT_TAXONOMY
+    self.phraseIssues = {}
+    for issue, phrases in self.taxonomy.items():
+      for phrase in phrases:
+        self.phraseIssues[_normalize(phrase)] = issue
+
+    # longest phrases first so "follow up" wins over a shorter overlapping entry
+    alternatives = [
+      r"[\s\-]+".join(re.escape(word) for word in phrase.split(" "))
+      for phrase in sorted(self.phraseIssues, key=len, reverse=True)
+    ]
+    self.pattern = re.compile(r"\b(?:" + "|".join(alternatives) + r")\b", re.IGNORECASE)
+
+    # index terms a matching text must contain; None when some phrase has
+    # no indexable word (e.g. only stop words), so the index cannot rule out
+    from . import TextIndex
+    phraseTerms = [TextIndex.tokenize(phrase) for phrase in self.phraseIssues]
+    self.indexTerms = None if not all(phraseTerms) else sorted({term for terms in phraseTerms for term in terms})
+
+    self.cacheSize = cacheSize
+    self.cache = OrderedDict()
+    self.lock = threading.Lock()
+
+  def extract(self, text: str) -> set[str]:
+    """Issues mentioned in a single text"""
+    return {self.phraseIssues[_normalize(match)] for match in self.pattern.findall(text or "")}
+
+  def extractBatch(self, items: list[tuple]) -> dict:
+    """
+    Takes (cacheKey, text) pairs and returns {cacheKey: set of issues}.
+    Uncached texts are joined and scanned with one regex pass; pass None as
+    the key for rows that should not be cached.
+    """
+    results = {}
+    pending = []
+    with self.lock:
+      for index, (key, text) in enumerate(items):
+        resultKey = key if key != None else index
+        if resultKey in results:
+          continue
+        if key != None and key in self.cache:
+          self.cache.move_to_end(key)
+          results[resultKey] = self.cache[key]
+        else:
+          results[resultKey] = None
+          pending.append((resultKey, key, text or ""))
+
+    if pending:
+      pending = self._skipIndexed(pending, results)
+
+    if pending:
+      starts = []
+      offset = 0
+      for _, _, text in pending:
+        starts.append(offset)
+        offset += len(text) + len(_DOCUMENT_SEPARATOR)
+
+      found = [set() for _ in pending]
+      joined = _DOCUMENT_SEPARATOR.join(text for _, _, text in pending)
+      for match in self.pattern.finditer(joined):
+        document = bisect.bisect_right(starts, match.start()) - 1
+        found[document].add(self.phraseIssues[_normalize(match.group(0))])
+
+      with self.lock:
+        for (resultKey, key, _), issues in zip(pending, found):
+          issues = frozenset(issues)
+          results[resultKey] = issues
+          if key != None:
+            self.cache[key] = issues
+        while len(self.cache) > self.cacheSize:
+          self.cache.popitem(last=False)
+
+    return results
+
+  def _skipIndexed(self, pending: list[tuple], results: dict) -> list[tuple]:
+    """
+    Resolves the pending rows whose indexed comment has none of the
+    taxonomy's terms to no issues; returns the rows left to scan
+    """
+    from . import TextIndex
+    if self.indexTerms == None:
+      return pending
+    idsBySource = {}
+    for _, key, _ in pending:
+      if isinstance(key, tuple) and len(key) == 2 and key[0] in TextIndex.SOURCES:
+        idsBySource.setdefault(key[0], []).append(key[1])
+    if not idsBySource:
+      return pending
+
+    ruledOut = set()
+    try:
+      for sourceType, sourceIds in idsBySource.items():
+        indexed, matching = TextIndex.documentsWithTerms(sourceType, sourceIds, "comment", self.indexTerms)
+        ruledOut.update((sourceType, sourceId) for sourceId in indexed - matching)
+    except Exception as e:
+      print(f"[ISSUE_EXTRACTOR] Text index unavailable, scanning every comment: {e}")
+      return pending
+
+    remaining = []
+    with self.lock:
+      for resultKey, key, text in pending:
+        if key in ruledOut:
+          results[resultKey] = frozenset()
+          self.cache[key] = results[resultKey]
+        else:
+          remaining.append((resultKey, key, text))
+      while len(self.cache) > self.cacheSize:
+        self.cache.popitem(last=False)
+    return remaining
+
+  def countIssues(self, items: list[tuple]) -> dict[str, int]:
+    """Number of texts mentioning each issue (a text counts once per issue)"""
+    counts = {}
+    for issues in self.extractBatch(items).values():
+      for issue in issues:
+        counts[issue] = counts.get(issue, 0) + 1
+    return counts
+
+def loadTaxonomy():
+  taxonomyPath = os.getenv("ISSUE_TAXONOMY_PATH")
+  if taxonomyPath and os.path.isfile(taxonomyPath):
+    try:
+      with open(taxonomyPath, "r") as taxonomyFile:
+        return json.load(taxonomyFile)
+    except Exception as e:
+      print(f"[ISSUE_EXTRACTOR] Failed to load taxonomy from {taxonomyPath}: {e}")
+  return DEFAULT_TAXONOMY
+
+defaultExtractor = IssueExtractor(loadTaxonomy())
@@ -101,4 +101,59 @@ def LSICosineSimilarityMatch(texts: list[str]):
       for context, similarity in context_similarities.items():
           textContextSimilarity[text][context] = float(f"{similarity:.3f}")
 
-  return textContextSimilarity
\ No newline at end of file
+  return textContextSimilarity
+
+# vectorizer fitted once on the context descriptions, so a text's scores do
+# not depend on which other texts are scored with it (needed for caching)
+_contextVectorizer = None
+_contextMatrix = None
+
+def _fitContextVectorizer():
+  global _contextVectorizer, _contextMatrix
+  if (_contextVectorizer == None):
+    vectorizer = TfidfVectorizer(stop_words='english')
+    _contextMatrix = vectorizer.fit_transform(list(contexts.values()))
+    _contextVectorizer = vectorizer
+  return _contextVectorizer, _contextMatrix
+
+def _formatScores(similarities):
+  contextNames = list(contexts.keys())
+  return [
+    {context: float(f"{row[index]:.3f}") for index, context in enumerate(contextNames)}
+    for row in similarities
+  ]
+
+def LSIContextScores(texts: list[str]):
+  """
+  Scores each text against every context independently of the other texts.
+  Returns a list aligned with `texts` of {context: similarity} dicts.
+  """
+  if not SKLEARN_AVAILABLE or len(texts) == 0:
+    return [{context: 0.0 for context in contexts.keys()} for _ in texts]
+
+  vectorizer, contextMatrix = _fitContextVectorizer()
+  return _formatScores(cosine_similarity(vectorizer.transform(texts), contextMatrix))
+
+def LSIContextScoresFromCounts(termCounts: list[dict]):
+  """
+  Same as LSIContextScores, but takes already tokenized {term: count} dicts
+  (e.g. from the text index) instead of raw texts.
+  """
+  if not SKLEARN_AVAILABLE or len(termCounts) == 0:
+    return [{context: 0.0 for context in contexts.keys()} for _ in termCounts]
+
+  from scipy.sparse import csr_matrix
+  from sklearn.preprocessing import normalize
+
+  vectorizer, contextMatrix = _fitContextVectorizer()
+  rows, columns, values = [], [], []
+  for row, counts in enumerate(termCounts):
+    for term, count in counts.items():
+      column = vectorizer.vocabulary_.get(term)
+      if column != None:
+        rows.append(row)
+        columns.append(column)
+        values.append(count * vectorizer.idf_[column])
+
+  textMatrix = csr_matrix((values, (rows, columns)), shape=(len(termCounts), len(vectorizer.vocabulary_)))
+  return _formatScores(cosine_similarity(normalize(textMatrix), contextMatrix))
@@ -0,0 +1,129 @@
+"""
+Downscaled variants of uploaded photos, served by /uploads/<path>?variant=.
+
+Each variant caps the longer side of the image (thumb 320px, web 1600px)
+and is cached on disk under uploads/variants/<aa>/<sha256>-<size>.<ext>,
+keyed by the SHA-256 of the source file and the size cap, so a changed
+source never serves a stale variant and identical photos share variants.
+
+schedule() renders the variants of new uploads on a small background pool;
+a request for a variant that is not rendered yet waits for it (renders of
+the same variant are shared). Sources already within a cap (and animations)
+are served as they are; an empty <sha256>-<size>.original marker records
+that, so later requests skip the render pool. Without Pillow, or when a render fails, the original file is
+served in place of the variant.
+"""
+try:
+  from PIL import Image, ImageOps
+  PIL_AVAILABLE = True
+except ImportError:
+  print("Warning: Pillow not available. Photo variants will serve the original files.")
+  PIL_AVAILABLE = False
+
+from . import ContentStore
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os
+import threading
+
+VARIANTS = {"thumb": 320, "web": 1600}
+VARIANT_DIRECTORY = "variants"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+JPEG_QUALITY = 82
+
+_renderPool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="photo-variants")
+_rendering = {}   # (digest, size) -> future of the render in progress
+_renderingLock = threading.Lock()
+
+def isImage(path: str) -> bool:
+  return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+def _cachedPaths(digest: str, size: int) -> list[str]:
+  directory = os.path.join(ContentStore.ROOT_PATH, VARIANT_DIRECTORY, digest[:2])
+  return [os.path.join(directory, f"{digest}-{size}{extension}") for extension in (".jpg", ".png")]
+
+def _originalMarker(digest: str, size: int) -> str:
+  return os.path.join(ContentStore.ROOT_PATH, VARIANT_DIRECTORY, digest[:2], f"{digest}-{size}.original")
+
+def _render(sourcePath: str, digest: str, size: int) -> str:
+  """Writes the variant of `sourcePath` capped at `size`; returns the path to serve"""
+  with Image.open(sourcePath) as image:
+    # animations would lose every frame but the first
+    if max(image.size) <= size or getattr(image, "is_animated", False):
+      marker = _originalMarker(digest, size)
+      os.makedirs(os.path.dirname(marker), exist_ok=True)
+      open(marker, "a").close()
+      return sourcePath
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((size, size), Image.LANCZOS)
+    # transparency needs PNG, everything else is served as JPEG
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+      variantPath, options = _cachedPaths(digest, size)[1], {"format": "PNG", "optimize": True}
+      image = image.convert("RGBA")
+    else:
+      variantPath, options = _cachedPaths(digest, size)[0], {"format": "JPEG", "quality": JPEG_QUALITY, "optimize": True, "progressive": True}
+      image = image.convert("RGB")
+
+    os.makedirs(os.path.dirname(variantPath), exist_ok=True)
+    temporaryPath = f"{variantPath}.{os.getpid()}-{threading.get_ident()}.tmp"
+    image.save(temporaryPath, **options)
+    os.replace(temporaryPath, variantPath)
+    return variantPath
+
+def _submit(sourcePath: str, digest: str, size: int):
+  key = (digest, size)
+  with _renderingLock:
+    future = _rendering.get(key)
+    if future == None:
+      future = _renderPool.submit(_render, sourcePath, digest, size)
+      _rendering[key] = future
+      future.add_done_callback(lambda _: _rendering.pop(key, None))
+    return future
+
+def variantPath(sourcePath: str, variant: str) -> tuple[str, str, bool]:
+  """
+  (path to serve, digest of the source, fallback) for a variant of a stored
+  file, rendering it first when needed. fallback is True when the original is
+  served because the variant could not be rendered (no Pillow, render error),
+  so a later request may get a different file. Raises KeyError for unknown
+  variants.
+  """
+  size = VARIANTS[variant]
+  digest = ContentStore.digest(sourcePath)
+  if not isImage(sourcePath):
+    return sourcePath, digest, False
+  if not PIL_AVAILABLE:
+    return sourcePath, digest, True
+  for cachedPath in _cachedPaths(digest, size):
+    if os.path.isfile(cachedPath):
+      return cachedPath, digest, False
+  if os.path.isfile(_originalMarker(digest, size)):
+    return sourcePath, digest, False
+  try:
+    return _submit(sourcePath, digest, size).result(), digest, False
+  except Exception as e:
+    print(f"[PHOTO_VARIANTS] Failed to render {variant} of {sourcePath}: {e}")
+    return sourcePath, digest, True
+
+def schedule(paths: list[str]):
+  """Renders every variant of newly stored images in the background"""
+  if not PIL_AVAILABLE:
+    return
+  for path in paths:
+    if not path or not isImage(path) or not os.path.isfile(path):
+      continue
+    digest = ContentStore.digest(path)
+    for size in VARIANTS.values():
+      cachedPaths = _cachedPaths(digest, size) + [_originalMarker(digest, size)]
+      if not any(os.path.isfile(cachedPath) for cachedPath in cachedPaths):
+        _submit(path, digest, size)
+
+def discard(digest: str):
+  """Removes the cached variants of a source that was deleted"""
+  for size in VARIANTS.values():
+    for cachedPath in _cachedPaths(digest, size) + [_originalMarker(digest, size)]:
+      for variantFile in glob.glob(glob.escape(cachedPath) + "*"):
+        try:
+          os.remove(variantFile)
+        except OSError:
+          pass
@@ -0,0 +1,117 @@
+"""
+Lexicon-based sentiment scoring for evaluation and survey comments.
+
+Texts are tokenized once, every token of a batch is looked up in the lexicon
+in one pandas map, and negation ("not helpful") and intensifiers ("very
+helpful") are applied with shifted NumPy masks over the flat token array,
+so a batch costs a few array passes rather than a loop per text. Per-text
+sums are normalized VADER-style into a compound score in [-1, 1].
+
+The default lexicon can be replaced with a JSON file of {"word": weight}
+(weights roughly -4..4) via SENTIMENT_LEXICON_PATH.
+"""
+from dotenv import load_dotenv
+import numpy as np
+import pandas as pd
+import json
+import os
+import re
+
+load_dotenv()
+
+DEFAULT_LEXICON = {
+  # positive
+  "good": 1.9, "great": 3.1, "excellent": 3.2, "amazing": 2.8, "awesome": 3.1, "wonderful": 2.7,
+  "fantastic": 2.6, "best": 3.2, "nice": 1.8, "love": 3.2, "loved": 2.9, "enjoy": 2.2, "enjoyed": 2.3,
+  "enjoyable": 1.9, "fun": 2.3, "happy": 2.7, "glad": 2.0, "thankful": 2.0, "thanks": 1.9, "thank": 1.5,
+  "grateful": 2.0, "helpful": 1.8, "useful": 1.9, "informative": 1.6, "meaningful": 1.8, "inspiring": 2.2,
+  "inspired": 2.2, "organized": 1.5, "smooth": 1.3, "fulfilling": 2.1, "rewarding": 2.0,
+  "satisfied": 1.8, "satisfying": 2.0, "friendly": 2.2, "kind": 2.4, "supportive": 2.0, "welcoming": 1.9,
+  "clear": 1.2, "successful": 2.7, "success": 2.7, "impactful": 1.9, "productive": 1.7, "effective": 2.1,
+  "safe": 1.9, "comfortable": 1.5, "recommend": 1.5, "learned": 1.0, "valuable": 2.1, "worth": 0.9,
+  "maganda": 1.9, "masaya": 2.3, "salamat": 1.9, "mahusay": 2.2,
+  # negative
+  "bad": -2.5, "poor": -2.1, "terrible": -2.1, "awful": -2.0, "worst": -3.1, "boring": -1.3,
+  "bored": -1.1, "disappointing": -2.2, "disappointed": -1.9, "late": -0.9, "delayed": -1.3, "delay": -1.3,
+  "confusing": -1.3, "confused": -1.3, "unclear": -1.0, "disorganized": -1.7, "unorganized": -1.7,
+  "messy": -1.5, "chaotic": -1.6, "crowded": -0.9, "hot": -0.4, "tired": -1.4, "tiring": -1.3,
+  "exhausting": -1.5, "difficult": -1.5, "hard": -0.4, "problem": -1.7, "problems": -1.7, "issue": -0.9,
+  "issues": -0.9, "lacking": -1.3, "lack": -1.3, "insufficient": -1.6, "unprepared": -1.5, "rude": -2.0,
+  "unsafe": -2.2, "waste": -1.8, "wasted": -2.2, "useless": -1.8, "unhelpful": -1.7, "hate": -2.7,
+  "sad": -2.1, "frustrating": -1.9, "frustrated": -2.1, "uncomfortable": -1.6, "inconvenient": -1.4,
+  "cancelled": -1.0, "canceled": -1.0, "miscommunication": -1.6, "pangit": -2.0, "nakakapagod": -1.4,
+}
+
+NEGATIONS = {
+  "not", "no", "never", "none", "nothing", "neither", "nor", "without", "hardly", "barely",
+  "dont", "don't", "didnt", "didn't", "wasnt", "wasn't", "isnt", "isn't", "werent", "weren't",
+  "cant", "can't", "couldnt", "couldn't", "wont", "won't", "hindi", "wala",
+}
+INTENSIFIERS = {
+  "very": 0.293, "really": 0.293, "extremely": 0.293, "so": 0.293, "super": 0.293, "truly": 0.293,
+  "highly": 0.293, "totally": 0.293, "absolutely": 0.293, "quite": 0.2, "sobrang": 0.293,
+  "slightly": -0.293, "somewhat": -0.293, "kinda": -0.293, "bit": -0.293,
+}
+
+NEGATION_SCALAR = -0.74
+NEGATION_WINDOW = 3
+NORMALIZATION_ALPHA = 15
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+class SentimentScorer:
+  def __init__(self, lexicon: dict[str, float] | None = None):
+    self.lexicon = {word.lower(): float(weight) for word, weight in (lexicon or DEFAULT_LEXICON).items()}
+
+  def scoreBatch(self, texts: list[str]) -> dict[str, np.ndarray]:
+    """
+    Scores every text of a batch at once. Returns arrays aligned with `texts`:
+    compound in [-1, 1] (0 for texts without sentiment words), and the number
+    of positive and negative terms found.
+    """
+    tokenLists = [_TOKEN.findall((text or "").lower()) for text in texts]
+    lengths = np.fromiter((len(tokens) for tokens in tokenLists), dtype=int, count=len(tokenLists))
+    document = np.repeat(np.arange(len(texts)), lengths)
+    tokens = pd.Series([token for tokenList in tokenLists for token in tokenList], dtype=object)
+
+    weights = tokens.map(self.lexicon).fillna(0.0).to_numpy(dtype=float)
+    negator = tokens.isin(NEGATIONS).to_numpy()
+    boost = tokens.map(INTENSIFIERS).fillna(0.0).to_numpy(dtype=float)
+
+    # a sentiment word is negated by a negator up to NEGATION_WINDOW tokens
+    # before it, and boosted by an intensifier right before it (same text only)
+    negated = np.zeros(len(weights), dtype=bool)
+    for distance in range(1, NEGATION_WINDOW + 1):
+      sameDocument = np.zeros(len(weights), dtype=bool)
+      sameDocument[distance:] = document[distance:] == document[:-distance]
+      previous = np.zeros(len(weights), dtype=bool)
+      previous[distance:] = negator[:-distance]
+      negated |= previous & sameDocument
+    intensity = np.zeros(len(weights))
+    if len(weights) > 1:
+      intensity[1:] = np.where(document[1:] == document[:-1], boost[:-1], 0.0)
+
+    weights = weights + np.sign(weights) * intensity
+    weights = np.where(negated, weights * NEGATION_SCALAR, weights)
+
+    sums = np.bincount(document, weights=weights, minlength=len(texts))
+    return {
+      "compound": sums / np.sqrt(sums * sums + NORMALIZATION_ALPHA),
+      "positive": np.bincount(document, weights=weights > 0, minlength=len(texts)).astype(int),
+      "negative": np.bincount(document, weights=weights < 0, minlength=len(texts)).astype(int),
+    }
+
+  def score(self, text: str) -> float:
+    """Compound score of a single text"""
+    return float(self.scoreBatch([text])["compound"][0])
+
+def loadLexicon():
+  lexiconPath = os.getenv("SENTIMENT_LEXICON_PATH")
+  if lexiconPath and os.path.isfile(lexiconPath):
+    try:
+      with open(lexiconPath, "r") as lexiconFile:
+        return json.load(lexiconFile)
+    except Exception as e:
+      print(f"[SENTIMENT_SCORER] Failed to load lexicon from {lexiconPath}: {e}")
+  return DEFAULT_LEXICON
+
+defaultScorer = SentimentScorer(loadLexicon())
@@ -0,0 +1,413 @@
+"""
+Persistent inverted index over evaluation and satisfaction survey free text
+(recommendations and comments).
+
+Every finalized submission is tokenized once and stored as:
+  - textIndexDocuments: one row per (source, id, field) with a compact sparse
+    vector "termId:count,termId:count,..." and its token count
+  - textIndexTerms: the vocabulary with document frequencies
+  - textIndexPostings: term -> (document, frequency) posting lists
+
+Analysis code reads term counts from here instead of re-tokenizing raw text.
+Submissions are indexed when they are written; syncIndex() catches up on
+rows written elsewhere, and only does work when the data version of a
+source table moved since the last sync.
+"""
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, convert_boolean_condition
+from . import DataVersion
+from collections import Counter
+from datetime import datetime
+import math
+import re
+import threading
+
+try:
+  from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+except ImportError:
+  ENGLISH_STOP_WORDS = frozenset()
+
+# same analyzer TfidfVectorizer(stop_words='english') uses, so indexed counts
+# can be fed straight into the LSI context matcher
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+# source type -> (table, indexed text fields)
+SOURCES = {
+  "evaluation": ("evaluation", ["recommendations", "comment"]),
+  "survey": ("satisfactionSurveys", ["recommendations", "comment"]),
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# ids per IN (...) list, well below SQLite's bound variable limit
+ID_CHUNK = 500
+
+# versions of the source tables the last syncIndex() of this process saw
+_syncedVersions = None
+_syncLock = threading.Lock()
+
+def tokenize(text: str) -> list[str]:
+  tokens = TOKEN_PATTERN.findall((text or "").lower())
+  return [token for token in tokens if token not in ENGLISH_STOP_WORDS]
+
+def encodeVector(termCounts: dict[int, int]) -> str:
+  return ",".join(f"{termId}:{count}" for termId, count in sorted(termCounts.items()))
+
+def decodeVector(vector: str) -> dict[int, int]:
+  if not vector:
+    return {}
+  pairs = (pair.split(":") for pair in vector.split(","))
+  return {int(termId): int(count) for termId, count in pairs}
+
+def _tables():
+  return (
+    quote_identifier("textIndexDocuments"),
+    quote_identifier("textIndexTerms"),
+    quote_identifier("textIndexPostings"),
+  )
+
+def _placeholders(values) -> str:
+  return ",".join(["?"] * len(values))
+
+def _chunks(values: list):
+  values = list(values)
+  for start in range(0, len(values), ID_CHUNK):
+    yield values[start:start + ID_CHUNK]
+
+def _indexDocument(cursor, sourceType: str, sourceId: int, field: str, text: str, eventId=None, eventType=None):
+  documents_table, terms_table, postings_table = _tables()
+  counts = Counter(tokenize(text))
+
+  # claim the document first: a concurrent request indexing the same row
+  # inserts nothing here and leaves the term frequencies alone
+  query = convert_placeholders(f"""
+    INSERT INTO {documents_table} (sourceType, sourceId, field, eventId, eventType, termCount, vector, indexedAt)
+    VALUES (?, ?, ?, ?, ?, ?, '', ?)
+    ON CONFLICT(sourceType, sourceId, field) DO NOTHING
+  """)
+  cursor.execute(query, (
+    sourceType, sourceId, field, eventId, eventType,
+    sum(counts.values()), int(datetime.now().timestamp() * 1000)
+  ))
+  if cursor.rowcount == 0:
+    return
+
+  termIds = {}
+  if counts:
+    upsert = convert_placeholders(f"""
+      INSERT INTO {terms_table} (term, documentFrequency) VALUES (?, 1)
+      ON CONFLICT(term) DO UPDATE SET documentFrequency = {terms_table}.documentFrequency + 1
+    """)
+    cursor.executemany(upsert, [(term,) for term in counts])
+
+    terms = list(counts)
+    query = convert_placeholders(f"SELECT id, term FROM {terms_table} WHERE term IN ({_placeholders(terms)})")
+    cursor.execute(query, terms)
+    termIds = {term: termId for termId, term in cursor.fetchall()}
+
+  vector = {termIds[term]: count for term, count in counts.items()}
+  query = convert_placeholders(f"SELECT id FROM {documents_table} WHERE sourceType = ? AND sourceId = ? AND field = ?")
+  cursor.execute(query, (sourceType, sourceId, field))
+  documentId = cursor.fetchone()[0]
+
+  if vector:
+    query = convert_placeholders(f"UPDATE {documents_table} SET vector = ? WHERE id = ?")
+    cursor.execute(query, (encodeVector(vector), documentId))
+    query = convert_placeholders(f"""
+      INSERT INTO {postings_table} (termId, documentId, frequency) VALUES (?, ?, ?)
+      ON CONFLICT(termId, documentId) DO NOTHING
+    """)
+    cursor.executemany(query, [(termId, documentId, count) for termId, count in vector.items()])
+
+def _removeDocuments(cursor, documentIds: list[int]):
+  if not documentIds:
+    return
+  documents_table, terms_table, postings_table = _tables()
+
+  query = convert_placeholders(f"SELECT vector FROM {documents_table} WHERE id IN ({_placeholders(documentIds)})")
+  cursor.execute(query, documentIds)
+  frequencies = Counter()
+  for (vector,) in cursor.fetchall():
+    frequencies.update(decodeVector(vector).keys())
+
+  query = convert_placeholders(f"UPDATE {terms_table} SET documentFrequency = documentFrequency - ? WHERE id = ?")
+  cursor.executemany(query, [(count, termId) for termId, count in frequencies.items()])
+
+  query = convert_placeholders(f"DELETE FROM {postings_table} WHERE documentId IN ({_placeholders(documentIds)})")
+  cursor.execute(query, documentIds)
+  query = convert_placeholders(f"DELETE FROM {documents_table} WHERE id IN ({_placeholders(documentIds)})")
+  cursor.execute(query, documentIds)
+
+def _pendingRows(cursor, sourceType: str, sourceIds: list | None = None):
+  """Finalized rows of a source that have no indexed documents yet"""
+  documents_table = quote_identifier("textIndexDocuments")
+  table, fields = SOURCES[sourceType]
+  source_table = quote_identifier(table)
+  fieldColumns = ", ".join(f"s.{field}" for field in fields)
+
+  if sourceType == "evaluation":
+    requirements_table = quote_identifier("requirements")
+    query = f"""
+      SELECT s.id, r.eventId, r.type, {fieldColumns}
+      FROM {source_table} s
+      LEFT JOIN {requirements_table} r ON r.id = s.requirementId
+    """
+  else:
+    query = f"""
+      SELECT s.id, s.eventId, s.eventType, {fieldColumns}
+      FROM {source_table} s
+    """
+  query += f"""
+    LEFT JOIN {documents_table} d ON d.sourceType = ? AND d.sourceId = s.id AND d.field = ?
+    WHERE s.finalized = 1 AND d.id IS NULL
+  """
+  params = [sourceType, fields[0]]
+  if sourceIds:
+    query += f" AND s.id IN ({_placeholders(sourceIds)})"
+    params += list(sourceIds)
+
+  query = convert_boolean_condition(convert_placeholders(query))
+  cursor.execute(query, params)
+  return cursor.fetchall()
+
+def _indexRows(cursor, sourceType: str, rows):
+  _, fields = SOURCES[sourceType]
+  for row in rows:
+    sourceId, eventId, eventType = row[0], row[1], row[2]
+    for field, text in zip(fields, row[3:]):
+      _indexDocument(cursor, sourceType, sourceId, field, text, eventId, eventType)
+  return len(rows)
+
+def indexSource(sourceType: str, sourceIds: list):
+  """Indexes the given finalized rows of a source (already indexed ones are skipped)"""
+  if not sourceIds:
+    return 0
+  conn, cursor = cursorInstance()
+  try:
+    indexed = 0
+    for ids in _chunks(sourceIds):
+      indexed += _indexRows(cursor, sourceType, _pendingRows(cursor, sourceType, ids))
+    conn.commit()
+    return indexed
+  finally:
+    conn.close()
+
+def syncIndex():
+  """
+  Brings the index up to date: indexes every finalized row not indexed yet and
+  drops documents whose source row has been deleted. Skipped while the source
+  tables keep the versions of the last sync, and the orphan scan only runs
+  after rows were changed or removed.
+  """
+  global _syncedVersions
+  tables = [table for table, _ in SOURCES.values()]
+  versionKeys = tables + [DataVersion.rewriteKey(table) for table in tables]
+
+  documents_table = quote_identifier("textIndexDocuments")
+  summary = {"indexed": 0, "removed": 0}
+  with _syncLock:
+    versions = DataVersion.current(versionKeys)
+    if versions != None and versions == _syncedVersions:
+      return summary
+    previous = dict(zip(versionKeys, _syncedVersions or ()))
+    latest = dict(zip(versionKeys, versions or ()))
+    conn, cursor = cursorInstance()
+    try:
+      for sourceType, (table, _) in SOURCES.items():
+        summary["indexed"] += _indexRows(cursor, sourceType, _pendingRows(cursor, sourceType))
+        rewriteKey = DataVersion.rewriteKey(table)
+        # appends cannot orphan a document
+        if rewriteKey in previous and previous[rewriteKey] == latest.get(rewriteKey):
+          continue
+        summary["removed"] += _removeOrphans(cursor, sourceType, table)
+
+      conn.commit()
+      _syncedVersions = versions
+      return summary
+    finally:
+      conn.close()
+
+def _removeOrphans(cursor, sourceType: str, table: str) -> int:
+  """Drops the documents of a source whose row was deleted"""
+  documents_table = quote_identifier("textIndexDocuments")
+  query = convert_placeholders(f"""
+    SELECT d.id FROM {documents_table} d
+    LEFT JOIN {quote_identifier(table)} s ON s.id = d.sourceId
+    WHERE d.sourceType = ? AND s.id IS NULL
+  """)
+  cursor.execute(query, (sourceType,))
+  orphaned = [row[0] for row in cursor.fetchall()]
+  for documentIds in _chunks(orphaned):
+    _removeDocuments(cursor, documentIds)
+  return len(orphaned)
+
+def documentTermCounts(sourceType: str, sourceIds: list, field: str) -> dict:
+  """
+  Returns {sourceId: {term: count}} for the requested documents, indexing any
+  finalized source rows that were not indexed yet.
+  """
+  if not sourceIds:
+    return {}
+  indexSource(sourceType, sourceIds)
+
+  documents_table, terms_table, _ = _tables()
+  conn, cursor = cursorInstance()
+  try:
+    vectors = {}
+    for ids in _chunks(sourceIds):
+      query = convert_placeholders(f"""
+        SELECT sourceId, vector FROM {documents_table}
+        WHERE sourceType = ? AND field = ? AND sourceId IN ({_placeholders(ids)})
+      """)
+      cursor.execute(query, [sourceType, field] + ids)
+      vectors.update((sourceId, decodeVector(vector)) for sourceId, vector in cursor.fetchall())
+
+    terms = {}
+    for termIds in _chunks(sorted({termId for vector in vectors.values() for termId in vector})):
+      query = convert_placeholders(f"SELECT id, term FROM {terms_table} WHERE id IN ({_placeholders(termIds)})")
+      cursor.execute(query, termIds)
+      terms.update(cursor.fetchall())
+  finally:
+    conn.close()
+
+  return {
+    sourceId: {terms[termId]: count for termId, count in vector.items()}
+    for sourceId, vector in vectors.items()
+  }
+
+def documentsWithTerms(sourceType: str, sourceIds: list, field: str, terms: list[str]) -> tuple[set, set]:
+  """
+  (indexed, matching) source ids among `sourceIds`: those with a non-empty
+  indexed document in `field`, and those whose document contains any of
+  `terms`. Lets callers skip reading texts the index already rules out.
+  """
+  documents_table, terms_table, postings_table = _tables()
+  terms = sorted(set(terms))
+  indexed, matching = set(), set()
+  if not sourceIds:
+    return indexed, matching
+
+  conn, cursor = cursorInstance()
+  try:
+    for ids in _chunks(sourceIds):
+      query = convert_placeholders(f"""
+        SELECT sourceId FROM {documents_table}
+        WHERE sourceType = ? AND field = ? AND termCount > 0 AND sourceId IN ({_placeholders(ids)})
+      """)
+      cursor.execute(query, [sourceType, field] + ids)
+      indexed.update(sourceId for sourceId, in cursor.fetchall())
+      if not terms:
+        continue
+
+      query = convert_placeholders(f"""
+        SELECT DISTINCT d.sourceId
+        FROM {postings_table} p
+        INNER JOIN {documents_table} d ON d.id = p.documentId
+        INNER JOIN {terms_table} t ON t.id = p.termId
+        WHERE d.sourceType = ? AND d.field = ? AND t.term IN ({_placeholders(terms)})
+          AND d.sourceId IN ({_placeholders(ids)})
+      """)
+      cursor.execute(query, [sourceType, field] + terms + ids)
+      matching.update(sourceId for sourceId, in cursor.fetchall())
+  finally:
+    conn.close()
+  return indexed, matching
+
+def search(queryText: str, limit: int = 20, sourceType: str | None = None):
+  """Ranks indexed documents against a free-text query with BM25"""
+  tokens = sorted(set(tokenize(queryText)))
+  if not tokens:
+    return []
+
+  documents_table, terms_table, postings_table = _tables()
+  conn, cursor = cursorInstance()
+  try:
+    query = convert_placeholders(f"SELECT id, documentFrequency FROM {terms_table} WHERE term IN ({_placeholders(tokens)})")
+    cursor.execute(query, tokens)
+    documentFrequencies = dict(cursor.fetchall())
+    if not documentFrequencies:
+      return []
+
+    # collection statistics over the documents being ranked, so a source
+    # filter does not skew the IDF with the other source's documents
+    query = f"SELECT COUNT(*), AVG(termCount) FROM {documents_table} WHERE termCount > 0"
+    if sourceType:
+      query += " AND sourceType = ?"
+      cursor.execute(convert_placeholders(query), (sourceType,))
+    else:
+      cursor.execute(query)
+    totalDocuments, averageLength = cursor.fetchone()
+    averageLength = float(averageLength or 1)
+
+    if sourceType:
+      termIds = list(documentFrequencies)
+      query = convert_placeholders(f"""
+        SELECT p.termId, COUNT(*)
+        FROM {postings_table} p
+        INNER JOIN {documents_table} d ON d.id = p.documentId
+        WHERE p.termId IN ({_placeholders(termIds)}) AND d.sourceType = ?
+        GROUP BY p.termId
+      """)
+      cursor.execute(query, termIds + [sourceType])
+      documentFrequencies = dict(cursor.fetchall())
+      if not documentFrequencies:
+        return []
+
+    termIds = list(documentFrequencies)
+    query = f"""
+      SELECT p.documentId, p.termId, p.frequency, d.termCount
+      FROM {postings_table} p
+      INNER JOIN {documents_table} d ON d.id = p.documentId
+      WHERE p.termId IN ({_placeholders(termIds)})
+    """
+    params = list(termIds)
+    if sourceType:
+      query += " AND d.sourceType = ?"
+      params.append(sourceType)
+    cursor.execute(convert_placeholders(query), params)
+
+    scores = {}
+    for documentId, termId, frequency, termCount in cursor.fetchall():
+      df = documentFrequencies[termId]
+      idf = math.log(1 + (totalDocuments - df + 0.5) / (df + 0.5))
+      norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * termCount / averageLength)
+      scores[documentId] = scores.get(documentId, 0) + idf * frequency * (BM25_K1 + 1) / norm
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+    if not ranked:
+      return []
+
+    documentIds = [documentId for documentId, _ in ranked]
+    query = convert_placeholders(f"""
+      SELECT id, sourceType, sourceId, field, eventId, eventType
+      FROM {documents_table} WHERE id IN ({_placeholders(documentIds)})
+    """)
+    cursor.execute(query, documentIds)
+    documents = {row[0]: row[1:] for row in cursor.fetchall()}
+
+    # raw text is only read back for the handful of rows being returned
+    texts = {}
+    for source, (table, _) in SOURCES.items():
+      wanted = [(documents[documentId][1], documents[documentId][2]) for documentId in documentIds if documents[documentId][0] == source]
+      for field in {field for _, field in wanted}:
+        ids = [sourceId for sourceId, wantedField in wanted if wantedField == field]
+        query = convert_placeholders(f"SELECT id, {field} FROM {quote_identifier(table)} WHERE id IN ({_placeholders(ids)})")
+        cursor.execute(query, ids)
+        for sourceId, text in cursor.fetchall():
+          texts[(source, sourceId, field)] = text
+  finally:
+    conn.close()
+
+  results = []
+  for documentId, score in ranked:
+    source, sourceId, field, eventId, eventType = documents[documentId]
+    results.append({
+      "sourceType": source,
+      "sourceId": sourceId,
+      "field": field,
+      "eventId": eventId,
+      "eventType": eventType,
+      "score": round(score, 4),
+      "text": texts.get((source, sourceId, field), ""),
+    })
+  return results
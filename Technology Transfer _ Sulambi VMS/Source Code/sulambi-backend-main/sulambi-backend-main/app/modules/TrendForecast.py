@@ -0,0 +1,83 @@
+"""
+Lightweight one-step-ahead forecasting for short per-semester series.
+
+Two models are fit with NumPy, vectorized over their parameters instead of
+looping over candidate fits:
+- Holt's linear exponential smoothing, grid-searching alpha/beta for every
+  combination at once
+- a linear trend, refit on every prefix of the series via cumulative sums
+
+The model with the lower one-step-ahead RMSE produces the forecast, with a
+normal prediction interval from its one-step errors.
+"""
+import numpy as np
+
+SMOOTHING_GRID = np.linspace(0.05, 0.95, 19)
+Z_95 = 1.96
+
+def holt(values: np.ndarray) -> tuple[float, np.ndarray, dict]:
+  """Forecast for the next period, one-step-ahead errors and the chosen parameters"""
+  alpha, beta = [grid.ravel() for grid in np.meshgrid(SMOOTHING_GRID, SMOOTHING_GRID)]
+  level = np.full(alpha.shape, values[0])
+  trend = np.full(alpha.shape, values[1] - values[0])
+  errors = np.zeros((len(values) - 1, len(alpha)))
+  for t in range(1, len(values)):
+    errors[t - 1] = values[t] - (level + trend)
+    newLevel = alpha * values[t] + (1 - alpha) * (level + trend)
+    trend = beta * (newLevel - level) + (1 - beta) * trend
+    level = newLevel
+
+  # the trend is seeded from values[1], so the error at t=1 is always 0:
+  # score from t=2 on, the same points the linear trend is scored on
+  errors = errors[1:]
+  best = np.argmin((errors ** 2).sum(axis=0))
+  return float(level[best] + trend[best]), errors[:, best], {"alpha": round(float(alpha[best]), 2), "beta": round(float(beta[best]), 2)}
+
+def linearTrend(values: np.ndarray) -> tuple[float, np.ndarray, dict]:
+  """Forecast from a least-squares line, with errors from refitting on each prefix"""
+  n = len(values)
+  t = np.arange(n, dtype=float)
+  # running sums give the fit on values[:k] for every k at once
+  count = np.arange(1, n + 1, dtype=float)
+  sumT, sumY = np.cumsum(t), np.cumsum(values)
+  sumTT, sumTY = np.cumsum(t * t), np.cumsum(t * values)
+  denominator = count * sumTT - sumT ** 2
+  with np.errstate(divide="ignore", invalid="ignore"):
+    slope = np.where(denominator > 0, (count * sumTY - sumT * sumY) / denominator, 0.0)
+  intercept = (sumY - slope * sumT) / count
+
+  # prefixes of 2+ points predict the next point
+  predictions = intercept[1:-1] + slope[1:-1] * t[2:]
+  errors = values[2:] - predictions
+  return float(intercept[-1] + slope[-1] * n), errors, {"slope": round(float(slope[-1]), 4)}
+
+def forecast(values, bounds: tuple[float, float] | None = None) -> dict | None:
+  """Next-period forecast for a series (oldest first); None for an empty series"""
+  values = np.asarray([value for value in values if value != None], dtype=float)
+  if len(values) == 0:
+    return None
+
+  if len(values) < 3:
+    # too short to judge a trend: carry the last value forward
+    method, value, errors, parameters = "naive", float(values[-1]), np.diff(values), {}
+  else:
+    candidates = {"holt": holt(values), "linear": linearTrend(values)}
+    rmse = {name: float(np.sqrt(np.mean(candidate[1] ** 2))) for name, candidate in candidates.items()}
+    method = min(rmse, key=rmse.get)
+    value, errors, parameters = candidates[method]
+
+  sigma = float(np.sqrt(np.mean(errors ** 2))) if len(errors) else 0.0
+  lower, upper = value - Z_95 * sigma, value + Z_95 * sigma
+  if bounds:
+    value, lower, upper = [float(np.clip(number, *bounds)) for number in (value, lower, upper)]
+
+  return {
+    "method": method,
+    "parameters": parameters,
+    "forecast": round(value, 2),
+    "lower": round(lower, 2),
+    "upper": round(upper, 2),
+    "rmse": round(sigma, 3),
+    "history": len(values),
+    "lastValue": round(float(values[-1]), 2),
+  }
@@ -0,0 +1,265 @@
+"""
+Asynchronous upload pipeline for requirement files.
+
+A request spools its files to local storage (UPLOAD_SPOOL_PATH, kept outside
+the publicly served uploads directory), stores a "pending-upload:<id>" handle
+in the requirement column and returns. A background worker per process then
+pushes each spooled file to Cloudinary, records the URL on the queue row and
+patches it into the requirement row. Failures are retried with exponential
+backoff up to UPLOAD_MAX_ATTEMPTS times; a retry after a successful upload
+only repeats the patch. Uploads that run out of attempts get an
+"upload-failed:<id>" marker in the requirement column.
+
+Work is queued in the pendingUploads table, so it survives restarts and
+several gunicorn workers can share it: a worker only processes an upload
+after atomically flipping it from pending to uploading, and uploads left in
+uploading by a dead worker become due again after UPLOAD_STALE_AFTER.
+"""
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from ..models.RequirementsModel import RequirementsModel
+from ..utils.multipartFileWriter import uploadToCloudinary, configureCloudinary, _uploadPool
+from werkzeug.datastructures import FileStorage
+from dotenv import load_dotenv
+from datetime import datetime
+from uuid import uuid4
+import os
+import threading
+
+load_dotenv()
+
+SPOOL_PATH = os.getenv("UPLOAD_SPOOL_PATH", os.path.join("instance", "upload-spool"))
+# earlier default, inside the served uploads directory
+LEGACY_SPOOL_PATH = os.path.join("uploads", "spool")
+MAX_ATTEMPTS = int(os.getenv("UPLOAD_MAX_ATTEMPTS", 5))
+RETRY_BASE_SECONDS = float(os.getenv("UPLOAD_RETRY_BASE", 5))
+STALE_AFTER_MS = int(os.getenv("UPLOAD_STALE_AFTER", 10 * 60)) * 1000
+POLL_SECONDS = 5
+BATCH_SIZE = 8
+
+PENDING_PREFIX = "pending-upload:"
+FAILED_PREFIX = "upload-failed:"
+COLUMNS = [
+  "id", "requirementId", "field", "folder", "spoolPath", "filename", "contentType",
+  "status", "attempts", "url", "error", "nextAttemptAt", "updatedAt",
+]
+
+RequirementsDb = RequirementsModel()
+
+_wake = threading.Event()
+_workerLock = threading.Lock()
+_worker = None
+
+def _now() -> int:
+  return int(datetime.now().timestamp() * 1000)
+
+def handle(uploadId: str) -> str:
+  return PENDING_PREFIX + uploadId
+
+def isPending(value) -> bool:
+  return isinstance(value, str) and value.startswith(PENDING_PREFIX)
+
+def isFailed(value) -> bool:
+  return isinstance(value, str) and value.startswith(FAILED_PREFIX)
+
+def newUploadId() -> str:
+  return uuid4().hex
+
+def isSpoolPath(path: str) -> bool:
+  """True when path lies in the spool directory, which must never be served"""
+  target = os.path.realpath(path)
+  for root in (SPOOL_PATH, LEGACY_SPOOL_PATH):
+    root = os.path.realpath(root)
+    if target == root or target.startswith(root + os.sep):
+      return True
+  return False
+
+def enqueue(requirementId: str, spooled: dict, folder: str):
+  """
+  Queues spooled files ({field: {"uploadId", "path", "filename", "contentType"}})
+  for upload into the requirement's columns and wakes the worker
+  """
+  now = _now()
+  rows = [
+    (info["uploadId"], requirementId, field, folder, info["path"], info["filename"], info.get("contentType"),
+     "pending", 0, None, None, now, now)
+    for field, info in spooled.items()
+  ]
+  conn, cursor = cursorInstance()
+  try:
+    query = convert_placeholders(f"""
+      INSERT INTO {quote_identifier('pendingUploads')} ({", ".join(COLUMNS)})
+      VALUES ({", ".join(["?"] * len(COLUMNS))})
+    """)
+    cursor.executemany(query, rows)
+    conn.commit()
+  finally:
+    conn.close()
+  startWorker()
+  _wake.set()
+
+def discard(spooled: dict):
+  """Removes spooled files that were never queued (e.g. the request failed)"""
+  for info in spooled.values():
+    try:
+      os.remove(info["path"])
+    except OSError:
+      pass
+
+def _claimDue(limit: int) -> list[dict]:
+  table = quote_identifier('pendingUploads')
+  now = _now()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT {", ".join(COLUMNS)} FROM {table}
+      WHERE (status = 'pending' AND nextAttemptAt <= ?) OR (status = 'uploading' AND updatedAt <= ?)
+      ORDER BY nextAttemptAt
+      LIMIT ?
+    """), (now, now - STALE_AFTER_MS, limit))
+    candidates = [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+    claimed = []
+    for upload in candidates:
+      # only one process wins the flip to uploading
+      cursor.execute(convert_placeholders(f"""
+        UPDATE {table} SET status = 'uploading', updatedAt = ?
+        WHERE id = ? AND status = ? AND updatedAt = ?
+      """), (now, upload["id"], upload["status"], upload["updatedAt"]))
+      if cursor.rowcount == 1:
+        claimed.append(upload)
+    conn.commit()
+    return claimed
+  finally:
+    conn.close()
+
+def _finish(upload: dict, error: str | None):
+  table = quote_identifier('pendingUploads')
+  now = _now()
+  attempts = upload["attempts"] + 1
+  if error == None:
+    status, nextAttemptAt = "done", upload["nextAttemptAt"]
+  elif attempts >= MAX_ATTEMPTS:
+    status, nextAttemptAt = "failed", upload["nextAttemptAt"]
+  else:
+    status, nextAttemptAt = "pending", now + int(RETRY_BASE_SECONDS * 1000 * 2 ** (attempts - 1))
+
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {table} SET status = ?, attempts = ?, error = ?, nextAttemptAt = ?, updatedAt = ?
+      WHERE id = ?
+    """), (status, attempts, error, nextAttemptAt, now, upload["id"]))
+    conn.commit()
+  finally:
+    conn.close()
+  return status
+
+def _saveUrl(upload: dict, url: str):
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      UPDATE {quote_identifier('pendingUploads')} SET url = ?, updatedAt = ? WHERE id = ?
+    """), (url, _now(), upload["id"]))
+    conn.commit()
+  finally:
+    conn.close()
+  upload["url"] = url
+
+def _removeSpool(upload: dict):
+  try:
+    os.remove(upload["spoolPath"])
+  except OSError:
+    pass
+
+def _patch(upload: dict, value: str):
+  # only while the column still holds this upload's handle
+  requirement = RequirementsDb.get(upload["requirementId"])
+  if requirement != None and requirement.get(upload["field"]) == handle(upload["id"]):
+    RequirementsDb.updateSpecific(upload["requirementId"], [upload["field"]], (value,))
+
+def _abandon(upload: dict):
+  _removeSpool(upload)
+  try:
+    _patch(upload, FAILED_PREFIX + upload["id"])
+  except Exception as e:
+    print(f"[UPLOAD_PIPELINE] Could not mark {upload['field']} of requirement {upload['requirementId']} as failed: {e}")
+
+def _process(upload: dict) -> str:
+  try:
+    if not upload["url"]:
+      if not configureCloudinary():
+        raise Exception("Cloudinary configuration is missing")
+      with open(upload["spoolPath"], "rb") as spooledFile:
+        file = FileStorage(stream=spooledFile, filename=upload["filename"], content_type=upload["contentType"])
+        publicId = f"{uuid4()}_{upload['filename']}".rsplit('.', 1)[0]
+        url = uploadToCloudinary(file, upload["folder"], publicId)
+      # keep the URL first so a failed patch is retried without uploading again
+      _saveUrl(upload, url)
+      _removeSpool(upload)
+    _patch(upload, upload["url"])
+  except Exception as e:
+    status = _finish(upload, str(e))
+    if status == "failed":
+      _abandon(upload)
+    print(f"[UPLOAD_PIPELINE] ❌ Upload {upload['id']} ({upload['field']}) failed, now {status}: {e}")
+    return status
+
+  _finish(upload, None)
+  print(f"[UPLOAD_PIPELINE] ✅ Uploaded {upload['field']} for requirement {upload['requirementId']}")
+  return "done"
+
+def drain() -> dict:
+  """Processes every upload that is due now; returns {uploadId: resulting status}"""
+  results = {}
+  while True:
+    claimed = _claimDue(BATCH_SIZE)
+    if not claimed:
+      return results
+    futures = {upload["id"]: _uploadPool.submit(_process, upload) for upload in claimed}
+    for uploadId, future in futures.items():
+      results[uploadId] = future.result()
+
+def _workerLoop():
+  while True:
+    try:
+      drain()
+    except Exception as e:
+      print(f"[UPLOAD_PIPELINE] Worker error: {e}")
+    _wake.wait(POLL_SECONDS)
+    _wake.clear()
+
+def startWorker():
+  """Starts this process's background worker once"""
+  global _worker
+  with _workerLock:
+    if _worker == None or not _worker.is_alive():
+      _worker = threading.Thread(target=_workerLoop, name="upload-pipeline")
+      _worker.daemon = True
+      _worker.start()
+
+def uploadStatus(requirementId: str) -> list[dict]:
+  """
+  Progress of each file of a requirement. The status route is public, so
+  this carries no file names, URLs or error messages.
+  """
+  startWorker()
+  conn, cursor = cursorInstance()
+  try:
+    cursor.execute(convert_placeholders(f"""
+      SELECT field, status, attempts, nextAttemptAt, updatedAt
+      FROM {quote_identifier('pendingUploads')}
+      WHERE requirementId = ?
+      ORDER BY field
+    """), (requirementId,))
+    return [
+      {
+        "field": field,
+        "status": status,
+        "attempts": attempts,
+        "nextAttemptAt": nextAttemptAt if status == "pending" else None,
+        "updatedAt": updatedAt,
+      }
+      for field, status, attempts, nextAttemptAt, updatedAt in cursor.fetchall()
+    ]
+  finally:
+    conn.close()
@@ -1,18 +1,23 @@
-from flask import Blueprint, request
+from flask import Blueprint, request, Response, stream_with_context
 from ..controllers.analytics import (
     getEventSuccessAnalytics,
     getVolunteerDropoutAnalytics,
     getPredictiveInsights,
+    getSemesterForecasts,
     getSatisfactionAnalytics,
     getEventSatisfactionAnalytics,
+    runAnalyticsSections,
     seedDemoEvaluations,
     clearAnalyticsData,
     deleteDummyVolunteersData
 )
 from ..tools.rebuild_semester_satisfaction import rebuild as rebuild_semester_satisfaction
+from ..modules import TextIndex, AnalyticsCube, DataExport
+from ..middlewares import tokenCheck
 from ..controllers.participation import (
     getVolunteerParticipationHistory,
-    getSemesterParticipationSummary
+    getSemesterParticipationSummary,
+    getCohortRetention
 )
 
 AnalyticsBlueprint = Blueprint("analytics", __name__)
@@ -41,6 +46,12 @@ def insightsRoute():
     result = getPredictiveInsights()
     return result, 200 if result.get("success") else 500
 
+@AnalyticsBlueprint.route("/analytics/forecast", methods=["GET"])
+def forecastRoute():
+    """Get next-semester forecasts for satisfaction and participation"""
+    result = getSemesterForecasts()
+    return result, 200 if result.get("success") else 500
+
 @AnalyticsBlueprint.route("/analytics/satisfaction/rebuild", methods=["POST", "OPTIONS"])
 def rebuildSatisfactionRoute():
     """Admin: rebuild semester_satisfaction from evaluations"""
@@ -94,6 +105,102 @@ def eventSatisfactionAnalyticsRoute():
     result = getEventSatisfactionAnalytics(event_id_int, event_type)
     return result, 200 if result.get("success") else 500
 
+@AnalyticsBlueprint.route("/analytics/text-search", methods=["GET"])
+def textSearchRoute():
+    """Admin: full-text search over evaluation/survey recommendations and comments"""
+    userCheck = tokenCheck.authCheckMiddleware(["admin"])
+    if userCheck != None:
+        return userCheck
+
+    query = request.args.get('q', '')
+    source_type = request.args.get('sourceType', None)
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+    except:
+        limit = 20
+
+    if source_type and source_type not in TextIndex.SOURCES:
+        return {
+            "success": False,
+            "error": "Invalid sourceType",
+            "message": f"sourceType must be one of: {', '.join(TextIndex.SOURCES)}"
+        }, 400
+
+    try:
+        synced = TextIndex.syncIndex()
+        results = TextIndex.search(query, limit, source_type)
+        return {
+            "success": True,
+            "data": results,
+            "indexed": synced,
+            "message": "Text search completed successfully"
+        }, 200
+    except Exception as e:
+        return {"success": False, "error": str(e), "message": "Failed to search text index"}, 500
+
+@AnalyticsBlueprint.route("/analytics/export/<dataset>", methods=["GET"])
+def exportRoute(dataset):
+    """
+    Admin: download evaluations, surveys or participation history, e.g.
+    /analytics/export/surveys?format=xlsx (csv, parquet or xlsx), streamed as it is produced
+    """
+    userCheck = tokenCheck.authCheckMiddleware(["admin"])
+    if userCheck != None:
+        return userCheck
+
+    file_format = request.args.get('format', 'csv')
+    if dataset not in DataExport.DATASETS or file_format not in DataExport.FORMATS:
+        return {
+            "success": False,
+            "error": "Invalid dataset or format",
+            "message": f"dataset must be one of: {', '.join(DataExport.DATASETS)}; format must be one of: {', '.join(DataExport.FORMATS)}"
+        }, 400
+    if not DataExport.available(file_format):
+        return {"success": False, "error": f"{file_format} exports are not available on this server", "message": "Failed to export data"}, 501
+
+    return Response(
+        stream_with_context(DataExport.stream(dataset, file_format)),
+        mimetype=DataExport.FORMATS[file_format][1],
+        headers={"Content-Disposition": f"attachment; filename={DataExport.filename(dataset, file_format)}"}
+    )
+
+@AnalyticsBlueprint.route("/analytics/cube", methods=["GET"])
+def analyticsCubeRoute():
+    """
+    Roll-ups over the analytics cube, e.g.
+    /analytics/cube?groupBy=year,semester&eventType=internal&campus=Main,Alangilan
+    """
+    group_by = [dimension for dimension in request.args.get('groupBy', '').split(',') if dimension]
+    invalid = [dimension for dimension in group_by if dimension not in AnalyticsCube.DIMENSIONS]
+    if invalid:
+        return {
+            "success": False,
+            "error": f"Invalid groupBy: {', '.join(invalid)}",
+            "message": f"groupBy must be a comma-separated list of: {', '.join(AnalyticsCube.DIMENSIONS)}"
+        }, 400
+
+    filters = {}
+    for dimension in AnalyticsCube.DIMENSIONS:
+        values = [value for value in request.args.get(dimension, '').split(',') if value]
+        if not values:
+            continue
+        if dimension in ("year", "semester"):
+            try:
+                values = [int(value) for value in values]
+            except:
+                return {
+                    "success": False,
+                    "error": f"Invalid {dimension}",
+                    "message": f"{dimension} must be a comma-separated list of integers"
+                }, 400
+        filters[dimension] = values
+
+    try:
+        rows = AnalyticsCube.query(list(dict.fromkeys(group_by)), filters)
+        return {"success": True, "data": rows, "message": "Analytics cube retrieved successfully"}, 200
+    except Exception as e:
+        return {"success": False, "error": str(e), "message": "Failed to query analytics cube"}, 500
+
 @AnalyticsBlueprint.route("/analytics/participation-history", methods=["GET"])
 def participationHistoryRoute():
     """Get detailed volunteer participation history"""
@@ -113,23 +220,31 @@ def participationSummaryRoute():
     result = getSemesterParticipationSummary(semester, year)
     return jsonify(result), 200 if result.get("success") else 500
 
+@AnalyticsBlueprint.route("/analytics/cohort-retention", methods=["GET"])
+def cohortRetentionRoute():
+    """Get the cohort x semester retention matrix"""
+    from flask import jsonify
+    result = getCohortRetention()
+    return jsonify(result), 200 if result.get("success") else 500
+
 @AnalyticsBlueprint.route("/analytics/all", methods=["GET"])
 def allAnalyticsRoute():
     """Get all analytics data in one request"""
     try:
-        eventSuccess = getEventSuccessAnalytics()
-        dropoutRisk = getVolunteerDropoutAnalytics()
-        insights = getPredictiveInsights()
-        satisfaction = getSatisfactionAnalytics()
+        # insights reuse the event success and dropout results of this run
+        sections = runAnalyticsSections(["eventSuccess", "dropoutRisk", "insights", "satisfaction"])
+        timedOut = [name for name, result in sections.items() if result.get("timedOut")]
         
         return {
             "success": True,
             "data": {
-                "eventSuccess": eventSuccess,
-                "dropoutRisk": dropoutRisk,
-                "insights": insights,
-                "satisfaction": satisfaction
+                "eventSuccess": sections["eventSuccess"],
+                "dropoutRisk": sections["dropoutRisk"],
+                "insights": sections["insights"],
+                "satisfaction": sections["satisfaction"]
             },
+            "partial": len(timedOut) > 0,
+            "timedOut": timedOut,
             "message": "All analytics data retrieved successfully"
         }, 200
     except Exception as e:
@@ -38,6 +38,10 @@ def analyzeInternalEvaluationRoute(id):
 def getAllPublicEventsRoute():
   return events.getPublicEvents()
 
+@EventsBlueprint.get("/recommended")
+def getRecommendedEventsRoute():
+  return events.getRecommendedEvents()
+
 ###############################
 #  EXTERNAL EVENT OPERATIONS  #
 ###############################
@@ -9,6 +9,10 @@ RequirementsBlueprint = Blueprint('requirements', __name__, url_prefix="/require
 def getAllRequirementsRoute():
   return requirements.getAllRequirements()
 
+@RequirementsBlueprint.get("/uploads/<requirementId>")
+def getUploadStatusRoute(requirementId):
+  return requirements.getUploadStatus(requirementId)
+
 @RequirementsBlueprint.post("/<eventId>")
 def uploadRequirementsRoute(eventId):
   return requirements.createNewRequirement(eventId)
@@ -25,7 +29,8 @@ def rejectRequirementsRoute(requirementId):
 def requirementsMiddleware():
   if (request.method != "OPTIONS"):
     # Add authentication check for GET requests (viewing requirements)
-    if (request.method == "GET"):
+    # upload status is polled by the submitter, who holds the requirement id; it only reports progress
+    if (request.method == "GET" and (request.endpoint or "").rsplit(".", 1)[-1] != "getUploadStatusRoute"):
       userCheck = tokenCheck.authCheckMiddleware(["admin", "officer"])
       if (userCheck != None):
         return userCheck
@@ -0,0 +1,52 @@
+"""
+Exports evaluations, satisfaction surveys and participation history to
+CSV, Parquet or XLSX files in constant memory (see modules/DataExport).
+
+  python -m app.tools.export_data [dataset ...] [--format {csv,parquet,xlsx}] [--output data/exports] [--chunk-rows N]
+
+Without datasets every dataset is exported, one file each.
+"""
+import argparse
+import os
+import sys
+import time
+
+from ..modules import DataExport
+
+OUTPUT_DIRECTORY = os.path.join("data", "exports")
+
+
+def export(datasets=None, file_format="csv", output=OUTPUT_DIRECTORY, chunk_rows=DataExport.CHUNK_ROWS):
+  """Writes one file per dataset; returns {dataset: path}"""
+  paths = {}
+  for dataset in datasets or list(DataExport.DATASETS):
+    path = os.path.join(output, DataExport.filename(dataset, file_format))
+    start = time.time()
+    size = DataExport.exportToFile(dataset, file_format, path, chunk_rows)
+    print(f"✓ {dataset}: {path} ({size / 1024:.0f} KB in {time.time() - start:.2f}s)")
+    paths[dataset] = path
+  return paths
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(
+    prog="python -m app.tools.export_data",
+    description="Exports analytics datasets in constant memory, one file each."
+  )
+  parser.add_argument("datasets", nargs="*", metavar="dataset",
+                      help=f"datasets to export (default: all of {', '.join(DataExport.DATASETS)})")
+  parser.add_argument("--format", dest="file_format", choices=list(DataExport.FORMATS), default="csv")
+  parser.add_argument("--output", default=OUTPUT_DIRECTORY, help=f"output directory (default: {OUTPUT_DIRECTORY})")
+  parser.add_argument("--chunk-rows", type=int, default=DataExport.CHUNK_ROWS,
+                      help=f"rows fetched per chunk (default: {DataExport.CHUNK_ROWS})")
+  args = parser.parse_args()
+  # checked here: argparse rejects an empty list against choices with nargs="*"
+  unknown = [dataset for dataset in args.datasets if dataset not in DataExport.DATASETS]
+  if unknown:
+    parser.error(f"unknown dataset {', '.join(unknown)} (choose from {', '.join(DataExport.DATASETS)})")
+
+  if not DataExport.available(args.file_format):
+    print(f"❌ {args.file_format} exports need {'pyarrow' if args.file_format == 'parquet' else 'openpyxl'} installed")
+    sys.exit(1)
+
+  export(args.datasets, args.file_format, args.output, args.chunk_rows)
@@ -0,0 +1,405 @@
+"""
+Deterministic synthetic dataset for load testing and benchmarks.
+
+Generates members, internal and external events, event requirements
+(members joining events), evaluations and satisfaction surveys that
+reference each other the way real data does, sized by a scale factor:
+scale 1 is 1,000 members and 50 events, scale 1000 is a million members.
+Values are drawn column-wise with numpy from generators seeded by
+(seed, table, chunk), so the same seed and scale always give the same
+rows, and rows are written with batched inserts (execute_values on
+PostgreSQL, executemany on SQLite) in one transaction.
+
+Synthetic rows are marked (@synthetic.test emails, "synthetic-" requirement
+ids, eventProposalType 'synthetic'); --reset removes them before generating.
+
+  python -m app.tools.generate_synthetic_data [--scale 1] [--seed 42] [--reset]
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+
+from ..database.connection import cursorInstance, quote_identifier, is_postgresql_connection
+from ..modules import AnalyticsCube, DataVersion
+
+load_dotenv()
+
+MEMBERS_PER_SCALE = 1000
+INTERNAL_EVENTS_PER_SCALE = 30
+EXTERNAL_EVENTS_PER_SCALE = 20
+EVENTS_JOINED_PER_MEMBER = 4        # Poisson mean
+ACCEPTED_SHARE = 0.85                # joins accepted by the officers
+ATTENDED_SHARE = 0.8                 # accepted joins that were evaluated
+VOLUNTEER_SURVEY_SHARE = 0.6         # evaluations followed by a survey
+BENEFICIARY_SURVEYS_PER_EVENT = 12
+HISTORY_DAYS = 3 * 365
+CHUNK_ROWS = 10000
+PAGE_SIZE = 1000
+
+MARKER_DOMAIN = "synthetic.test"
+MARKER_PREFIX = "synthetic-"
+MARKER_PROPOSAL = "synthetic"
+MS_PER_DAY = 24 * 60 * 60 * 1000
+
+FIRST_NAMES = np.array([
+  "Juan", "Maria", "Jose", "Ana", "Mark", "Angel", "John", "Kristine", "Paolo", "Nicole", "Carlo", "Patricia",
+  "Miguel", "Andrea", "Joshua", "Camille", "Gabriel", "Bea", "Rafael", "Trisha", "Daniel", "Sophia", "Adrian", "Jasmine",
+])
+LAST_NAMES = np.array([
+  "Dela Cruz", "Garcia", "Reyes", "Ramos", "Mendoza", "Santos", "Flores", "Gonzales", "Bautista", "Villanueva",
+  "Fernandez", "Cruz", "De Guzman", "Lopez", "Perez", "Castillo", "Aquino", "Magboo", "Marasigan", "Panganiban",
+])
+CAMPUSES = np.array(["Pablo Borbon", "Alangilan", "Lipa", "Nasugbu", "Malvar", "Lemery", "Rosario", "Balayan"])
+COLLEGES = np.array(["CICS", "CET", "CABEIHM", "CAS", "CTE", "CONAHS", "CCJE", "CAFAD"])
+PROGRAMS = np.array(["BSIT", "BSCS", "BSCE", "BSME", "BSTM", "BSHM", "BSN", "BSEd", "BSPsych", "BSCrim"])
+TIME_DEVOTION = np.array(["1-4 hours", "5-8 hours", "9-12 hours", "More than 12 hours"])
+INTERESTS = np.array([
+  "Outreach", "Environment", "Education", "Health", "Disaster Response", "Sports and Recreation", "Arts and Culture",
+])
+BLOOD_TYPES = np.array(["O+", "A+", "B+", "AB+", "O-", "A-", "B-", "AB-"])
+VENUES = np.array(["Gymnasium", "Audio Visual Room", "Covered Court", "Barangay Hall", "Open Field", "Online"])
+SDGS = np.array(["SDG 1", "SDG 2", "SDG 3", "SDG 4", "SDG 6", "SDG 11", "SDG 13", "SDG 15"])
+EVENT_THEMES = np.array([
+  "Tree Planting", "Coastal Cleanup", "Blood Letting", "Feeding Program", "Literacy Caravan", "Medical Mission",
+  "Relief Operation", "Gift-Giving", "Sports Clinic", "Disaster Preparedness Seminar",
+])
+RATINGS = np.array(["Poor", "Fair", "Satisfactory", "Very Satisfactory", "Excellent"])
+RATING_WEIGHTS = np.array([0.03, 0.07, 0.2, 0.35, 0.35])
+COMMENTS = np.array([
+  "Great event overall.", "Well organized and meaningful.", "The venue was too crowded.",
+  "Communication before the event could be better.", "I learned a lot and would join again.",
+  "Materials were not enough for everyone.", "The schedule was delayed.", "Very fulfilling experience.",
+])
+RECOMMENDATIONS = np.array([
+  "Keep improving community engagement.", "Start on time.", "Prepare more materials.",
+  "Announce the event earlier.", "Hold more events like this.",
+])
+
+TABLES = ["membership", "internalEvents", "externalEvents", "requirements", "evaluation", "satisfactionSurveys"]
+# one random stream per (seed, stream, chunk), independent of what else is generated
+STREAMS = TABLES + ["beneficiarySurveys"]
+
+
+def _rng(seed, stream, chunk=0):
+  return np.random.default_rng([seed, STREAMS.index(stream), chunk])
+
+
+def _pick(rng, values, size, p=None):
+  return values[rng.choice(len(values), size=size, p=p)]
+
+
+def _rows(*columns):
+  """Row tuples of plain Python values from equally long columns"""
+  return list(zip(*[column.tolist() if isinstance(column, np.ndarray) else column for column in columns]))
+
+
+def insert(conn, cursor, table, columns, rows):
+  """Batched insert of row tuples"""
+  if not rows:
+    return 0
+  if is_postgresql_connection(conn):
+    from psycopg2.extras import execute_values
+    execute_values(
+      cursor, f"INSERT INTO {quote_identifier(table)} ({', '.join(columns)}) VALUES %s", rows, page_size=PAGE_SIZE
+    )
+  else:
+    cursor.executemany(
+      f"INSERT INTO {quote_identifier(table)} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})", rows
+    )
+  return len(rows)
+
+
+def reset(conn, cursor):
+  """Removes previously generated synthetic rows; returns the number deleted"""
+  deleted = 0
+  statements = [
+    ("satisfactionSurveys", f"requirementId LIKE '{MARKER_PREFIX}%' OR respondentEmail LIKE '%@{MARKER_DOMAIN}'"),
+    ("evaluation", f"requirementId LIKE '{MARKER_PREFIX}%'"),
+    ("requirements", f"id LIKE '{MARKER_PREFIX}%'"),
+    ("internalEvents", f"eventProposalType = '{MARKER_PROPOSAL}'"),
+    ("externalEvents", f"eventProposalType = '{MARKER_PROPOSAL}'"),
+    ("membership", f"email LIKE '%@{MARKER_DOMAIN}'"),
+  ]
+  for table, condition in statements:
+    cursor.execute(f"DELETE FROM {quote_identifier(table)} WHERE {condition}")
+    deleted += max(cursor.rowcount, 0)
+  return deleted
+
+
+def _nextId(cursor, table):
+  cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {quote_identifier(table)}")
+  return int(cursor.fetchone()[0]) + 1
+
+
+def generate_events(conn, cursor, seed, scale, now, created_by):
+  """Internal and external events; returns their (id, type, start, end) columns"""
+  events = {}
+  for table, event_type, count in (
+    ("internalEvents", "internal", INTERNAL_EVENTS_PER_SCALE * scale),
+    ("externalEvents", "external", EXTERNAL_EVENTS_PER_SCALE * scale),
+  ):
+    rng = _rng(seed, table)
+    ids = np.arange(count) + _nextId(cursor, table)
+    start = now - rng.integers(-30, HISTORY_DAYS, size=count) * MS_PER_DAY
+    end = start + rng.integers(1, 3, size=count) * MS_PER_DAY
+    titles = np.char.add(np.char.add(_pick(rng, EVENT_THEMES, count), " "), (np.arange(count) + 1).astype(str))
+    status = np.where(end < now, "completed", "accepted")
+    long_text = [f"Synthetic {event_type} event for load testing."] * count
+
+    if table == "internalEvents":
+      male = rng.integers(5, 60, size=count)
+      female = rng.integers(5, 60, size=count)
+      columns = [
+        "id", "title", "durationStart", "durationEnd", "venue", "modeOfDelivery", "projectTeam", "partner",
+        "participant", "maleTotal", "femaleTotal", "rationale", "objectives", "description", "workPlan",
+        "financialRequirement", "evaluationMechanicsPlan", "sustainabilityPlan", "createdBy", "status", "toPublic",
+        "evaluationSendTime", "eventProposalType",
+      ]
+      rows = _rows(
+        ids, titles, start, end, _pick(rng, VENUES, count), np.where(rng.random(count) < 0.2, "online", "face-to-face"),
+        long_text, _pick(rng, CAMPUSES, count), ["Students"] * count, male, female, long_text, long_text, long_text,
+        long_text, long_text, long_text, long_text, [created_by] * count, status, [True] * count, end,
+        [MARKER_PROPOSAL] * count,
+      )
+    else:
+      columns = [
+        "id", "extensionServiceType", "title", "location", "durationStart", "durationEnd", "sdg", "orgInvolved",
+        "programInvolved", "projectLeader", "partners", "beneficiaries", "totalCost", "sourceOfFund", "rationale",
+        "objectives", "expectedOutput", "description", "financialPlan", "dutiesOfPartner", "evaluationMechanicsPlan",
+        "sustainabilityPlan", "createdBy", "status", "evaluationSendTime", "toPublic", "eventProposalType",
+      ]
+      rows = _rows(
+        ids, ["Community Service"] * count, titles, _pick(rng, CAMPUSES, count), start, end, _pick(rng, SDGS, count),
+        ["Sulambi VOSA"] * count, _pick(rng, PROGRAMS, count), _pick(rng, LAST_NAMES, count), ["LGU"] * count,
+        ["Community members"] * count, np.round(rng.gamma(2.0, 5000.0, size=count), 2), ["University fund"] * count,
+        long_text, long_text, long_text, long_text, long_text, long_text, long_text, long_text,
+        [created_by] * count, status, end, [True] * count, [MARKER_PROPOSAL] * count,
+      )
+    insert(conn, cursor, table, columns, rows)
+    events[event_type] = (ids, start, end)
+
+  return {
+    "id": np.concatenate([events["internal"][0], events["external"][0]]),
+    "type": np.array(["internal"] * len(events["internal"][0]) + ["external"] * len(events["external"][0])),
+    "start": np.concatenate([events["internal"][1], events["external"][1]]),
+    "end": np.concatenate([events["internal"][2], events["external"][2]]),
+  }
+
+
+def generate_members(conn, cursor, seed, chunk, first_id, first_index, count):
+  """One chunk of members; returns the columns the requirements copy"""
+  rng = _rng(seed, "membership", chunk)
+  index = np.arange(count) + first_index
+  ids = index - first_index + first_id
+  first = _pick(rng, FIRST_NAMES, count)
+  last = _pick(rng, LAST_NAMES, count)
+  fullname = np.char.add(np.char.add(last, ", "), first)
+  srcode = np.char.add(np.char.add(rng.integers(19, 26, size=count).astype(str), "-"), np.char.zfill(index.astype(str), 7))
+  email = np.char.add(np.char.add("member", index.astype(str)), "@" + MARKER_DOMAIN)
+  age = rng.integers(17, 26, size=count)
+  sex = np.where(rng.random(count) < 0.58, "Female", "Male")
+  campus = _pick(rng, CAMPUSES, count)
+  college = _pick(rng, COLLEGES, count)
+  program = np.char.add(np.char.add(rng.integers(1, 5, size=count).astype(str), " year "), _pick(rng, PROGRAMS, count))
+  birth_year = datetime.now().year - age
+  birthday = [f"January {day:02d}, {year}" for day, year in zip(rng.integers(1, 29, size=count).tolist(), birth_year.tolist())]
+  interests = [
+    json.dumps(INTERESTS[np.flatnonzero(mask)].tolist())
+    for mask in rng.random((count, len(INTERESTS))) < 0.3
+  ]
+  address = np.char.add(campus, ", Batangas")
+  contact = np.char.add("09", rng.integers(100000000, 999999999, size=count).astype(str))
+  username = np.char.add(first, index.astype(str))
+  accepted = rng.random(count) < 0.9
+
+  columns = [
+    "id", "applyingAs", "volunterismExperience", "weekdaysTimeDevotion", "weekendsTimeDevotion", "areasOfInterest",
+    "fullname", "email", "affiliation", "srcode", "age", "birthday", "sex", "campus", "collegeDept", "yrlevelprogram",
+    "address", "contactNum", "fblink", "bloodType", "bloodDonation", "medicalCondition", "paymentOption",
+    "username", "password", "active", "accepted",
+  ]
+  insert(conn, cursor, "membership", columns, _rows(
+    ids, np.where(rng.random(count) < 0.7, "New Member", "Old Member"), rng.random(count) < 0.5,
+    _pick(rng, TIME_DEVOTION, count), _pick(rng, TIME_DEVOTION, count), interests,
+    fullname, email, ["Batangas State University"] * count, srcode, age, birthday, sex, campus, college, program,
+    address, contact, np.char.add("https://facebook.com/", username), _pick(rng, BLOOD_TYPES, count),
+    np.where(rng.random(count) < 0.4, "Willing", "I'm not willing."), ["N/A"] * count,
+    ["One-time payment of Php 50.00 for the whole semester"] * count,
+    username, ["password"] * count, rng.random(count) < 0.95, accepted,
+  ))
+  return {
+    "index": index, "fullname": fullname, "email": email, "srcode": srcode, "age": age, "birthday": np.array(birthday),
+    "sex": sex, "campus": campus, "college": college, "program": program, "address": address, "contact": contact,
+    "fblink": np.char.add("https://facebook.com/", username), "accepted": accepted,
+  }
+
+
+def generate_participation(conn, cursor, seed, chunk, members, events, now, next_ids):
+  """
+  Requirements, evaluations and volunteer surveys of one chunk of members;
+  returns the row counts and advances next_ids
+  """
+  rng = _rng(seed, "requirements", chunk)
+  joins = np.where(members["accepted"], rng.poisson(EVENTS_JOINED_PER_MEMBER, size=len(members["index"])), 0)
+  member = np.repeat(np.arange(len(joins)), joins)
+  event = rng.integers(0, len(events["id"]), size=len(member))
+  # a member joins an event at most once
+  member, event = np.unique(np.stack([member, event]), axis=1) if len(member) else (member, event)
+  count = len(member)
+
+  requirement_id = np.char.add(
+    np.char.add(f"{MARKER_PREFIX}{seed}-", members["index"][member].astype(str)), np.char.add("-", events["id"][event].astype(str))
+  )
+  requirement_id = np.char.add(requirement_id, np.char.add("-", events["type"][event]))
+  accepted = rng.random(count) < ACCEPTED_SHARE
+  insert(conn, cursor, "requirements", [
+    "id", "medCert", "waiver", "type", "eventId", "affiliation", "fullname", "email", "srcode", "age", "birthday",
+    "sex", "campus", "collegeDept", "yrlevelprogram", "address", "contactNum", "fblink", "accepted",
+  ], _rows(
+    requirement_id, [""] * count, [""] * count, events["type"][event], events["id"][event],
+    ["Batangas State University"] * count,
+    *(members[column][member] for column in (
+      "fullname", "email", "srcode", "age", "birthday", "sex", "campus", "college", "program", "address", "contact", "fblink",
+    )),
+    accepted,
+  ))
+
+  rng = _rng(seed, "evaluation", chunk)
+  evaluated = np.flatnonzero(accepted & (events["end"][event] < now) & (rng.random(count) < ATTENDED_SHARE))
+  rating = rng.choice(len(RATINGS), size=(len(evaluated), 4), p=RATING_WEIGHTS)
+  criteria = [
+    json.dumps({"overall": RATINGS[overall], "appropriateness": RATINGS[organization], "expectations": RATINGS[expectations],
+                "materials": RATINGS[materials]})
+    for overall, organization, expectations, materials in rating.tolist()
+  ]
+  score = rating[:, 0] + 1
+  comment = _pick(rng, COMMENTS, len(evaluated))
+  recommendation = _pick(rng, RECOMMENDATIONS, len(evaluated))
+  evaluation_ids = np.arange(len(evaluated)) + next_ids["evaluation"]
+  next_ids["evaluation"] += len(evaluated)
+  insert(conn, cursor, "evaluation", [
+    "id", "criteria", "q13", "q14", "comment", "recommendations", "requirementId", "finalized",
+  ], _rows(
+    evaluation_ids, criteria, score.astype(str), [""] * len(evaluated), comment, recommendation, requirement_id[evaluated],
+    [True] * len(evaluated),
+  ))
+
+  rng = _rng(seed, "satisfactionSurveys", chunk)
+  surveyed = rng.random(len(evaluated)) < VOLUNTEER_SURVEY_SHARE
+  survey = evaluated[surveyed]
+  ratings = rating[surveyed] + 1
+  submitted = events["end"][event[survey]] + rng.integers(0, 7 * MS_PER_DAY, size=len(survey))
+  survey_ids = np.arange(len(survey)) + next_ids["satisfactionSurveys"]
+  next_ids["satisfactionSurveys"] += len(survey)
+  insert(conn, cursor, "satisfactionSurveys", [
+    "id", "eventId", "eventType", "requirementId", "respondentType", "respondentEmail", "respondentName",
+    "overallSatisfaction", "volunteerRating", "organizationRating", "communicationRating", "materialsRating",
+    "q13", "comment", "recommendations", "wouldRecommend", "submittedAt", "finalized",
+  ], _rows(
+    survey_ids, events["id"][event[survey]], events["type"][event[survey]], requirement_id[survey], ["Volunteer"] * len(survey),
+    members["email"][member[survey]], members["fullname"][member[survey]],
+    ratings[:, 0].astype(float), ratings[:, 0].astype(float), ratings[:, 1].astype(float), ratings[:, 2].astype(float),
+    ratings[:, 3].astype(float), ratings[:, 0].astype(str), comment[surveyed], recommendation[surveyed],
+    ratings[:, 0] >= 4, submitted, [True] * len(survey),
+  ))
+  return count, len(evaluated), len(survey)
+
+
+def generate_beneficiary_surveys(conn, cursor, seed, events, now, next_ids):
+  rng = _rng(seed, "beneficiarySurveys")
+  past = np.flatnonzero(events["end"] < now)
+  event = np.repeat(past, BENEFICIARY_SURVEYS_PER_EVENT)
+  count = len(event)
+  rating = rng.choice(len(RATINGS), size=count, p=RATING_WEIGHTS) + 1
+  email = np.char.add(np.char.add("beneficiary", np.arange(count).astype(str)), "@" + MARKER_DOMAIN)
+  ids = np.arange(count) + next_ids["satisfactionSurveys"]
+  next_ids["satisfactionSurveys"] += count
+  return insert(conn, cursor, "satisfactionSurveys", [
+    "id", "eventId", "eventType", "respondentType", "respondentEmail", "overallSatisfaction", "beneficiaryRating",
+    "q14", "comment", "wouldRecommend", "submittedAt", "finalized",
+  ], _rows(
+    ids, events["id"][event], events["type"][event], ["Beneficiary"] * count, email, rating.astype(float),
+    rating.astype(float), rating.astype(str), _pick(rng, COMMENTS, count), rating >= 4,
+    events["end"][event] + rng.integers(0, 7 * MS_PER_DAY, size=count), [True] * count,
+  ))
+
+
+def _resetSequences(conn, cursor):
+  """Moves the serial sequences past the explicit ids written (PostgreSQL)"""
+  if not is_postgresql_connection(conn):
+    return
+  for table in TABLES:
+    if table == "requirements":
+      continue
+    cursor.execute(
+      f"SELECT setval(pg_get_serial_sequence(%s, 'id'), (SELECT COALESCE(MAX(id), 0) + 1 FROM {quote_identifier(table)}), false)",
+      (quote_identifier(table),)
+    )
+
+
+def generate(scale=1, seed=42, reset_first=False, now=None):
+  """Writes the dataset in one transaction; returns {table: rows written}"""
+  # a fixed "now" keeps event dates (and so everything derived) reproducible
+  now = now or int(datetime(2026, 1, 1).timestamp() * 1000)
+  written = dict.fromkeys(TABLES, 0)
+  conn, cursor = cursorInstance()
+  try:
+    if reset_first:
+      print(f"Removed {reset(conn, cursor)} synthetic rows")
+    cursor.execute(f"SELECT MIN(id) FROM {quote_identifier('accounts')}")
+    created_by = cursor.fetchone()[0] or 1
+
+    start = time.time()
+    events = generate_events(conn, cursor, seed, scale, now, created_by)
+    written["internalEvents"] = int((events["type"] == "internal").sum())
+    written["externalEvents"] = int((events["type"] == "external").sum())
+
+    member_count = MEMBERS_PER_SCALE * scale
+    first_id = _nextId(cursor, "membership")
+    # explicit ids, so a reset database gets the same ids on every run
+    next_ids = {table: _nextId(cursor, table) for table in ("evaluation", "satisfactionSurveys")}
+    for chunk, first_index in enumerate(range(0, member_count, CHUNK_ROWS)):
+      count = min(CHUNK_ROWS, member_count - first_index)
+      members = generate_members(conn, cursor, seed, chunk, first_id + first_index, first_index, count)
+      requirements, evaluations, surveys = generate_participation(conn, cursor, seed, chunk, members, events, now, next_ids)
+      written["membership"] += count
+      written["requirements"] += requirements
+      written["evaluation"] += evaluations
+      written["satisfactionSurveys"] += surveys
+      print(f"  members {first_index + count}/{member_count} ({time.time() - start:.1f}s)", flush=True)
+
+    written["satisfactionSurveys"] += generate_beneficiary_surveys(conn, cursor, seed, events, now, next_ids)
+    _resetSequences(conn, cursor)
+    conn.commit()
+    DataVersion.bump(conn, cursor, *TABLES, rewrite=reset_first)
+    # the raw inserts (and the reset's deletes) bypass Model._touch
+    AnalyticsCube.markAllDirty(conn, cursor)
+    print(f"✓ Generated {sum(written.values())} rows in {time.time() - start:.1f}s")
+    for table, count in written.items():
+      print(f"  {table}: {count}")
+    return written
+  except Exception:
+    conn.rollback()
+    raise
+  finally:
+    conn.close()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(
+    prog="python -m app.tools.generate_synthetic_data",
+    description="Writes a deterministic synthetic dataset for load testing."
+  )
+  parser.add_argument("--scale", type=int, default=1,
+                      help=f"{MEMBERS_PER_SCALE} members and {INTERNAL_EVENTS_PER_SCALE + EXTERNAL_EVENTS_PER_SCALE} events per unit (default: 1)")
+  parser.add_argument("--seed", type=int, default=42, help="random seed (default: 42)")
+  parser.add_argument("--reset", action="store_true", help="remove earlier synthetic rows first")
+  args = parser.parse_args()
+  if args.scale < 1:
+    parser.error("--scale must be at least 1")
+
+  generate(scale=args.scale, seed=args.seed, reset_first=args.reset)
@@ -0,0 +1,310 @@
+"""
+Imports the membership application sheet (data/member-app.xlsx) into the
+membership table.
+
+The sheet is normalized and deduplicated with column operations, then
+diffed against the stored members in one query: a sheet row matches a
+member by email (case-insensitive), or by Sr-Code when the email is new.
+Unmatched rows are inserted as pending applications and matched members
+whose profile answers changed are updated; with --accept every member of
+the sheet is also made accepted and active. All writes are batched
+executemany calls in a single transaction, and --dry-run only prints the
+report of what would be written.
+
+  python -m app.tools.import_members [sheet.xlsx] [--dry-run] [--accept] [--no-update]
+"""
+import os
+import sys
+from datetime import date, datetime
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from ..modules import DataVersion
+
+load_dotenv()
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data")
+SHEET_NAMES = ["member-app.xlsx", "member- app.xlsx", "members-app.xlsx", "member_app.xlsx", "members_app.xlsx", "member app.xlsx"]
+AFFILIATION = "Batangas State University"
+DEFAULT_PASSWORD = "password"
+REPORT_SAMPLE = 10
+
+# sheet header -> membership column
+SHEET_COLUMNS = {
+  "I'm applying as": "applyingAs",
+  "Do you have any prior volunteerism experience?": "volunterismExperience",
+  "How much time can you devote for volunteering activities on weekdays?": "weekdaysTimeDevotion",
+  "How much time can you devote for volunteering activities on weekends?": "weekendsTimeDevotion",
+  "What areas or interests do you want to volunteer in? Check the area(s) that interest you. ": "areasOfInterest",
+  "Name (Last Name, First Name, Middle Initial)": "fullname",
+  "Sr-Code": "srcode",
+  "Age": "age",
+  "Birthday": "birthday",
+  "Sex": "sex",
+  "Campus": "campus",
+  "College/Department": "collegeDept",
+  "Year Level & Program": "yrlevelprogram",
+  "Address": "address",
+  "Contact Number": "contactNum",
+  "Facebook Link": "fblink",
+  "Blood Type": "bloodType",
+  "Blood Donation": "bloodDonation",
+  "Do you have any existing medical condition/s? If yes, please specify. If none, type N/A.": "medicalCondition",
+  "Payment Options": "paymentOption",
+  "1. What volunteering activities of Sulambi VOSA last Academic Year did you join?": "volunteerExpQ1",
+  "2. What volunteering activities did you join outside Sulambi VOSA and/or the University?": "volunteerExpQ2",
+  "2.1 Upload proof for the volunteering activities you joined outside(e.g. Pictures, Certificate)": "volunteerExpProof",
+  "Why do you want to become a member?": "reasonQ1",
+  "What can you contribute to the organization?": "reasonQ2",
+}
+
+# answers a re-import refreshes; the account columns (username, password,
+# active, accepted) are only written for new members
+PROFILE_COLUMNS = ["email", "affiliation"] + list(SHEET_COLUMNS.values())
+INSERT_COLUMNS = PROFILE_COLUMNS + ["username", "password", "active", "accepted"]
+
+
+def find_sheet(directory=DATA_DIRECTORY):
+  """Path of the membership sheet in the data folder, or None"""
+  for name in SHEET_NAMES:
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+      return path
+  if os.path.isdir(directory):
+    for name in sorted(os.listdir(directory)):
+      if name.endswith(".xlsx") and "member" in name.lower():
+        return os.path.join(directory, name)
+  return None
+
+
+def _text(column):
+  """Stripped text of a sheet column, '' for blanks"""
+  text = column.astype(object).where(column.notna(), "").astype(str).str.strip()
+  return text.where(text.str.lower() != "nan", "")
+
+
+def _birthday(column):
+  """Dates as 'June 20, 2005' (as the old loaders wrote them), anything else as text"""
+  is_date = column.map(lambda value: isinstance(value, (datetime, date)))
+  dates = pd.to_datetime(column.where(is_date), errors="coerce")
+  return _text(column).where(~is_date, dates.dt.strftime("%B %d, %Y"))
+
+
+def normalize(sheet):
+  """
+  (members, invalid, duplicates): one row per applicant with membership
+  columns, plus the counts of rows without an email or name and of rows
+  repeating an earlier applicant
+  """
+  frame = pd.DataFrame(index=sheet.index)
+  for header, column in SHEET_COLUMNS.items():
+    frame[column] = _text(sheet[header]) if header in sheet else ""
+
+  # the GSuite address identifies students, the form's email is a fallback
+  email = _text(sheet["Email Address"]) if "Email Address" in sheet else pd.Series("", index=sheet.index)
+  gsuite = _text(sheet["Gsuite Email"]) if "Gsuite Email" in sheet else pd.Series("", index=sheet.index)
+  frame["email"] = gsuite.where(gsuite != "", email)
+  frame["affiliation"] = AFFILIATION
+
+  frame["volunterismExperience"] = frame["volunterismExperience"].str.lower().isin(["yes", "true", "1"])
+  frame["age"] = pd.to_numeric(sheet["Age"] if "Age" in sheet else frame["age"], errors="coerce").fillna(0).astype(int)
+  if "Birthday" in sheet:
+    frame["birthday"] = _birthday(sheet["Birthday"])
+  frame["medicalCondition"] = frame["medicalCondition"].where(frame["medicalCondition"] != "", "N/A")
+
+  valid = (frame["email"] != "") & (frame["fullname"] != "")
+  invalid = int((~valid).sum())
+  frame = frame[valid]
+
+  frame["emailKey"] = frame["email"].str.lower()
+  frame["srcodeKey"] = frame["srcode"].str.lower()
+  duplicated = frame["emailKey"].duplicated() | (frame["srcodeKey"].duplicated() & (frame["srcodeKey"] != ""))
+  frame = frame[~duplicated]
+
+  frame["username"] = frame["fullname"].str.split(" ").str[0].str.replace(",", "", regex=False) + frame.index.astype(str)
+  frame["password"] = DEFAULT_PASSWORD
+  frame["active"] = True
+  frame["accepted"] = None
+  return frame, invalid, int(duplicated.sum())
+
+
+def load_existing(cursor):
+  """Every stored member with the columns the sheet can change, in one query"""
+  cursor.execute(f"SELECT id, accepted, active, {', '.join(PROFILE_COLUMNS)} FROM {quote_identifier('membership')}")
+  columns = ["id", "accepted", "active"] + [column.lower() for column in PROFILE_COLUMNS]
+  existing = pd.DataFrame(cursor.fetchall(), columns=columns)
+  # PostgreSQL hands back the folded lowercase names
+  existing.columns = ["id", "accepted", "active"] + PROFILE_COLUMNS
+  existing["emailKey"] = _text(existing["email"]).str.lower()
+  existing["srcodeKey"] = _text(existing["srcode"]).str.lower()
+  return existing
+
+
+BLANK_TEXT = {"", "nan", "none"}
+# birthdays as the sheet loaders wrote them and as stored from datetime values
+BIRTHDAY_FORMATS = ["%B %d, %Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"]
+
+
+def _comparable(value):
+  """
+  Text of a value as it compares across SQLite and PostgreSQL: blanks
+  (None, '', and the 'nan' older loaders stored) as '', booleans as 0/1,
+  and digit strings without leading zeros, since SQLite gives the STRING
+  columns numeric affinity (contact numbers come back as integers)
+  """
+  if value is None:
+    return ""
+  if hasattr(value, "item"):
+    value = value.item()
+  if isinstance(value, bool):
+    return str(int(value))
+  text = str(value).strip()
+  if text.lower() in BLANK_TEXT:
+    return ""
+  return str(int(text)) if text.isdigit() else text
+
+
+def _comparable_birthday(value):
+  """A birthday as YYYY-MM-DD in any of the stored formats, other text as is"""
+  if isinstance(value, (datetime, date)):
+    return value.strftime("%Y-%m-%d")
+  text = _comparable(value)
+  for birthday_format in BIRTHDAY_FORMATS:
+    try:
+      return datetime.strptime(text, birthday_format).strftime("%Y-%m-%d")
+    except ValueError:
+      pass
+  return text
+
+
+COMPARABLE = {"birthday": _comparable_birthday}
+
+
+def diff(members, existing, update=True, accept=False):
+  """
+  (inserts, updates, accepts): new members, matched members whose profile
+  changed (id plus new values) and ids of matched members to accept
+  """
+  by_email = existing.drop_duplicates("emailKey").set_index("emailKey")["id"]
+  by_srcode = existing[existing["srcodeKey"] != ""].drop_duplicates("srcodeKey").set_index("srcodeKey")["id"]
+  matched_id = members["emailKey"].map(by_email)
+  matched_id = matched_id.fillna(members["srcodeKey"].map(by_srcode).where(members["srcodeKey"] != ""))
+
+  inserts = members[matched_id.isna()]
+  matched = members[matched_id.notna()].assign(id=matched_id[matched_id.notna()].astype(existing["id"].dtype))
+  # a row matched by email and another by Sr-Code can point at one member
+  matched = matched.drop_duplicates("id")
+
+  updates = matched.iloc[0:0]
+  if update and len(matched):
+    stored = existing.set_index("id").loc[matched["id"], PROFILE_COLUMNS]
+    stored.index = matched.index
+    changed = pd.Series(False, index=matched.index)
+    for column in PROFILE_COLUMNS:
+      comparable = COMPARABLE.get(column, _comparable)
+      changed |= matched[column].map(comparable) != stored[column].map(comparable)
+    updates = matched[changed]
+
+  accepts = []
+  if accept and len(matched):
+    state = existing.set_index("id").loc[matched["id"], ["accepted", "active"]]
+    pending = ~(state["accepted"].isin([1, True]) & state["active"].isin([1, True]))
+    accepts = matched["id"][pending.to_numpy()].tolist()
+  return inserts, updates, accepts
+
+
+def _records(frame, columns):
+  """Rows of plain Python values for executemany"""
+  return [
+    tuple(None if value is None else value.item() if hasattr(value, "item") else value for value in row)
+    for row in frame[columns].itertuples(index=False, name=None)
+  ]
+
+
+def apply(conn, cursor, inserts, updates, accepts, accept=False):
+  """Writes the diff in one transaction"""
+  table = quote_identifier('membership')
+  try:
+    if len(inserts):
+      if accept:
+        inserts = inserts.assign(accepted=True)
+      cursor.executemany(convert_placeholders(f"""
+        INSERT INTO {table} ({', '.join(INSERT_COLUMNS)})
+        VALUES ({', '.join(['?'] * len(INSERT_COLUMNS))})
+      """), _records(inserts, INSERT_COLUMNS))
+    if len(updates):
+      assignments = ", ".join(f"{column} = ?" for column in PROFILE_COLUMNS)
+      cursor.executemany(
+        convert_placeholders(f"UPDATE {table} SET {assignments} WHERE id = ?"),
+        _records(updates, PROFILE_COLUMNS + ["id"])
+      )
+    if accepts:
+      cursor.executemany(
+        convert_placeholders(f"UPDATE {table} SET accepted = ?, active = ? WHERE id = ?"),
+        [(True, True, member_id) for member_id in accepts]
+      )
+    if len(inserts) or len(updates) or accepts:
+      # same transaction, so caches never see the import without the new version
+      DataVersion.stage(cursor, "membership", rewrite=bool(len(updates) or accepts))
+    conn.commit()
+  except Exception:
+    conn.rollback()
+    raise
+
+
+def report(sheet_rows, invalid, duplicates, existing_count, inserts, updates, accepts, dry_run):
+  print("=" * 70)
+  print("MEMBER IMPORT" + (" (DRY RUN, nothing written)" if dry_run else ""))
+  print("=" * 70)
+  counts = [
+    ("Rows in sheet", sheet_rows),
+    ("Without email or name", invalid),
+    ("Duplicate applicants", duplicates),
+    ("Members in database", existing_count),
+    ("To insert" if dry_run else "Inserted", len(inserts)),
+    ("To update" if dry_run else "Updated", len(updates)),
+    ("To accept" if dry_run else "Accepted", len(accepts)),
+  ]
+  for label, count in counts:
+    print(f"{label + ':':<28}{count}")
+  if dry_run:
+    for label, frame in (("New", inserts), ("Changed", updates)):
+      for _, member in frame.head(REPORT_SAMPLE).iterrows():
+        print(f"  {label}: {member['fullname']} <{member['email']}>")
+      if len(frame) > REPORT_SAMPLE:
+        print(f"  ... and {len(frame) - REPORT_SAMPLE} more")
+  print("=" * 70)
+
+
+def import_members(path=None, dry_run=False, update=True, accept=False):
+  """Imports the sheet; returns {"inserted", "updated", "accepted"} (what would be written on a dry run)"""
+  path = path or find_sheet()
+  if not path or not os.path.exists(path):
+    raise FileNotFoundError(f"Membership sheet not found in {os.path.abspath(DATA_DIRECTORY)}")
+
+  sheet = pd.read_excel(path)
+  members, invalid, duplicates = normalize(sheet)
+
+  conn, cursor = cursorInstance()
+  try:
+    existing = load_existing(cursor)
+    inserts, updates, accepts = diff(members, existing, update, accept)
+    if not dry_run:
+      apply(conn, cursor, inserts, updates, accepts, accept)
+  finally:
+    conn.close()
+
+  report(len(sheet), invalid, duplicates, len(existing), inserts, updates, accepts, dry_run)
+  return {"inserted": len(inserts), "updated": len(updates), "accepted": len(accepts)}
+
+
+if __name__ == "__main__":
+  arguments = [argument for argument in sys.argv[1:] if not argument.startswith("--")]
+  import_members(
+    arguments[0] if arguments else None,
+    dry_run="--dry-run" in sys.argv,
+    update="--no-update" not in sys.argv,
+    accept="--accept" in sys.argv,
+  )
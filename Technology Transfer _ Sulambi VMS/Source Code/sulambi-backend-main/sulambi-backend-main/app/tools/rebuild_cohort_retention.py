@@ -0,0 +1,155 @@
+"""
+Cohort x semester retention matrix.
+
+A member's cohort is the first semester they joined an event in
+(volunteerParticipationHistory; membership carries no sign-up date), and a
+cohort member is retained in a later semester when they joined an event in
+it. A run recomputes the whole (small) matrix with one aggregate query and
+writes only the cells that changed, so backfilled history or a late
+acceptance updates every cohort it touches, including its size. Each run
+bumps the "cohortRetention" data version, which is_stale() compares with
+the last changes to participation history and membership.
+"""
+import os
+import sys
+from datetime import datetime
+from dotenv import load_dotenv
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, convert_boolean_condition
+from ..modules import DataVersion
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+COLUMNS = [
+  "cohort", "cohortKey", "semester", "semesterKey", "semesterOffset",
+  "cohortSize", "retained", "retentionRate", "calculatedAt",
+]
+
+
+def ensure_table(conn, cursor):
+  table = quote_identifier('cohortRetention')
+  calculated_type = "BIGINT" if is_postgresql else "INTEGER"
+  cursor.execute(
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+      cohort VARCHAR(16) NOT NULL,
+      cohortKey INTEGER NOT NULL,
+      semester VARCHAR(16) NOT NULL,
+      semesterKey INTEGER NOT NULL,
+      semesterOffset INTEGER NOT NULL,
+      cohortSize INTEGER NOT NULL,
+      retained INTEGER NOT NULL,
+      retentionRate REAL NOT NULL,
+      calculatedAt {calculated_type} NOT NULL,
+      PRIMARY KEY (cohortKey, semesterKey)
+    )
+    """
+  )
+  conn.commit()
+
+
+def semester_label(key):
+  return f"{key // 10}-{key % 10}"
+
+
+def semester_offset(cohort_key, semester_key):
+  return (semester_key // 10 - cohort_key // 10) * 2 + (semester_key % 10 - cohort_key % 10)
+
+
+def count_retained(cursor):
+  """{(cohortKey, semesterKey): members}; a cohort's own column is its size"""
+  vph_table = quote_identifier('volunteerParticipationHistory')
+  membership_table = quote_identifier('membership')
+  query = f"""
+    WITH activity AS (
+      SELECT DISTINCT vph.volunteerEmail AS email,
+             vph.semesterYear * 10 + vph.semesterNumber AS semesterKey
+      FROM {vph_table} vph
+      INNER JOIN {membership_table} m ON m.email = vph.volunteerEmail
+      WHERE m.accepted = 1 AND vph.eventsJoined > 0
+    ),
+    cohorts AS (
+      SELECT email, MIN(semesterKey) AS cohortKey FROM activity GROUP BY email
+    )
+    SELECT c.cohortKey, a.semesterKey, COUNT(*)
+    FROM cohorts c
+    INNER JOIN activity a ON a.email = c.email
+    GROUP BY c.cohortKey, a.semesterKey
+  """
+  cursor.execute(convert_boolean_condition(query))
+  return {(cohort_key, semester_key): count for cohort_key, semester_key, count in cursor.fetchall()}
+
+
+def matrix(counts):
+  """{(cohortKey, semesterKey): (cohortSize, retained)}: every cohort gets a cell in each later semester"""
+  sizes = {cohort_key: count for (cohort_key, semester_key), count in counts.items() if cohort_key == semester_key}
+  semesters = sorted({semester_key for _, semester_key in counts})
+  return {
+    (cohort_key, semester_key): (size, counts.get((cohort_key, semester_key), 0))
+    for cohort_key, size in sizes.items()
+    for semester_key in semesters if semester_key >= cohort_key
+  }
+
+
+def rebuild(full=False):
+  """Recomputes the matrix and writes the cells that changed (all of them when full); returns the cohorts written"""
+  conn, cursor = cursorInstance()
+  try:
+    ensure_table(conn, cursor)
+    table = quote_identifier('cohortRetention')
+
+    cells = matrix(count_retained(cursor))
+    stored = {}
+    if not full:
+      cursor.execute(f"SELECT cohortKey, semesterKey, cohortSize, retained FROM {table}")
+      stored = {(cohort_key, semester_key): (size, retained) for cohort_key, semester_key, size, retained in cursor.fetchall()}
+
+    changed = {key: cell for key, cell in cells.items() if stored.get(key) != cell}
+    removed = [key for key in stored if key not in cells]
+
+    calculated_at = int(datetime.now().timestamp() * 1000)
+    rows = [
+      (
+        semester_label(cohort_key), cohort_key, semester_label(semester_key), semester_key,
+        semester_offset(cohort_key, semester_key), size, retained,
+        round(100.0 * retained / size, 1), calculated_at,
+      )
+      for (cohort_key, semester_key), (size, retained) in sorted(changed.items())
+    ]
+
+    if full:
+      cursor.execute(f"DELETE FROM {table}")
+    cursor.executemany(convert_placeholders(f"DELETE FROM {table} WHERE cohortKey = ? AND semesterKey = ?"), removed)
+    updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS if column not in ("cohortKey", "semesterKey"))
+    query = convert_placeholders(f"""
+      INSERT INTO {table} ({", ".join(COLUMNS)})
+      VALUES ({", ".join(["?"] * len(COLUMNS))})
+      ON CONFLICT(cohortKey, semesterKey) DO UPDATE SET {updates}
+    """)
+    cursor.executemany(query, rows)
+    conn.commit()
+    # marks the run, so a run that changed nothing is not repeated
+    DataVersion.bump(conn, cursor, "cohortRetention")
+    return sorted({semester_label(cohort_key) for cohort_key, _ in list(changed) + removed})
+  finally:
+    conn.close()
+
+
+def is_stale(cursor):
+  """True when participation history or membership changed after the matrix was last computed"""
+  vph_table = quote_identifier('volunteerParticipationHistory')
+  calculated = DataVersion.lastBump(cursor, "cohortRetention")
+  if calculated == None:
+    return True
+  cursor.execute(f"SELECT MAX(lastUpdated) FROM {vph_table}")
+  history_updated = cursor.fetchone()[0]
+  # acceptance decides who counts; membership rows carry no timestamp of their own
+  membership_updated = DataVersion.lastBump(cursor, "membership")
+  return any(updated != None and updated > calculated for updated in (history_updated, membership_updated))
+
+
+if __name__ == "__main__":
+  written = rebuild(full="--full" in sys.argv)
+  print(f"✓ cohortRetention rebuilt ({', '.join(written) or 'no cohorts changed'})")
@@ -0,0 +1,160 @@
+"""
+Next-semester forecasts for the per-semester satisfaction and participation
+aggregates, stored in semesterForecasts so requests only read them.
+
+Each run records a signature of its sources (row count and last update of
+semester_satisfaction and volunteerParticipationHistory); forecasts are
+refit only when that signature changes.
+"""
+import json
+import os
+from datetime import datetime
+from dotenv import load_dotenv
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from ..modules import TrendForecast
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+# metric -> (source, bounds)
+METRICS = {
+  "overallSatisfaction": ("semester_satisfaction", (0, 5)),
+  "volunteerSatisfaction": ("semester_satisfaction", (0, 5)),
+  "beneficiarySatisfaction": ("semester_satisfaction", (0, 5)),
+  "totalEvaluations": ("semester_satisfaction", (0, None)),
+  "activeVolunteers": ("volunteerParticipationHistory", (0, None)),
+  "eventsJoined": ("volunteerParticipationHistory", (0, None)),
+  "eventsAttended": ("volunteerParticipationHistory", (0, None)),
+  "attendanceRate": ("volunteerParticipationHistory", (0, 100)),
+}
+
+COLUMNS = [
+  "metric", "source", "semester", "method", "parameters",
+  "forecast", "lower", "upper", "rmse", "history", "lastSemester", "lastValue",
+  "sourceSignature", "calculatedAt",
+]
+
+
+def ensure_table(conn, cursor):
+  table = quote_identifier('semesterForecasts')
+  calculated_type = "BIGINT" if is_postgresql else "INTEGER"
+  cursor.execute(
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+      metric VARCHAR(64) PRIMARY KEY,
+      source VARCHAR(64) NOT NULL,
+      semester VARCHAR(16) NOT NULL,
+      method VARCHAR(16) NOT NULL,
+      parameters TEXT NOT NULL DEFAULT '{{}}',
+      forecast REAL NOT NULL,
+      lower REAL NOT NULL,
+      upper REAL NOT NULL,
+      rmse REAL NOT NULL,
+      history INTEGER NOT NULL,
+      lastSemester VARCHAR(16) NOT NULL,
+      lastValue REAL NOT NULL,
+      sourceSignature TEXT NOT NULL,
+      calculatedAt {calculated_type} NOT NULL
+    )
+    """
+  )
+  conn.commit()
+
+
+def source_signature(cursor):
+  satisfaction_table = quote_identifier('semester_satisfaction')
+  vph_table = quote_identifier('volunteerParticipationHistory')
+  cursor.execute(f"SELECT COUNT(*), MAX({quote_identifier('updatedAt')}) FROM {satisfaction_table}")
+  satisfaction = cursor.fetchone()
+  cursor.execute(f"SELECT COUNT(*), MAX(lastUpdated) FROM {vph_table}")
+  participation = cursor.fetchone()
+  return json.dumps([str(value) for value in satisfaction + participation])
+
+
+def load_series(cursor):
+  """{metric: [(semesterKey, value), ...]} oldest semester first"""
+  satisfaction_table = quote_identifier('semester_satisfaction')
+  vph_table = quote_identifier('volunteerParticipationHistory')
+  series = {metric: [] for metric in METRICS}
+
+  cursor.execute(f"""
+    SELECT year * 10 + semester, overall, volunteers, beneficiaries, {quote_identifier('totalEvaluations')}
+    FROM {satisfaction_table}
+    ORDER BY year, semester
+  """)
+  for key, overall, volunteers, beneficiaries, evaluations in cursor.fetchall():
+    series["overallSatisfaction"].append((key, overall))
+    series["volunteerSatisfaction"].append((key, volunteers))
+    series["beneficiarySatisfaction"].append((key, beneficiaries))
+    series["totalEvaluations"].append((key, evaluations))
+
+  cursor.execute(f"""
+    SELECT semesterYear * 10 + semesterNumber AS semesterKey,
+           COUNT(DISTINCT CASE WHEN eventsJoined > 0 THEN volunteerEmail END),
+           COALESCE(SUM(eventsJoined), 0),
+           COALESCE(SUM(eventsAttended), 0)
+    FROM {vph_table}
+    GROUP BY semesterYear, semesterNumber
+    ORDER BY semesterYear, semesterNumber
+  """)
+  for key, active, joined, attended in cursor.fetchall():
+    series["activeVolunteers"].append((key, active))
+    series["eventsJoined"].append((key, joined))
+    series["eventsAttended"].append((key, attended))
+    series["attendanceRate"].append((key, 100.0 * attended / joined if joined else None))
+  return series
+
+
+def next_semester(key):
+  year, number = divmod(key, 10)
+  return f"{year + 1}-1" if number == 2 else f"{year}-2"
+
+
+def rebuild(force=True):
+  """Refits every metric's forecast; with force=False only when the sources changed. Returns the metrics written"""
+  from .rebuild_semester_satisfaction import ensure_table as ensure_satisfaction_table
+  conn, cursor = cursorInstance()
+  try:
+    ensure_satisfaction_table(conn, cursor)
+    ensure_table(conn, cursor)
+    table = quote_identifier('semesterForecasts')
+    signature = source_signature(cursor)
+    if not force:
+      cursor.execute(f"SELECT MIN(sourceSignature), MAX(sourceSignature), COUNT(*) FROM {table}")
+      lowest, highest, count = cursor.fetchone()
+      if count and lowest == highest == signature:
+        return []
+
+    calculated_at = int(datetime.now().timestamp() * 1000)
+    rows = []
+    for metric, points in load_series(cursor).items():
+      source, (low, high) = METRICS[metric]
+      points = [(key, value) for key, value in points if value != None]
+      result = TrendForecast.forecast([value for _, value in points], (low, high if high != None else float("inf")))
+      if not result:
+        continue
+      last_key = points[-1][0]
+      rows.append((
+        metric, source, next_semester(last_key), result["method"], json.dumps(result["parameters"]),
+        result["forecast"], result["lower"], result["upper"], result["rmse"], result["history"],
+        f"{last_key // 10}-{last_key % 10}", result["lastValue"],
+        signature, calculated_at,
+      ))
+
+    cursor.execute(f"DELETE FROM {table}")
+    query = convert_placeholders(f"""
+      INSERT INTO {table} ({", ".join(COLUMNS)})
+      VALUES ({", ".join(["?"] * len(COLUMNS))})
+    """)
+    cursor.executemany(query, rows)
+    conn.commit()
+    return [row[0] for row in rows]
+  finally:
+    conn.close()
+
+
+if __name__ == "__main__":
+  written = rebuild()
+  print(f"✓ semesterForecasts rebuilt ({len(written)} metrics)")
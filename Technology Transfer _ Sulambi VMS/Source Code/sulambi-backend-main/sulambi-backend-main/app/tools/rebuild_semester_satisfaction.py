@@ -5,6 +5,7 @@ from datetime import datetime
 from dotenv import load_dotenv
 
 from ..database.connection import cursorInstance, quote_identifier, convert_placeholders
+from ..modules.IssueExtractor import defaultExtractor
 
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -122,7 +123,7 @@ def rebuild(year_filter: str | None = None):
   rows = cursor.fetchall()
 
   by_sem = {}
-  issues: dict[str, int] = {}
+  issue_texts: list[tuple] = []
   event_ids_by_sem: dict[str, set[int]] = {}
 
   for row in rows:
@@ -167,11 +168,10 @@ def rebuild(year_filter: str | None = None):
     by_sem[sem_key]["overall"].append(score)
     by_sem[sem_key]["vol"].append(score)
 
-    # Simple issue extraction
-    txt = (comment or "").lower()
-    for kw in ["communication", "schedule", "materials", "support", "venue", "time"]:
-      if kw in txt:
-        issues[kw] = issues.get(kw, 0) + 1
+    if comment:
+      issue_texts.append((("evaluation", eval_id), comment))
+
+  issues = defaultExtractor.countIssues(issue_texts)
 
   # Write back
   for sem_key, data in by_sem.items():
@@ -190,6 +190,20 @@ def rebuild(year_filter: str | None = None):
   conn.commit()
   conn.close()
 
+  # forecasts are precomputed from the rebuilt aggregates
+  try:
+    from .rebuild_semester_forecasts import rebuild as rebuild_forecasts
+    rebuild_forecasts()
+  except Exception as e:
+    print(f"[SEMESTER_SATISFACTION] Failed to rebuild forecasts: {e}")
+
+  # comment sentiment is stored alongside, scored only where text changed
+  try:
+    from .score_comment_sentiment import rebuild as rebuild_sentiment
+    rebuild_sentiment()
+  except Exception as e:
+    print(f"[SEMESTER_SATISFACTION] Failed to score comment sentiment: {e}")
+
 
 if __name__ == "__main__":
   # Rebuild all years by default
@@ -0,0 +1,269 @@
+"""
+Sentiment of the free-text answers (comment, q13, q14, recommendations) of
+finalized evaluations and satisfaction surveys, stored per source row in
+commentSentiment together with the row's event and semester.
+
+A run only scores rows whose text changed (tracked by a hash of the text);
+rows whose event or semester moved are re-labelled with their stored score,
+and rows that disappeared are removed. The satisfaction analytics read
+per-semester and per-event averages from the table with a GROUP BY, so no
+text is processed per request.
+"""
+import hashlib
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, convert_boolean_condition
+from ..modules.SentimentScorer import defaultScorer
+from ..modules import DataVersion
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+# compound scores beyond these count as positive / negative texts
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+SOURCE_TABLES = ["evaluation", "satisfactionSurveys", "requirements", "internalEvents", "externalEvents"]
+
+COLUMNS = [
+  "source", "sourceId", "eventId", "eventType", "semesterKey", "respondentType",
+  "sentiment", "positiveTerms", "negativeTerms", "textHash", "scoredAt",
+]
+
+
+def has_run(cursor):
+  """Whether a scoring run has completed on this database"""
+  return DataVersion.lastBump(cursor, "commentSentiment") != None
+
+
+def ensure_table(conn, cursor):
+  table = quote_identifier('commentSentiment')
+  scored_type = "BIGINT" if is_postgresql else "INTEGER"
+  cursor.execute(
+    f"""
+    CREATE TABLE IF NOT EXISTS {table} (
+      source VARCHAR(16) NOT NULL,
+      sourceId INTEGER NOT NULL,
+      eventId INTEGER,
+      eventType VARCHAR(16),
+      semesterKey INTEGER,
+      respondentType VARCHAR(32),
+      sentiment REAL NOT NULL,
+      positiveTerms INTEGER NOT NULL DEFAULT 0,
+      negativeTerms INTEGER NOT NULL DEFAULT 0,
+      textHash VARCHAR(64) NOT NULL,
+      scoredAt {scored_type} NOT NULL,
+      PRIMARY KEY (source, sourceId)
+    )
+    """
+  )
+  cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_comment_sentiment_event ON {table}(eventType, eventId)")
+  cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_comment_sentiment_semester ON {table}(semesterKey)")
+  conn.commit()
+
+
+def semester_key(timestamp):
+  """year * 10 + semester of a millisecond timestamp, the same split the satisfaction analytics use"""
+  if not timestamp:
+    return None
+  date = datetime.fromtimestamp(timestamp / 1000)
+  return date.year * 10 + math.ceil(date.month / 6)
+
+
+def load_texts(cursor):
+  """{(source, sourceId): (eventId, eventType, semesterKey, respondentType, text)} for rows with any text"""
+  evaluation_table = quote_identifier('evaluation')
+  requirements_table = quote_identifier('requirements')
+  surveys_table = quote_identifier('satisfactionSurveys')
+  internal_table = quote_identifier('internalEvents')
+  external_table = quote_identifier('externalEvents')
+
+  queries = {
+    "evaluation": f"""
+      SELECT e.id, r.eventId, r.type, 'Volunteer', NULL, COALESCE(ei.durationStart, ee.durationStart),
+             e.comment, e.q13, e.q14, e.recommendations
+      FROM {evaluation_table} e
+      INNER JOIN {requirements_table} r ON e.requirementId = r.id
+      LEFT JOIN {internal_table} ei ON r.eventId = ei.id AND r.type = 'internal'
+      LEFT JOIN {external_table} ee ON r.eventId = ee.id AND r.type = 'external'
+      WHERE e.finalized = 1
+    """,
+    "survey": f"""
+      SELECT ss.id, ss.eventId, ss.eventType, ss.respondentType, ss.submittedAt,
+             COALESCE(ei.durationStart, ee.durationStart),
+             ss.comment, ss.q13, ss.q14, ss.recommendations
+      FROM {surveys_table} ss
+      LEFT JOIN {internal_table} ei ON ss.eventId = ei.id AND ss.eventType = 'internal'
+      LEFT JOIN {external_table} ee ON ss.eventId = ee.id AND ss.eventType = 'external'
+      WHERE ss.finalized = 1
+    """,
+  }
+
+  texts = {}
+  for source, query in queries.items():
+    cursor.execute(convert_boolean_condition(query))
+    for source_id, event_id, event_type, respondent_type, submitted_at, event_date, *answers in cursor.fetchall():
+      text = "\n".join(str(answer).strip() for answer in answers if answer and str(answer).strip())
+      if not text:
+        continue
+      # surveys fall back to their submission date, as in the satisfaction analytics
+      key = semester_key(event_date or submitted_at)
+      texts[(source, int(source_id))] = (
+        int(event_id) if event_id != None else None, event_type, key, respondent_type, text
+      )
+  return texts
+
+
+def rebuild(full=False):
+  """Scores new and changed texts (all of them when full); returns the number of rows written"""
+  global _scored_versions
+  versions = DataVersion.current(SOURCE_TABLES)
+  conn, cursor = cursorInstance()
+  try:
+    ensure_table(conn, cursor)
+    table = quote_identifier('commentSentiment')
+    texts = load_texts(cursor)
+
+    stored = {}
+    if not full:
+      cursor.execute(f"""
+        SELECT source, sourceId, textHash, sentiment, positiveTerms, negativeTerms,
+               eventId, eventType, semesterKey, respondentType
+        FROM {table}
+      """)
+      for source, source_id, text_hash, *rest in cursor.fetchall():
+        stored[(source, int(source_id))] = (text_hash, *rest)
+
+    rescore, relabel = [], []
+    for key, (event_id, event_type, semester, respondent_type, text) in texts.items():
+      text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+      previous = stored.get(key)
+      if previous == None or previous[0] != text_hash:
+        rescore.append((key, text_hash, text))
+      elif tuple(previous[4:]) != (event_id, event_type, semester, respondent_type):
+        relabel.append((key, text_hash, previous[1:4]))
+
+    scored_at = int(datetime.now().timestamp() * 1000)
+    rows = []
+    if rescore:
+      scores = defaultScorer.scoreBatch([text for _, _, text in rescore])
+      for index, (key, text_hash, _) in enumerate(rescore):
+        rows.append((key, text_hash, (
+          round(float(scores["compound"][index]), 4), int(scores["positive"][index]), int(scores["negative"][index])
+        )))
+    rows += relabel
+
+    values = [
+      (source, source_id, *texts[(source, source_id)][:4], *score, text_hash, scored_at)
+      for (source, source_id), text_hash, score in rows
+    ]
+    updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[2:])
+    query = convert_placeholders(f"""
+      INSERT INTO {table} ({", ".join(COLUMNS)})
+      VALUES ({", ".join(["?"] * len(COLUMNS))})
+      ON CONFLICT(source, sourceId) DO UPDATE SET {updates}
+    """)
+    cursor.executemany(query, values)
+
+    removed = [key for key in stored if key not in texts]
+    if full:
+      cursor.execute(f"SELECT source, sourceId FROM {table}")
+      removed = [(source, int(source_id)) for source, source_id in cursor.fetchall() if (source, int(source_id)) not in texts]
+    cursor.executemany(convert_placeholders(f"DELETE FROM {table} WHERE source = ? AND sourceId = ?"), removed)
+    conn.commit()
+    # marks the run, so sources without any comment still count as scored
+    DataVersion.bump(conn, cursor, "commentSentiment")
+    _scored_versions = versions
+    return len(values) + len(removed)
+  finally:
+    conn.close()
+
+
+_scoring_lock = threading.Lock()
+_scored_versions = None
+
+def refresh_in_background():
+  """
+  Starts a scoring run when one of the source tables changed since the last
+  run of this process and no run is in progress
+  """
+  versions = DataVersion.current(SOURCE_TABLES)
+  if versions != None and versions == _scored_versions:
+    return False
+  if not _scoring_lock.acquire(blocking=False):
+    return False
+
+  def scoringJob():
+    try:
+      start = time.time()
+      written = rebuild()
+      print(f"[COMMENT SENTIMENT] Wrote {written} rows in {time.time() - start:.2f}s")
+    except Exception as e:
+      print(f"[COMMENT SENTIMENT] Scoring failed: {e}")
+    finally:
+      _scoring_lock.release()
+
+  th = threading.Thread(target=scoringJob)
+  th.daemon = True
+  th.start()
+  return True
+
+
+def _summary(count, average, positive, negative):
+  return {
+    "sentiment": round(float(average), 3) if average != None else None,
+    "commentCount": int(count),
+    "positiveShare": round(100.0 * positive / count, 1) if count else 0,
+    "negativeShare": round(100.0 * negative / count, 1) if count else 0,
+  }
+
+
+def _aggregates():
+  return f"""
+    COUNT(*), AVG(sentiment),
+    SUM(CASE WHEN sentiment >= {POSITIVE_THRESHOLD} THEN 1 ELSE 0 END),
+    SUM(CASE WHEN sentiment <= {NEGATIVE_THRESHOLD} THEN 1 ELSE 0 END)
+  """
+
+
+def semester_sentiment(cursor, year=None):
+  """{"YYYY-S": summary} for every semester with scored comments, optionally one year"""
+  table = quote_identifier('commentSentiment')
+  where, params = "WHERE semesterKey IS NOT NULL", ()
+  if year:
+    where += " AND semesterKey BETWEEN ? AND ?"
+    params = (int(year) * 10 + 1, int(year) * 10 + 2)
+  cursor.execute(convert_placeholders(f"""
+    SELECT semesterKey, {_aggregates()}
+    FROM {table}
+    {where}
+    GROUP BY semesterKey
+  """), params)
+  return {
+    f"{key // 10}-{key % 10}": _summary(count, average, positive, negative)
+    for key, count, average, positive, negative in cursor.fetchall()
+  }
+
+
+def event_sentiment(cursor, event_id, event_type):
+  """Summary of one event's scored comments"""
+  table = quote_identifier('commentSentiment')
+  cursor.execute(convert_placeholders(f"""
+    SELECT {_aggregates()}
+    FROM {table}
+    WHERE eventId = ? AND eventType = ?
+  """), (int(event_id), event_type))
+  count, average, positive, negative = cursor.fetchone()
+  return _summary(count or 0, average, positive or 0, negative or 0)
+
+
+if __name__ == "__main__":
+  written = rebuild(full="--full" in sys.argv)
+  print(f"✓ commentSentiment updated ({written} rows written)")
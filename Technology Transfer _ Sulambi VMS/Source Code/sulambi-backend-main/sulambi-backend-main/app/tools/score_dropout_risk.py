@@ -0,0 +1,222 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+
+from ..database.connection import cursorInstance, quote_identifier, convert_placeholders, convert_boolean_condition
+from ..modules import DataVersion
+
+load_dotenv()
+DATABASE_URL = os.getenv("DATABASE_URL")
+is_postgresql = DATABASE_URL and DATABASE_URL.startswith('postgresql://')
+
+# Scores older than this are refreshed in the background on the next read
+SCORING_MAX_AGE_MS = int(os.getenv("DROPOUT_SCORING_MAX_AGE", 60 * 60)) * 1000
+AT_RISK_THRESHOLD = 50
+MS_PER_DAY = 1000 * 60 * 60 * 24
+
+COLUMNS = [
+  "membershipId", "volunteerEmail", "volunteerName",
+  "totalEventsAttended", "eventsJoined", "semestersActive", "averageEventsPerSemester",
+  "lastEventDate", "daysSinceLastEvent",
+  "riskScore", "riskLevel", "riskFactors",
+  "participationRate", "retentionProbability",
+  "semester", "calculatedAt", "isAtRisk", "interventionNeeded",
+]
+
+
+def ensure_table(conn, cursor):
+  """Adds the columns and index the batch scorer needs to databases created before it"""
+  table = quote_identifier('dropoutRiskAssessment')
+  for column in ("eventsJoined", "semestersActive"):
+    try:
+      if is_postgresql:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} INTEGER DEFAULT 0")
+      else:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER DEFAULT 0")
+      conn.commit()
+    except Exception:
+      # SQLite has no ADD COLUMN IF NOT EXISTS; the column is already there
+      conn.rollback()
+  cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_dropout_risk_score ON {table}(riskScore)")
+  conn.commit()
+
+
+def load_features(cursor):
+  """One aggregate row per active member, as columns ready for vectorized scoring"""
+  membership_table = quote_identifier('membership')
+  vph_table = quote_identifier('volunteerParticipationHistory')
+  query = f"""
+    SELECT
+      m.id,
+      m.email,
+      m.fullname,
+      COALESCE(MAX(vph.lastEventDate), 0) as most_recent_date,
+      COALESCE(SUM(vph.eventsJoined), 0) as total_joined,
+      COALESCE(SUM(vph.eventsAttended), 0) as total_attended,
+      COALESCE(AVG(vph.attendanceRate), 0) as avg_attendance_rate,
+      COALESCE(COUNT(DISTINCT vph.semester), 0) as semesters_active
+    FROM {membership_table} m
+    LEFT JOIN {vph_table} vph ON m.email = vph.volunteerEmail
+    WHERE m.accepted = 1 AND m.active = 1
+    GROUP BY m.id, m.email, m.fullname
+  """
+  cursor.execute(convert_boolean_condition(query))
+  rows = cursor.fetchall()
+
+  ids, emails, names, recent, joined, attended, rates, semesters = zip(*rows) if rows else ([],) * 8
+
+  number = lambda values: np.array([float(value or 0) for value in values], dtype=float)
+  return {
+    "id": list(ids), "email": list(emails), "name": list(names),
+    "most_recent_date": number(recent),
+    "total_joined": number(joined),
+    "total_attended": number(attended),
+    "attendance_rate": number(rates),
+    "semesters_active": number(semesters),
+  }
+
+
+def score_features(features, current_time_ms):
+  """
+  Vectorized form of the rule-based dropout scorer: returns risk scores
+  (0-100) and inactivity days for every member at once.
+  """
+  joined = features["total_joined"]
+  attended = features["total_attended"]
+  rate = features["attendance_rate"]
+  recent = features["most_recent_date"]
+  semesters = features["semesters_active"]
+
+  never = (joined == 0) & (attended == 0)
+  # members who never participated are treated as a year inactive
+  inactivity = np.where(recent > 0, np.trunc((current_time_ms - recent) / MS_PER_DAY), np.where(never, 365, 0))
+
+  participation = (
+    np.select([rate < 50, rate < 70, rate < 85], [40, 25, 10], 0)
+    # joined but never submitted a finalized evaluation form
+    + np.select([(attended == 0) & (joined > 0), attended < 2], [50, 10], 0)
+  )
+  risk = np.where(never, 50, participation)
+  risk = risk + np.select([inactivity > 90, inactivity > 60, inactivity > 30], [40, 25, 15], 0)
+  risk = risk + np.select([semesters == 1, semesters == 0], [10, 20], 0)
+  return np.minimum(100, risk).astype(int), inactivity.astype(int)
+
+
+def risk_factors(features, inactivity):
+  """Short reasons behind each member's score"""
+  factors = [[] for _ in features["id"]]
+  checks = [
+    ((features["total_joined"] == 0) & (features["total_attended"] == 0), "Never participated"),
+    ((features["total_attended"] == 0) & (features["total_joined"] > 0), "Joined events without attending"),
+    ((features["total_joined"] > 0) & (features["attendance_rate"] < 50), "Low attendance rate"),
+    (inactivity > 90, "Inactive for over 90 days"),
+    (features["semesters_active"] <= 1, "Active in at most one semester"),
+  ]
+  for mask, reason in checks:
+    for index in np.flatnonzero(mask):
+      factors[index].append(reason)
+  return factors
+
+
+def retention_probabilities(features, risk, current_time_ms):
+  """Retention from the warm-loaded dropout model when available, otherwise from the rule score"""
+  from ..modules.AnalyticsEngine import get_engine
+  from ..modules import FeatureStore
+  engine = get_engine()
+  if engine and 'volunteer_dropout' in engine.models:
+    try:
+      # score on the same feature rows the model was trained on
+      matrix = FeatureStore.memberFeatures(features["id"], datetime.fromtimestamp(current_time_ms / 1000))
+      matrix = matrix.set_index("membershipId").reindex(features["id"])
+      volunteers = matrix.astype(object).where(matrix.notna(), None).to_dict("records")
+      return np.round(100 * (1 - engine.predict_volunteer_dropout_risk_batch(volunteers)), 1)
+    except Exception as e:
+      print(f"[DROPOUT SCORING] Model scoring failed, using rule scores: {e}")
+  return (100 - risk).astype(float)
+
+
+def rebuild():
+  """Scores every active member and replaces the contents of dropoutRiskAssessment"""
+  conn, cursor = cursorInstance()
+  try:
+    ensure_table(conn, cursor)
+
+    current_time_ms = int(datetime.now().timestamp() * 1000)
+    features = load_features(cursor)
+    risk, inactivity = score_features(features, current_time_ms)
+    factors = risk_factors(features, inactivity)
+    retention = retention_probabilities(features, risk, current_time_ms)
+
+    attended = features["total_attended"]
+    semesters = features["semesters_active"]
+    average_per_semester = np.round(np.divide(attended, semesters, out=np.zeros_like(attended), where=semesters > 0), 1)
+    levels = np.select([risk >= 70, risk >= AT_RISK_THRESHOLD], ["High", "Medium"], "Low")
+    now = datetime.now()
+    semester = f"{now.year}-{1 if now.month <= 6 else 2}"
+
+    rows = []
+    for index in range(len(features["id"])):
+      last_event = int(features["most_recent_date"][index])
+      rows.append((
+        features["id"][index], features["email"][index], features["name"][index] or "",
+        int(attended[index]), int(features["total_joined"][index]), int(semesters[index]),
+        float(average_per_semester[index]),
+        last_event if last_event > 0 else None, int(inactivity[index]),
+        int(risk[index]), str(levels[index]), json.dumps(factors[index]),
+        round(float(features["attendance_rate"][index]), 1), float(retention[index]),
+        semester, current_time_ms,
+        bool(risk[index] >= AT_RISK_THRESHOLD), bool(risk[index] >= 70),
+      ))
+
+    # replace the previous run in one transaction so readers never see a partial batch
+    table = quote_identifier('dropoutRiskAssessment')
+    cursor.execute(f"DELETE FROM {table}")
+    query = convert_placeholders(f"""
+      INSERT INTO {table} ({", ".join(COLUMNS)})
+      VALUES ({", ".join(["?"] * len(COLUMNS))})
+    """)
+    cursor.executemany(query, rows)
+    conn.commit()
+    # marks the run, so an empty result still counts as scored
+    DataVersion.bump(conn, cursor, "dropoutRiskAssessment")
+    return len(rows)
+  finally:
+    conn.close()
+
+
+def latest_scoring_time(cursor):
+  """Time (ms) of the last completed run, None before the first one"""
+  return DataVersion.lastBump(cursor, "dropoutRiskAssessment")
+
+
+_scoring_lock = threading.Lock()
+
+def rebuild_in_background():
+  """Starts a rescoring run unless one is already in progress"""
+  if not _scoring_lock.acquire(blocking=False):
+    return False
+
+  def scoringJob():
+    try:
+      start = time.time()
+      scored = rebuild()
+      print(f"[DROPOUT SCORING] Scored {scored} members in {time.time() - start:.2f}s")
+    except Exception as e:
+      print(f"[DROPOUT SCORING] Batch scoring failed: {e}")
+    finally:
+      _scoring_lock.release()
+
+  th = threading.Thread(target=scoringJob)
+  th.daemon = True
+  th.start()
+  return True
+
+
+if __name__ == "__main__":
+  scored = rebuild()
+  print(f"✓ dropoutRiskAssessment rebuilt ({scored} members scored)")
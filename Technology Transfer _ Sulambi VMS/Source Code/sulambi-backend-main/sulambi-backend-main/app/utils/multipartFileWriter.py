@@ -1,15 +1,35 @@
 from flask import request
 from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 import os
+import io
+import json
+import threading
 from dotenv import load_dotenv
 import cloudinary
 import cloudinary.uploader
+import cloudinary.utils
+import urllib3
+from werkzeug.datastructures import FileStorage
 from werkzeug.exceptions import BadRequest
+from ..modules import ContentStore
 
 load_dotenv()
 
 BASIC_WRITER_PATH = "uploads"
 
+# Uploads of one request run concurrently on a pool shared by all requests,
+# over one pooled HTTP client, so connections to Cloudinary are reused
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", 4))
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", 60))
+UPLOAD_CONNECT_TIMEOUT = 10
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+_uploadPool = ThreadPoolExecutor(max_workers=UPLOAD_MAX_WORKERS, thread_name_prefix="upload")
+_uploadHttp = urllib3.PoolManager(maxsize=UPLOAD_MAX_WORKERS, retries=False)
+_cloudinarySettings = None
+_cloudinaryLock = threading.Lock()
+
 # Allowed file extensions for requirements documents
 ALLOWED_EXTENSIONS = {
     'pdf',
@@ -43,6 +63,170 @@ def is_allowed_file(filename: str, content_type: str) -> bool:
     
     return True
 
+def configureCloudinary() -> bool:
+    """
+    Applies the Cloudinary environment settings, only when they changed since
+    the last call. Returns False when they are incomplete.
+    CLOUDINARY_UPLOAD_PREFIX points uploads at another API host (e.g. a local
+    stub server for testing).
+    """
+    global _cloudinarySettings
+    settings = (
+        os.getenv("CLOUDINARY_CLOUD_NAME"),
+        os.getenv("CLOUDINARY_API_KEY"),
+        os.getenv("CLOUDINARY_API_SECRET"),
+        os.getenv("CLOUDINARY_UPLOAD_PREFIX"),
+    )
+    with _cloudinaryLock:
+        if settings != _cloudinarySettings:
+            cloudName, apiKey, apiSecret, uploadPrefix = settings
+            options = {"cloud_name": cloudName, "api_key": apiKey, "api_secret": apiSecret}
+            if uploadPrefix:
+                options["upload_prefix"] = uploadPrefix
+            cloudinary.config(**options)
+            _cloudinarySettings = settings
+    return all(settings[:3])
+
+def requireCloudinary():
+    """Raises BadRequest unless Cloudinary is configured"""
+    if not configureCloudinary():
+        error_msg = (
+            "Cloudinary configuration is missing. "
+            "All file uploads must use Cloudinary. "
+            "Please set CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, and CLOUDINARY_API_SECRET environment variables. "
+            "Local file storage is disabled for security and scalability."
+        )
+        print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {error_msg}")
+        raise BadRequest(error_msg)
+    
+    print(f"[CLOUDINARY_UPLOAD] ✅ Cloudinary configured. Cloud: {os.getenv('CLOUDINARY_CLOUD_NAME')}")
+
+def _multipartParts(fields: list[tuple], file, boundary: str):
+    """Encoded form fields, the file part header and the closing boundary"""
+    fieldParts = b"".join(
+        (
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+            f"{value}\r\n"
+        ).encode("utf-8")
+        for name, value in fields
+    )
+    filename = file.filename.replace('"', "")
+    fileHeader = (
+        f"--{boundary}\r\n"
+        f"Content-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: {file.content_type or 'application/octet-stream'}\r\n\r\n"
+    ).encode("utf-8")
+    closing = f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return fieldParts + fileHeader, closing
+
+def _streamSize(stream):
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell() - position
+        stream.seek(position)
+        return size
+    except Exception:
+        return None
+
+def uploadToCloudinary(file, folder: str, publicId: str, timeout: float = UPLOAD_TIMEOUT) -> str:
+    """
+    Signed upload of one werkzeug FileStorage to the Cloudinary Upload API.
+    The multipart body is streamed from the file in chunks instead of being
+    read into memory first. Returns the delivered URL.
+    """
+    params = cloudinary.utils.cleanup_params({
+        "timestamp": cloudinary.utils.now(),
+        "folder": folder,
+        "public_id": publicId,
+        "overwrite": False,
+        "use_filename": False,
+        "unique_filename": True,
+    })
+    params = cloudinary.utils.sign_request(params, {})
+    url = cloudinary.utils.cloudinary_api_url("upload", resource_type="auto")
+
+    boundary = uuid4().hex
+    head, closing = _multipartParts(list(params.items()), file, boundary)
+    stream = file.stream
+    size = _streamSize(stream)
+
+    def body():
+        yield head
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        yield closing
+
+    headers = {
+        "Content-Type": f"multipart/form-data; boundary={boundary}",
+        "User-Agent": cloudinary.get_user_agent(),
+    }
+    if size != None:
+        headers["Content-Length"] = str(len(head) + size + len(closing))
+
+    response = _uploadHttp.request(
+        "POST", url,
+        body=body(),
+        headers=headers,
+        chunked=size == None,
+        timeout=urllib3.Timeout(connect=UPLOAD_CONNECT_TIMEOUT, read=timeout),
+    )
+    try:
+        result = json.loads(response.data.decode("utf-8"))
+    except Exception:
+        raise Exception(f"Unexpected upload response ({response.status}): {response.data[:200]!r}")
+    if "error" in result:
+        raise Exception(result["error"].get("message", "Upload rejected"))
+
+    uploadedUrl = result.get('secure_url') or result.get('url')
+    if not uploadedUrl:
+        raise Exception("Cloudinary upload succeeded but no URL was returned")
+    if not uploadedUrl.startswith('http://') and not uploadedUrl.startswith('https://'):
+        raise Exception(f"Invalid Cloudinary URL format: {uploadedUrl}")
+    return uploadedUrl
+
+def _detach(file) -> FileStorage:
+    """
+    Takes a request file's stream away from the request, so an upload still
+    running after a timeout never reads a stream closed at teardown. The
+    form parser already wrote the part to a spooled temporary file while
+    parsing; that file is handed over as it is, without another copy.
+    """
+    stream = file.stream
+    # the request now closes an empty placeholder instead
+    file.stream = io.BytesIO()
+    stream.seek(0)
+    return FileStorage(stream=stream, filename=file.filename, content_type=file.content_type)
+
+def _uploadDetached(file, folder: str, publicId: str) -> str:
+    try:
+        return uploadToCloudinary(file, folder, publicId)
+    finally:
+        file.stream.close()
+
+def _discardLateUpload(folder: str, publicId: str):
+    """
+    Done-callback for an upload the request gave up on: a running upload
+    cannot be cancelled, so the asset it creates anyway is deleted
+    """
+    assetId = f"{folder}/{publicId}"
+    def discard(future):
+        if future.cancelled() or future.exception() != None:
+            return
+        uploadedUrl = future.result()
+        # delivery URLs look like .../<resource type>/upload/...
+        resourceType = uploadedUrl.split("/upload/", 1)[0].rsplit("/", 1)[-1]
+        try:
+            cloudinary.uploader.destroy(assetId, resource_type=resourceType, invalidate=True)
+            print(f"[CLOUDINARY_UPLOAD] Deleted late upload {assetId}")
+        except Exception as e:
+            print(f"[CLOUDINARY_UPLOAD] ❌ Orphaned upload {assetId} ({uploadedUrl}) needs cleanup: {e}")
+    return discard
+
 def cloudinaryFileWriter(keys: list[str], folder: str = "requirements"):
     """
     Upload files to Cloudinary with validation.
@@ -51,6 +235,9 @@ def cloudinaryFileWriter(keys: list[str], folder: str = "requirements"):
     REQUIRES Cloudinary configuration - will NOT fall back to local storage.
     All files MUST be uploaded to Cloudinary.
     
+    The files of one request are validated first and then uploaded
+    concurrently, each with its own timeout (UPLOAD_TIMEOUT seconds).
+    
     Args:
         keys: List of file field names to process
         folder: Cloudinary folder to store files in (default: "requirements")
@@ -64,30 +251,10 @@ def cloudinaryFileWriter(keys: list[str], folder: str = "requirements"):
     keyPaths = {}
     filenames = list(request.files)
     
-    # Configure Cloudinary
-    cloudinary.config(
-        cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-        api_key=os.getenv("CLOUDINARY_API_KEY"),
-        api_secret=os.getenv("CLOUDINARY_API_SECRET")
-    )
-    
     # STRICT: Check if Cloudinary is configured - NO FALLBACK TO LOCAL STORAGE
-    cloudinary_cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
-    cloudinary_api_key = os.getenv("CLOUDINARY_API_KEY")
-    cloudinary_api_secret = os.getenv("CLOUDINARY_API_SECRET")
-    
-    if not all([cloudinary_cloud_name, cloudinary_api_key, cloudinary_api_secret]):
-        error_msg = (
-            "Cloudinary configuration is missing. "
-            "All file uploads must use Cloudinary. "
-            "Please set CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, and CLOUDINARY_API_SECRET environment variables. "
-            "Local file storage is disabled for security and scalability."
-        )
-        print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {error_msg}")
-        raise BadRequest(error_msg)
-    
-    print(f"[CLOUDINARY_UPLOAD] ✅ Cloudinary configured. Cloud: {cloudinary_cloud_name}")
+    requireCloudinary()
     
+    files = {}
     for k in filenames:
         if k not in keys:
             continue
@@ -104,44 +271,79 @@ def cloudinaryFileWriter(keys: list[str], folder: str = "requirements"):
                 f"File '{file.filename}' is not allowed. "
                 f"Only PDF and image files (jpg, jpeg, png, gif, bmp, webp, svg, ico, tiff) are allowed."
             )
-        
+        files[k] = file
+    
+    # Upload every file at once - NO FALLBACK TO LOCAL STORAGE
+    uploads = {}
+    publicIds = {}
+    for k, file in files.items():
+        # Generate unique filename
+        unique_filename = f"{str(uuid4())}_{file.filename}"
+        publicIds[k] = unique_filename.rsplit('.', 1)[0]  # Remove extension for public_id
+        print(f"[CLOUDINARY_UPLOAD] Uploading {k}: {file.filename} to Cloudinary folder '{folder}'...")
+        uploads[k] = _uploadPool.submit(_uploadDetached, _detach(file), folder, publicIds[k])
+    
+    errors = []
+    for k, future in uploads.items():
+        file = files[k]
         try:
-            # Generate unique filename
-            unique_filename = f"{str(uuid4())}_{file.filename}"
-            
-            print(f"[CLOUDINARY_UPLOAD] Uploading {k}: {file.filename} to Cloudinary folder '{folder}'...")
-            
-            # Upload to Cloudinary - NO FALLBACK TO LOCAL STORAGE
-            result = cloudinary.uploader.upload(
-                file,
-                folder=folder,
-                public_id=unique_filename.rsplit('.', 1)[0],  # Remove extension for public_id
-                resource_type="auto",  # Auto-detect resource type (image, pdf, etc.)
-                overwrite=False,
-                use_filename=False,
-                unique_filename=True
-            )
-            
-            # Store the secure URL (or regular URL if secure is not available)
-            cloudinary_url = result.get('secure_url') or result.get('url')
-            
-            if not cloudinary_url:
-                raise Exception("Cloudinary upload succeeded but no URL was returned")
-            
-            # Verify it's a Cloudinary URL (not a local path)
-            if not cloudinary_url.startswith('http://') and not cloudinary_url.startswith('https://'):
-                raise Exception(f"Invalid Cloudinary URL format: {cloudinary_url}")
-            
+            # queueing behind other requests' uploads counts toward the timeout too
+            cloudinary_url = future.result(timeout=UPLOAD_TIMEOUT + UPLOAD_CONNECT_TIMEOUT)
             keyPaths[k] = cloudinary_url
-            
             print(f"[CLOUDINARY_UPLOAD] ✅ Successfully uploaded {k}: {file.filename}")
             print(f"[CLOUDINARY_UPLOAD]    URL: {cloudinary_url[:80]}...")
-            
+        except FutureTimeoutError:
+            if not future.cancel():
+                # already uploading: delete the asset once it lands
+                print(f"[CLOUDINARY_UPLOAD] Upload of {folder}/{publicIds[k]} timed out while running")
+                future.add_done_callback(_discardLateUpload(folder, publicIds[k]))
+            errors.append(f"Failed to upload file '{file.filename}' to Cloudinary: timed out")
         except Exception as e:
-            error_msg = f"Failed to upload file '{file.filename}' to Cloudinary: {str(e)}"
-            print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {error_msg}")
-            print(f"[CLOUDINARY_UPLOAD] ❌ Local storage fallback is disabled. Upload must succeed in Cloudinary.")
-            raise BadRequest(error_msg)
+            errors.append(f"Failed to upload file '{file.filename}' to Cloudinary: {str(e)}")
+    
+    if errors:
+        error_msg = "; ".join(errors)
+        print(f"[CLOUDINARY_UPLOAD] ❌ ERROR: {error_msg}")
+        print(f"[CLOUDINARY_UPLOAD] ❌ Local storage fallback is disabled. Upload must succeed in Cloudinary.")
+        raise BadRequest(error_msg)
+    
+    return keyPaths
+
+def spooledFileWriter(keys: list[str], spoolPath: str):
+    """
+    Validates the given file fields like cloudinaryFileWriter and saves them
+    to local spool storage for a later upload to Cloudinary.
+    
+    Returns:
+        dict: file key -> {"path", "filename", "contentType"}
+    
+    Raises:
+        BadRequest: If Cloudinary is not configured or a file type is not allowed
+    """
+    # fail now rather than queue uploads that can never succeed
+    requireCloudinary()
+    
+    files = {}
+    for k in list(request.files):
+        if k not in keys:
+            continue
+        file = request.files.get(k)
+        if file is None or file.filename == "":
+            continue
+        if not is_allowed_file(file.filename, file.content_type):
+            raise BadRequest(
+                f"File '{file.filename}' is not allowed. "
+                f"Only PDF and image files (jpg, jpeg, png, gif, bmp, webp, svg, ico, tiff) are allowed."
+            )
+        files[k] = file
+    
+    os.makedirs(spoolPath, exist_ok=True)
+    keyPaths = {}
+    for k, file in files.items():
+        # spooled under a random name; the original name travels separately
+        fwpath = os.path.join(spoolPath, uuid4().hex)
+        file.save(fwpath)
+        keyPaths[k] = {"path": fwpath, "filename": file.filename, "contentType": file.content_type}
     
     return keyPaths
 
@@ -149,6 +351,9 @@ def basicFileWriter(keys: list[str]):
     """
     Legacy function for local file storage.
     Kept for backward compatibility, but consider using cloudinaryFileWriter for production.
+    
+    Files go to the content-addressed ContentStore; every returned path holds
+    a reference that must be given back with ContentStore.release().
     """
     keyPaths = {}
     filenames = list(request.files)
@@ -158,9 +363,7 @@ def basicFileWriter(keys: list[str]):
         if (file == None): continue
         if (file.filename == ""): continue
 
-        # generate unique filenames to prevent overwrites
-        fwpath = os.path.join(BASIC_WRITER_PATH, str(uuid4()) + file.filename)
-        file.save(fwpath)
-        keyPaths[k] = fwpath
+        # stored by content hash, so re-uploaded files share one copy
+        keyPaths[k] = ContentStore.store(file.stream, file.filename)
 
     return keyPaths
\ No newline at end of file
@@ -1,7 +1,5 @@
-import requests as re
-import pandas as pd
-import json
 import os
+import sys
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -41,85 +39,10 @@ if not excel_file_to_use:
     print(f"\nPlease ensure the Excel file exists in the 'data' folder.")
     exit(1)
 
-print(f"✓ Reading Excel file: {excel_file_to_use}")
-loadData = pd.read_excel(excel_file_to_use)
-# print(list(loadData.columns))
-# columns = ['Email Address', "I'm applying as", 'Do you have any prior volunteerism experience?',
-# 'How much time can you devote for volunteering activities on weekdays?', 
-# 'How much time can you devote for volunteering activities on weekends?',
-# 'What areas or interests do you want to volunteer in? Check the area(s) that interest you. ',
-# '1. What volunteering activities of Sulambi VOSA last Academic Year did you join?',
-# '2. What volunteering activities did you join outside Sulambi VOSA and/or the University?',
-# '2.1 Upload proof for the volunteering activities you joined outside(e.g. Pictures, Certificate)',
-# 'Why do you want to become a member?', 'What can you contribute to the organization?',
-# 'Name (Last Name, First Name, Middle Initial)', 'Gsuite Email', 'Sr-Code', 'Age', 'Birthday', 'Sex', 'Campus', 'College/Department',
-# 'Year Level & Program', 'Address', 'Contact Number', 'Facebook Link', 'Blood Type', 'Blood Donation',
-# 'Do you have any existing medical condition/s? If yes, please specify. If none, type N/A.',
-# 'Payment Options', 'What areas or interests do you want to volunteer in? Check the area(s) that interest you.']
-# Outreach (Medical mission, Dental mission, Optical mission, Blood donation, Visit to orphanages, Visit to prison camps, Visit to rehabilitation center, Relief operation, Gift-giving activity, Sports and Recreation)
-# dataFormat = {
-#   "applyyingAs",
-#   "volunterismExperience",
-#   "weekdaysTimeDevotion",
-#   "weekendsTimeDevotion",
-#   "fullname",
-#   "email",
-#   "affiliation",
-#   "srcode",
-#   "age",
-#   "birthday",
-#   "sex",
-#   "campus",
-#   "collegeDept",
-#   "yrlevelprogram",
-#   "address",
-#   "contactNum",
-#   "fblink",
-#   "bloodType",
-#   "bloodDonation",
-#   "paymentOption",
-#   "username",
-#   "areasOfInterest",
-#   "password"
-# }
-
-API_ENDPOINT = "http://localhost:8000/api/auth/register"
-
-def insertData(data):
-  response = re.post(API_ENDPOINT, json=data, headers={'Content-Type': 'application/json'})
-  if (response.status_code != 200):
-    print("[Response] Status Code: ", response.status_code)
-    print("[Response] Raw Response: ", response.text)
+# Imports through the batched importer (one transaction) instead of one
+# /api/auth/register request per row; pass --dry-run to only see the report
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "..", ".."))
+from app.tools.import_members import import_members
 
-for index, data in loadData.iterrows():
-  if (index == 0): continue
-  areaOfInterest = data["What areas or interests do you want to volunteer in? Check the area(s) that interest you. "]
-
-  dataFormat = {
-    "applyingAs": data["I'm applying as"],
-    "volunterismExperience": data["Do you have any prior volunteerism experience?"].lower(),
-    "weekdaysTimeDevotion": data["How much time can you devote for volunteering activities on weekdays?"],
-    "weekendsTimeDevotion": data["How much time can you devote for volunteering activities on weekends?"],
-    "fullname": data["Name (Last Name, First Name, Middle Initial)"],
-    "email": data["Email Address"],
-    "affiliation": "Batangas State University",
-    "srcode": data["Sr-Code"],
-    "age": data["Age"],
-    "birthday": data["Birthday"] if type(data["Birthday"]) is str else data["Birthday"].strftime("%B, %d %Y"),
-    "sex": data["Sex"],
-    "campus": data["Campus"],
-    "collegeDept": data["College/Department"],
-    "yrlevelprogram": data["Year Level & Program"],
-    "address": data["Address"],
-    "contactNum": data["Contact Number"],
-    "fblink": data["Facebook Link"],
-    "bloodType": data["Blood Type"],
-    "bloodDonation": data["Blood Donation"],
-    "paymentOption": data["Payment Options"],
-    "username": data["Name (Last Name, First Name, Middle Initial)"].split(" ")[0].replace(" ", "").replace(",", "") + str(index),
-    "areasOfInterest": json.dumps(areaOfInterest.split(", ") if type(areaOfInterest) is str else []),
-    "password": "password"
-  }
-
-  # print("[+] Registering: ", dataFormat["username"], ":", dataFormat["password"])
-  insertData(dataFormat)
\ No newline at end of file
+print(f"✓ Reading Excel file: {excel_file_to_use}")
+import_members(excel_file_to_use, dry_run="--dry-run" in sys.argv, update=False)
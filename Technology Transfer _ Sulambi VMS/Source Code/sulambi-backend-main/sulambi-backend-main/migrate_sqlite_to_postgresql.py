@@ -3,12 +3,26 @@
 """
 Migrate data from SQLite database to PostgreSQL database
 Run this script locally with DATABASE_URL pointing to your Render PostgreSQL database
+
+Rows are streamed from SQLite in chunks and loaded with COPY FROM STDIN
+(falling back to execute_values, then to row-by-row inserts). Tables that do
+not reference each other are migrated in parallel, sequences are reset once
+at the end and every table is verified by row count and checksum.
+
+Options:
+    --chunk-rows=N   rows read and loaded per chunk (MIGRATION_CHUNK_ROWS, default 5000)
+    --workers=N      tables migrated at the same time (MIGRATION_WORKERS, default 4)
 """
 
 import sqlite3
 import os
 import sys
 import io
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
 
 # Fix Windows console encoding
 if sys.platform == 'win32':
@@ -24,6 +38,18 @@ DB_PATH = os.getenv("DB_PATH", "app/database/database.db")
 if not os.path.isabs(DB_PATH):
     DB_PATH = os.path.join(os.path.dirname(__file__), DB_PATH)
 
+CHUNK_ROWS = int(os.getenv("MIGRATION_CHUNK_ROWS", 5000))
+MIGRATION_WORKERS = int(os.getenv("MIGRATION_WORKERS", 4))
+for arg in sys.argv[1:]:
+    if arg.startswith("--chunk-rows="):
+        CHUNK_ROWS = int(arg.split("=", 1)[1])
+    elif arg.startswith("--workers="):
+        MIGRATION_WORKERS = int(arg.split("=", 1)[1])
+CHUNK_ROWS = max(CHUNK_ROWS, 1)
+MIGRATION_WORKERS = max(MIGRATION_WORKERS, 1)
+COPY_BUFFER_SIZE = 1024 * 1024
+CHECKSUM_MODULUS = 2 ** 64
+
 # PostgreSQL connection from DATABASE_URL
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -46,6 +72,7 @@ print(f"Target (PostgreSQL): {DATABASE_URL.split('@')[1] if '@' in DATABASE_URL
 # Parse PostgreSQL URL
 try:
     import psycopg2
+    from psycopg2.extras import execute_values
     result = urlparse(DATABASE_URL)
     
     # Extract connection parameters
@@ -58,29 +85,29 @@ try:
     print(f"Connecting to: {db_host}:{db_port}/{db_name}", flush=True)
     print(f"User: {db_user}", flush=True)
     
-    # Try to connect with retry
-    import time
-    max_retries = 3
-    for attempt in range(max_retries):
-        try:
-            pg_conn = psycopg2.connect(
-                database=db_name,
-                user=db_user,
-                password=db_password,
-                host=db_host,
-                port=db_port,
-                connect_timeout=10,
-                options='-c statement_timeout=300000'  # 5 minute timeout for queries
-            )
-            pg_cursor = pg_conn.cursor()
-            print("✓ Connected to PostgreSQL database", flush=True)
-            break
-        except Exception as conn_error:
-            if attempt < max_retries - 1:
-                print(f"  Connection attempt {attempt + 1} failed, retrying...", flush=True)
-                time.sleep(2)
-            else:
-                raise conn_error
+    def connect_postgresql(max_retries=3):
+        """New PostgreSQL connection, retried; each migration worker uses its own"""
+        for attempt in range(max_retries):
+            try:
+                return psycopg2.connect(
+                    database=db_name,
+                    user=db_user,
+                    password=db_password,
+                    host=db_host,
+                    port=db_port,
+                    connect_timeout=10,
+                    options='-c statement_timeout=300000'  # 5 minute timeout for queries
+                )
+            except Exception as conn_error:
+                if attempt < max_retries - 1:
+                    print(f"  Connection attempt {attempt + 1} failed, retrying...", flush=True)
+                    time.sleep(2)
+                else:
+                    raise conn_error
+    
+    pg_conn = connect_postgresql()
+    pg_cursor = pg_conn.cursor()
+    print("✓ Connected to PostgreSQL database", flush=True)
                 
 except ImportError:
     print("❌ ERROR: psycopg2 not installed. Install with: pip install psycopg2-binary", flush=True)
@@ -142,397 +169,385 @@ print(f"\nStarting migration...\n", flush=True)
 # Use SQLite table names for iteration, but map to PostgreSQL names when needed
 tables = sqlite_tables
 
-# Map SQLite types to PostgreSQL types
-type_mapping = {
-    'INTEGER': 'INTEGER',
-    'TEXT': 'TEXT',
-    'REAL': 'REAL',
-    'BLOB': 'BYTEA',
-    'NUMERIC': 'NUMERIC',
-}
-
 def get_columns(cursor, table_name):
     """Get column information from SQLite"""
     cursor.execute(f"PRAGMA table_info({table_name})")
     return cursor.fetchall()
 
+# PostgreSQL types the converters coerce values to
+INTEGER_LIMITS = {'SMALLINT': 32767, 'INTEGER': 2147483647, 'BIGINT': None}
+FLOAT_TYPES = ('REAL', 'DOUBLE PRECISION', 'NUMERIC')
+TIMESTAMP_TYPES = ('TIMESTAMP WITHOUT TIME ZONE', 'TIMESTAMP')
+TEXT_TYPES = ('TEXT', 'CHARACTER VARYING', 'CHARACTER')
+
+class SkipRow(Exception):
+    """A value that cannot be loaded; the whole row is left out"""
+
+def to_timestamp(val):
+    """SQLite timestamp (milliseconds, seconds or ISO text) -> datetime"""
+    if isinstance(val, str):
+        try:
+            return datetime.fromisoformat(val.strip())
+        except ValueError:
+            return val  # let PostgreSQL parse it
+    # SQLite stores timestamps as milliseconds (Unix timestamp * 1000)
+    if val > 1e9:
+        try:
+            return datetime.fromtimestamp(val / 1000.0)
+        except (ValueError, OSError, OverflowError):
+            return datetime.fromtimestamp(val)
+    return datetime.fromtimestamp(val)
+
+def make_converter(table_name, column, pg_type, max_length):
+    """
+    Converter for one column's non-NULL SQLite values, chosen once from the
+    PostgreSQL column type. Converted values have the Python type PostgreSQL
+    hands back, so source and target rows checksum the same.
+    """
+    pg_type = (pg_type or '').upper()
+    column_lower = column.lower()
+    warned = []
+
+    def warn(message):
+        # once per column, a table can have thousands of offending rows
+        if not warned:
+            warned.append(True)
+            print(f"      [{table_name}] Warning: {message} (further warnings for '{column}' suppressed)", flush=True)
+
+    if pg_type == 'BOOLEAN':
+        return lambda val: bool(val) if isinstance(val, int) else val
+
+    if pg_type in TIMESTAMP_TYPES or (column_lower in ('createdat', 'created_at') and pg_type not in INTEGER_LIMITS and pg_type not in TEXT_TYPES):
+        def convert_timestamp(val):
+            try:
+                return to_timestamp(val)
+            except (ValueError, OSError, OverflowError, TypeError) as e:
+                warn(f"Could not convert timestamp {val} for {column}: {e}")
+                return None
+        return convert_timestamp
+
+    if pg_type in INTEGER_LIMITS:
+        limit = INTEGER_LIMITS[pg_type]
+        def convert_integer(val):
+            if isinstance(val, str):
+                if val.strip() == '':
+                    return None
+                try:
+                    val = int(val.strip())
+                except ValueError:
+                    return val  # let PostgreSQL reject it
+            if limit and isinstance(val, int) and not -limit - 1 <= val <= limit:
+                if pg_type == 'INTEGER' and val > 1e12:
+                    raise SkipRow(
+                        f"Column '{column}' is INTEGER but contains timestamp value {val} (milliseconds) which exceeds "
+                        f"INTEGER range. This column should be BIGINT in PostgreSQL. Please update the table schema."
+                    )
+                warn(f"Integer value {val} exceeds {pg_type} range for column {column}, setting to NULL")
+                return None
+            return val
+        return convert_integer
+
+    if pg_type in FLOAT_TYPES:
+        def convert_float(val):
+            if isinstance(val, str):
+                if val.strip() == '':
+                    return None
+                try:
+                    return float(val)
+                except ValueError:
+                    return val
+            return float(val) if isinstance(val, int) else val
+        return convert_float
+
+    if pg_type in TEXT_TYPES:
+        def convert_text(val):
+            if isinstance(val, bytes):
+                return val
+            val = val if isinstance(val, str) else str(val)
+            if max_length is not None and len(val) > max_length:
+                warn(f"Value for column '{column}' ({len(val)} chars) exceeds VARCHAR({max_length}) limit, truncating")
+                return val[:max_length]
+            return val
+        return convert_text
+
+    return lambda val: val
+
+def convert_rows(rows, converters, table_name):
+    """Converted rows, leaving out (and reporting) the rows that cannot be loaded"""
+    converted = []
+    skipped = 0
+    for row in rows:
+        try:
+            converted.append(tuple(None if val is None else convert(val) for convert, val in zip(converters, row)))
+        except SkipRow as e:
+            skipped += 1
+            print(f"  ⚠️  [{table_name}] Skipping row {row[:3]}...: {e}", flush=True)
+    return converted, skipped
+
+def copy_text(value):
+    """One value in PostgreSQL COPY text format"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (bytes, memoryview)):
+        return "\\\\x" + bytes(value).hex()
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+def normalize(value):
+    """Comparable text of a value read from either database"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (float, Decimal)):
+        # REAL columns keep about 7 significant digits
+        return f"{float(value):.6g}"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+def row_checksum(row):
+    digest = hashlib.sha1("\x1f".join(normalize(value) for value in row).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+def load_chunk(pg_conn, pg_cursor, table_name, column_list, rows):
+    """
+    Loads a chunk with COPY FROM STDIN, falling back to execute_values and
+    finally to row-by-row inserts that skip only the failing rows.
+    Returns the rows that were loaded.
+    """
+    pg_cursor.execute("SAVEPOINT chunk")
+    try:
+        buffer = io.StringIO("".join("\t".join(copy_text(value) for value in row) + "\n" for row in rows))
+        pg_cursor.copy_expert(f'COPY "{table_name}" ({column_list}) FROM STDIN', buffer, size=COPY_BUFFER_SIZE)
+        pg_cursor.execute("RELEASE SAVEPOINT chunk")
+        return rows
+    except Exception as e:
+        pg_cursor.execute("ROLLBACK TO SAVEPOINT chunk")
+        print(f"  ⚠️  [{table_name}] COPY failed ({str(e).strip()}), retrying chunk with execute_values", flush=True)
+
+    insert_query = f'INSERT INTO "{table_name}" ({column_list}) VALUES %s'
+    try:
+        execute_values(pg_cursor, insert_query, rows, page_size=1000)
+        pg_cursor.execute("RELEASE SAVEPOINT chunk")
+        return rows
+    except Exception as e:
+        pg_cursor.execute("ROLLBACK TO SAVEPOINT chunk")
+        print(f"  ⚠️  [{table_name}] Batch insert failed ({str(e).strip()}), inserting chunk row by row", flush=True)
+
+    loaded = []
+    for row in rows:
+        pg_cursor.execute("SAVEPOINT chunk_row")
+        try:
+            execute_values(pg_cursor, insert_query, [row])
+            pg_cursor.execute("RELEASE SAVEPOINT chunk_row")
+            loaded.append(row)
+        except Exception as e:
+            pg_cursor.execute("ROLLBACK TO SAVEPOINT chunk_row")
+            error_msg = str(e).strip()
+            print(f"  ⚠️  [{table_name}] Error inserting row: {error_msg}", flush=True)
+            print(f"      Row data: {row[:3]}...", flush=True)
+            if "integer out of range" in error_msg.lower():
+                print(f"      Hint: Consider updating table schema to use BIGINT for large integer columns", flush=True)
+    pg_cursor.execute("RELEASE SAVEPOINT chunk")
+    return loaded
+
+def clear_table(pg_conn, pg_cursor, actual_table_name):
+    """Empties a PostgreSQL table before it is loaded"""
+    try:
+        pg_cursor.execute(f'TRUNCATE TABLE "{actual_table_name}" RESTART IDENTITY CASCADE')
+        pg_conn.commit()
+    except Exception:
+        pg_conn.rollback()
+        try:
+            pg_cursor.execute(f'DELETE FROM "{actual_table_name}"')
+            pg_conn.commit()
+        except Exception as e:
+            pg_conn.rollback()
+            print(f"  ⚠️  Could not clear table {actual_table_name}: {e}", flush=True)
+
 def migrate_table(table_name, test_mode=False, limit_rows=None):
     """Migrate a single table from SQLite to PostgreSQL
     
+    Rows are streamed from SQLite in chunks of CHUNK_ROWS, converted with
+    per-column converters and loaded with COPY. Every call uses its own
+    connections, so tables can be migrated in parallel.
+    
     Args:
         table_name: Name of the table to migrate
         test_mode: If True, only migrate first 5 rows (or limit_rows if specified)
         limit_rows: Number of rows to migrate (overrides test_mode default of 5)
     Returns:
-        tuple: (success: bool, rows_migrated: int, total_rows: int)
+        dict: success, rows_migrated, total_rows, skipped and checksum (of the
+        rows meant to be loaded) of the table
     """
     test_label = " [TEST MODE - 5 rows]" if test_mode and limit_rows is None else f" [TEST MODE - {limit_rows} rows]" if limit_rows else ""
-    print(f"\n{'='*70}", flush=True)
     print(f"Migrating table: {table_name}{test_label}", flush=True)
-    print(f"{'='*70}", flush=True)
+    result = {'success': False, 'rows_migrated': 0, 'total_rows': 0, 'skipped': 0, 'checksum': 0}
     
+    source_conn = sqlite3.connect(DB_PATH)
+    source_cursor = source_conn.cursor()
+    target_conn = connect_postgresql()
+    target_cursor = target_conn.cursor()
     try:
-        # Get table structure
-        columns = get_columns(sqlite_cursor, table_name)
-        print(f"  Found {len(columns)} columns", flush=True)
-        
-        # Get total row count first
-        sqlite_cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-        total_rows_in_db = sqlite_cursor.fetchone()[0]
-        
-        if total_rows_in_db == 0:
-            print(f"  ⚠️  Table is empty, skipping...", flush=True)
-            return (True, 0, 0)
+        columns = get_columns(source_cursor, table_name)
+        column_names = [col[1] for col in columns]
         
-        # Get data from SQLite (limited if test_mode)
+        source_cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+        total_rows = source_cursor.fetchone()[0]
         if test_mode or limit_rows:
-            limit = limit_rows if limit_rows else 5
-            sqlite_cursor.execute(f"SELECT * FROM {table_name} LIMIT {limit}")
-            rows = sqlite_cursor.fetchall()
-            print(f"  Found {len(rows)} rows to migrate (out of {total_rows_in_db} total)", flush=True)
-        else:
-            sqlite_cursor.execute(f"SELECT * FROM {table_name}")
-            rows = sqlite_cursor.fetchall()
-            print(f"  Found {len(rows)} rows to migrate", flush=True)
-        
-        # Get column names
-        column_names = [col[1] for col in columns]
+            total_rows = min(total_rows, limit_rows if limit_rows else 5)
+        result['total_rows'] = total_rows
         
-        # Get the exact PostgreSQL table name from our mapping
         actual_table_name = table_name_mapping.get(table_name, table_name)
-        
-        # Verify the table exists with this exact name
-        pg_cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = %s
-                AND table_schema = 'public'
-            )
-        """, (actual_table_name,))
-        table_exists = pg_cursor.fetchone()[0]
-        
-        if not table_exists:
-            print(f"  ⚠️  Table '{actual_table_name}' does not exist in PostgreSQL!", flush=True)
+        if actual_table_name not in pg_tables_list:
+            print(f"  ⚠️  [{table_name}] Table '{actual_table_name}' does not exist in PostgreSQL!", flush=True)
             print(f"  ⚠️  Please run 'python server.py --init' on Render first to create tables", flush=True)
-            print(f"  ⚠️  Or create tables manually in PostgreSQL", flush=True)
-            return (False, 0, total_rows_in_db)
+            return result
         
-        # Use the exact PostgreSQL table name (case-sensitive)
-        if actual_table_name != table_name:
-            print(f"  → Using PostgreSQL table name '{actual_table_name}' (SQLite: '{table_name}')", flush=True)
+        clear_table(target_conn, target_cursor, actual_table_name)
+        if total_rows == 0:
+            print(f"  ✓ [{table_name}] Table is empty, nothing to migrate", flush=True)
+            result['success'] = True
+            return result
         
-        # Clear existing data for this specific table before migrating
-        # First, ensure we're in a clean transaction state
+        # foreign keys are checked by triggers; loading order is handled by the
+        # dependency levels, this only spares the trigger calls where allowed
         try:
-            pg_conn.rollback()
-        except:
-            pass
+            target_cursor.execute("SET session_replication_role = 'replica'")
+        except Exception:
+            target_conn.rollback()
         
-        try:
-            # First get row count (use actual table name)
-            pg_cursor.execute(f'SELECT COUNT(*) FROM "{actual_table_name}"')
-            count_before = pg_cursor.fetchone()[0]
-            
-            if count_before > 0:
-                # Use TRUNCATE with RESTART IDENTITY to reset sequences
-                pg_cursor.execute(f'TRUNCATE TABLE "{actual_table_name}" RESTART IDENTITY CASCADE')
-                pg_conn.commit()
-                
-                # Verify it was cleared
-                pg_cursor.execute(f'SELECT COUNT(*) FROM "{actual_table_name}"')
-                count_after = pg_cursor.fetchone()[0]
-                print(f"  ✓ Cleared {count_before} rows from {actual_table_name}", flush=True)
-            else:
-                print(f"  ✓ Table {actual_table_name} is already empty", flush=True)
-        except Exception as e:
-            # Rollback any failed transaction
-            try:
-                pg_conn.rollback()
-            except:
-                pass
-            
-            # If TRUNCATE fails, try DELETE and reset sequence manually
-            try:
-                pg_cursor.execute(f'SELECT COUNT(*) FROM "{actual_table_name}"')
-                count_before = pg_cursor.fetchone()[0]
-                
-                if count_before > 0:
-                    pg_cursor.execute(f'DELETE FROM "{actual_table_name}"')
-                    # Reset sequence if table has SERIAL id column
-                    try:
-                        pg_cursor.execute(f'ALTER SEQUENCE "{actual_table_name}_id_seq" RESTART WITH 1')
-                    except:
-                        pass  # Sequence might not exist or have different name
-                    pg_conn.commit()
-                    print(f"  ✓ Cleared {count_before} rows from {actual_table_name} (using DELETE)", flush=True)
-                else:
-                    print(f"  ✓ Table {actual_table_name} is already empty", flush=True)
-            except Exception as e2:
-                # Rollback again
-                try:
-                    pg_conn.rollback()
-                except:
-                    pass
-                print(f"  ⚠️  Could not clear table {actual_table_name}: {e2}", flush=True)
-                # Continue anyway - might have constraints we can't handle
-        
-        # Get PostgreSQL column types to handle type conversion
-        # Note: PostgreSQL column names are case-insensitive unless quoted
-        print(f"  Getting PostgreSQL column types...", flush=True)
-        try:
-            # Use actual table name (case-insensitive lookup)
-            # Get both column_name, data_type, and character_maximum_length for VARCHAR
-            # Also get the actual column name (case-sensitive) for proper queries
-            pg_cursor.execute("""
-                SELECT LOWER(column_name), data_type, character_maximum_length, column_name
-                FROM information_schema.columns 
-                WHERE LOWER(table_name) = LOWER(%s)
-                ORDER BY ordinal_position
-            """, (actual_table_name,))
-            results = pg_cursor.fetchall()
-            
-            # Store both data_type and max_length for VARCHAR columns
-            # Also store actual column names (case-sensitive) for reference
-            pg_columns = {}
-            pg_column_lengths = {}
-            pg_column_actual_names = {}  # Map lowercase to actual case-sensitive name
-            for row in results:
-                col_name_lower = row[0]
-                data_type = row[1]
-                max_length = row[2]
-                actual_col_name = row[3]
-                pg_columns[col_name_lower] = data_type
-                pg_column_actual_names[col_name_lower] = actual_col_name
-                if max_length:
-                    pg_column_lengths[col_name_lower] = max_length
-            
-            print(f"  ✓ Found {len(pg_columns)} PostgreSQL columns", flush=True)
-        except Exception as e:
-            print(f"  ⚠️  Error getting column types: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
-            pg_columns = {}
-            pg_column_lengths = {}
-        
-        # Also check for createdat/createdAt variations
-        if 'createdat' in pg_columns or 'created_at' in pg_columns:
-            print(f"  Found timestamp column: createdat/created_at", flush=True)
-        
-        # Track which columns we've already debugged to avoid spam
-        debugged_columns = set()
-        
-        # Check for columns that might have integer overflow issues
-        timestamp_int_columns = ['durationstart', 'durationend', 'evaluationsendtime']
-        problematic_columns = []
-        for col in timestamp_int_columns:
-            if col in pg_columns and pg_columns[col].upper() == 'INTEGER':
-                problematic_columns.append(col)
-        if problematic_columns:
-            print(f"  ⚠️  Warning: Columns {problematic_columns} are INTEGER but may contain large timestamp values", flush=True)
-            print(f"      These should be BIGINT in PostgreSQL. Migration may fail for these columns.", flush=True)
-        
-        print(f"  Starting data insertion...", flush=True)
-        
-        # Insert data - use savepoints for each row to handle errors gracefully
-        placeholders = ', '.join(['%s'] * len(column_names))
-        column_names_str = ', '.join(column_names)
-        
-        inserted = 0
-        total_rows = len(rows)
-        # Show progress every 10% or every 100 rows, whichever is smaller
-        progress_interval = max(1, min(100, total_rows // 10))
-        
-        print(f"  Processing {total_rows} rows...", flush=True)
-        
-        for i, row in enumerate(rows, 1):
-            try:
-                # Create a savepoint for this row
-                savepoint_name = f"sp_row_{i}"
-                pg_cursor.execute(f"SAVEPOINT {savepoint_name}")
-                
-                # Convert None to NULL, handle BLOB data, and convert types
-                values = []
-                for idx, (col_name, val) in enumerate(zip(column_names, row)):
-                    if val is None:
-                        values.append(None)
-                    elif isinstance(val, bytes):
-                        values.append(val)
-                    else:
-                        col_name_lower = col_name.lower()
-                        pg_col_type = pg_columns.get(col_name_lower, '').upper()
-                        
-                        # Convert INTEGER (0/1) to BOOLEAN for boolean columns
-                        if pg_col_type == 'BOOLEAN' and isinstance(val, int):
-                            values.append(bool(val))
-                        # Convert TIMESTAMP columns from milliseconds to PostgreSQL timestamp
-                        # Check for createdAt, createdat, created_at variations
-                        elif (pg_col_type in ('TIMESTAMP WITHOUT TIME ZONE', 'TIMESTAMP') or 
-                              col_name_lower in ('createdat', 'created_at')) and isinstance(val, (int, float)):
-                            from datetime import datetime
-                            try:
-                                # SQLite stores timestamps as milliseconds (Unix timestamp * 1000)
-                                # Check if it's milliseconds (typically > 1e12) or seconds
-                                if val > 1e12:  # Definitely milliseconds (after year 2001)
-                                    values.append(datetime.fromtimestamp(val / 1000.0))
-                                elif val > 1e9:  # Could be milliseconds or seconds after 2001
-                                    # Try as milliseconds first
-                                    try:
-                                        values.append(datetime.fromtimestamp(val / 1000.0))
-                                    except:
-                                        values.append(datetime.fromtimestamp(val))
-                                else:  # Seconds
-                                    values.append(datetime.fromtimestamp(val))
-                            except (ValueError, OSError, OverflowError) as e:
-                                print(f"      Warning: Could not convert timestamp {val} for {col_name}: {e}", flush=True)
-                                values.append(None)
-                        # Convert empty strings to NULL for integer/numeric columns
-                        elif pg_col_type in ('INTEGER', 'BIGINT', 'SMALLINT', 'NUMERIC', 'REAL', 'DOUBLE PRECISION') and (val == '' or (isinstance(val, str) and val.strip() == '')):
-                            values.append(None)
-                        # Handle integer overflow - check ALL integer types, not just INTEGER
-                        elif isinstance(val, int):
-                            # PostgreSQL INTEGER max is 2147483647, SMALLINT max is 32767
-                            if pg_col_type == 'SMALLINT':
-                                if val > 32767 or val < -32768:
-                                    # Value too large for SMALLINT
-                                    print(f"      Warning: Value {val} exceeds SMALLINT range for column {col_name}, setting to NULL", flush=True)
-                                    values.append(None)
-                                else:
-                                    values.append(val)
-                            elif pg_col_type == 'INTEGER':
-                                if val > 2147483647 or val < -2147483648:
-                                    # Value exceeds INTEGER range
-                                    # Check if this looks like a timestamp (milliseconds)
-                                    if val > 1e12:  # Likely a timestamp in milliseconds
-                                        # This should be BIGINT, but column is detected as INTEGER
-                                        # Double-check the actual column type - might be a case sensitivity issue
-                                        # Only debug once per column to avoid spam
-                                        if col_name_lower not in debugged_columns:
-                                            print(f"      Debug: Column '{col_name}' (lowercase: '{col_name_lower}') detected as {pg_col_type}", flush=True)
-                                            debugged_columns.add(col_name_lower)
-                                        # Try to get the actual column type directly
-                                        # The initial detection might be wrong due to case sensitivity or caching
-                                        actual_type_is_bigint = False
-                                        try:
-                                            pg_cursor.execute("""
-                                                SELECT data_type 
-                                                FROM information_schema.columns 
-                                                WHERE LOWER(table_name) = LOWER(%s) 
-                                                AND LOWER(column_name) = LOWER(%s)
-                                            """, (actual_table_name, col_name))
-                                            actual_type_result = pg_cursor.fetchone()
-                                            if actual_type_result:
-                                                actual_type = actual_type_result[0].upper()
-                                                # Debug output (only once per column)
-                                                if col_name_lower not in debugged_columns:
-                                                    print(f"      Debug: Actual column type from database: {actual_type}", flush=True)
-                                                    debugged_columns.add(col_name_lower)
-                                                
-                                                # If it's actually BIGINT, use the value
-                                                if actual_type == 'BIGINT':
-                                                    actual_type_is_bigint = True
-                                                    values.append(val)
-                                                    # Continue to next column
-                                                    continue
-                                        except Exception as e:
-                                            # If query fails, we'll fall through to error handling
-                                            pass
-                                        
-                                        # Only raise error if column is not actually BIGINT
-                                        if not actual_type_is_bigint:
-                                            # This should be BIGINT, but column is INTEGER
-                                            # We cannot insert this value - it will fail
-                                            # Skip this row with a clear error message
-                                            raise ValueError(f"Column '{col_name}' is INTEGER but contains timestamp value {val} (milliseconds) which exceeds INTEGER range. This column should be BIGINT in PostgreSQL. Please update the table schema.")
-                                    else:
-                                        # Regular integer overflow
-                                        print(f"      Warning: Integer value {val} exceeds INTEGER range for column {col_name}, setting to NULL", flush=True)
-                                        values.append(None)
-                                else:
-                                    values.append(val)
-                            elif pg_col_type == 'BIGINT':
-                                # BIGINT can handle any Python int
-                                values.append(val)
-                            else:
-                                # Unknown type or not an integer column, pass through
-                                values.append(val)
-                        else:
-                            # Handle string values - check for VARCHAR length limits
-                            if isinstance(val, str):
-                                # Check column type and length limit
-                                pg_col_type_upper = pg_col_type.upper()
-                                max_length = pg_column_lengths.get(col_name_lower)
-                                
-                                # TEXT columns have no length limit - always allow full value
-                                if pg_col_type_upper == 'TEXT' or (pg_col_type_upper == 'CHARACTER VARYING' and max_length is None):
-                                    # TEXT column - no truncation needed
-                                    values.append(val)
-                                elif max_length is not None:
-                                    # Column has a length limit (VARCHAR with specified length)
-                                    if len(val) > max_length:
-                                        # Value exceeds VARCHAR length
-                                        print(f"      Warning: Value for column '{col_name}' ({len(val)} chars) exceeds VARCHAR({max_length}) limit (PostgreSQL type: {pg_col_type})", flush=True)
-                                        print(f"      Truncating to {max_length} characters...", flush=True)
-                                        truncated_val = val[:max_length]
-                                        values.append(truncated_val)
-                                    else:
-                                        values.append(val)
-                                else:
-                                    # Unknown type or no length limit - allow full value
-                                    values.append(val)
-                            else:
-                                values.append(val)
-                
-                pg_cursor.execute(
-                    f'INSERT INTO "{actual_table_name}" ({column_names_str}) VALUES ({placeholders})',
-                    values
-                )
-                pg_cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
-                inserted += 1
-                
-                # Show progress
-                if i % progress_interval == 0 or i == total_rows:
-                    percentage = (i / total_rows) * 100
-                    print(f"  Progress: {i}/{total_rows} rows ({percentage:.1f}%) - {inserted} inserted", flush=True)
-                    
-            except Exception as e:
-                # Rollback to savepoint to continue with next row
-                try:
-                    pg_cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint_name}")
-                except:
-                    # If savepoint rollback fails, rollback entire transaction
-                    try:
-                        pg_conn.rollback()
-                        # Recreate savepoint for next iteration
-                        if i < total_rows:
-                            savepoint_name = f"sp_row_{i+1}"
-                            pg_cursor.execute(f"SAVEPOINT {savepoint_name}")
-                    except:
-                        pass
-                
-                # Show more detailed error info
-                error_msg = str(e)
-                print(f"  ⚠️  Error inserting row {i}: {error_msg}", flush=True)
-                print(f"      Row data: {row[:3]}...", flush=True)  # Show first 3 fields
-                
-                # If it's an integer out of range error, show which column might be the issue
-                if "integer out of range" in error_msg.lower():
-                    print(f"      Hint: Check integer columns - values may exceed PostgreSQL INTEGER limits", flush=True)
-                    print(f"      Consider updating table schema to use BIGINT for large integer columns", flush=True)
-                continue
+        target_cursor.execute("""
+            SELECT LOWER(column_name), data_type, character_maximum_length
+            FROM information_schema.columns
+            WHERE LOWER(table_name) = LOWER(%s) AND table_schema = 'public'
+        """, (actual_table_name,))
+        pg_columns = {name: (data_type, max_length) for name, data_type, max_length in target_cursor.fetchall()}
+        converters = [make_converter(table_name, name, *pg_columns.get(name.lower(), (None, None))) for name in column_names]
+        column_list = ', '.join(column_names)
         
-        pg_conn.commit()
-        print(f"  ✓ Successfully migrated {inserted}/{len(rows)} rows", flush=True)
-        return (True, inserted, total_rows_in_db)
+        limit_clause = f" LIMIT {total_rows}" if test_mode or limit_rows else ""
+        source_cursor.execute(f"SELECT * FROM {table_name}{limit_clause}")
+        read = 0
+        checksum = 0
+        while True:
+            rows = source_cursor.fetchmany(CHUNK_ROWS)
+            if not rows:
+                break
+            read += len(rows)
+            converted, skipped = convert_rows(rows, converters, table_name)
+            result['skipped'] += skipped
+            for row in converted:
+                checksum = (checksum + row_checksum(row)) % CHECKSUM_MODULUS
+            if converted:
+                result['rows_migrated'] += len(load_chunk(target_conn, target_cursor, actual_table_name, column_list, converted))
+            print(f"  [{table_name}] Progress: {read}/{total_rows} rows ({100.0 * read / total_rows:.1f}%) - {result['rows_migrated']} loaded", flush=True)
         
+        target_conn.commit()
+        result['checksum'] = checksum
+        result['success'] = True
+        print(f"  ✓ [{table_name}] Successfully migrated {result['rows_migrated']}/{total_rows} rows", flush=True)
+        return result
+    
     except Exception as e:
         print(f"  ❌ Error migrating table {table_name}: {e}", flush=True)
         import traceback
         traceback.print_exc()
         try:
-            pg_conn.rollback()
+            target_conn.rollback()
         except:
             pass  # Connection might already be closed
-        return (False, 0, total_rows_in_db if 'total_rows_in_db' in locals() else 0)
+        return result
+    finally:
+        source_conn.close()
+        target_conn.close()
+
+def dependency_levels(table_names):
+    """
+    SQLite tables grouped so that every table comes after the tables its
+    foreign keys reference; the tables of one level are independent
+    """
+    pg_cursor.execute("""
+        SELECT DISTINCT tc.table_name, ccu.table_name
+        FROM information_schema.table_constraints tc
+        JOIN information_schema.constraint_column_usage ccu
+          ON tc.constraint_name = ccu.constraint_name AND tc.constraint_schema = ccu.constraint_schema
+        WHERE tc.constraint_type = 'FOREIGN KEY' AND tc.table_schema = 'public'
+    """)
+    references = {}
+    for table, referenced in pg_cursor.fetchall():
+        if table != referenced:
+            references.setdefault(table, set()).add(referenced)
+    pg_conn.rollback()
+    
+    pending = {table: {
+        referenced for referenced in references.get(table_name_mapping.get(table, table), set())
+        if referenced in {table_name_mapping.get(other, other) for other in table_names}
+    } for table in table_names}
+    levels = []
+    while pending:
+        loaded = {table_name_mapping.get(table, table) for level in levels for table in level}
+        level = [table for table, needs in pending.items() if needs <= loaded]
+        if not level:
+            level = list(pending)  # reference cycle: load the rest together
+        levels.append(level)
+        for table in level:
+            del pending[table]
+    return levels
+
+def migrate_tables(table_names, test_mode=False, limit_rows=None):
+    """Migrates tables level by level, the tables of a level in parallel"""
+    results = {}
+    for level in dependency_levels(table_names):
+        with ThreadPoolExecutor(max_workers=MIGRATION_WORKERS) as pool:
+            futures = {pool.submit(migrate_table, table, test_mode, limit_rows): table for table in level}
+            for future, table in futures.items():
+                try:
+                    results[table] = future.result()
+                except Exception as e:
+                    print(f"❌ Failed to migrate {table}: {e}", flush=True)
+                    results[table] = {'success': False, 'rows_migrated': 0, 'total_rows': 0, 'skipped': 0, 'checksum': 0}
+    return results
+
+def reset_sequences():
+    """Moves every serial sequence past the largest migrated id"""
+    pg_cursor.execute("""
+        SELECT table_name, column_name, pg_get_serial_sequence(format('%I', table_name), column_name)
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND column_default LIKE 'nextval(%'
+    """)
+    sequences = [row for row in pg_cursor.fetchall() if row[2]]
+    for table, column, sequence in sequences:
+        pg_cursor.execute(
+            f'SELECT setval(%s, COALESCE((SELECT MAX("{column}") FROM "{table}"), 0) + 1, false)',
+            (sequence,)
+        )
+    pg_conn.commit()
+    return len(sequences)
+
+def verify_table(table_name):
+    """(row count, checksum) of a migrated PostgreSQL table, read with a server-side cursor"""
+    actual_table_name = table_name_mapping.get(table_name, table_name)
+    column_list = ', '.join(col[1] for col in get_columns(sqlite_cursor, table_name))
+    verify_conn = connect_postgresql()
+    try:
+        verify_cursor = verify_conn.cursor(name=f"verify_{abs(hash(table_name))}")
+        verify_cursor.itersize = CHUNK_ROWS
+        verify_cursor.execute(f'SELECT {column_list} FROM "{actual_table_name}"')
+        count = 0
+        checksum = 0
+        for row in verify_cursor:
+            count += 1
+            checksum = (checksum + row_checksum(row)) % CHECKSUM_MODULUS
+        return count, checksum
+    finally:
+        verify_conn.close()
 
 # Clear ALL existing data from PostgreSQL tables BEFORE migration
 print("\n" + "="*70, flush=True)
@@ -635,25 +650,8 @@ print("STEP 1: TEST MIGRATION (First 5 rows of each table)", flush=True)
 print("="*70, flush=True)
 print("Migrating first 5 rows to verify everything works...\n", flush=True)
 
-test_results = {}
-test_success_count = 0
-for table in tables:
-    try:
-        success, rows_migrated, total_rows = migrate_table(table, test_mode=True, limit_rows=5)
-        test_results[table] = {
-            'success': success,
-            'rows_migrated': rows_migrated,
-            'total_rows': total_rows
-        }
-        if success:
-            test_success_count += 1
-    except Exception as e:
-        print(f"❌ Failed to migrate {table}: {e}", flush=True)
-        test_results[table] = {
-            'success': False,
-            'rows_migrated': 0,
-            'total_rows': 0
-        }
+test_results = migrate_tables(tables, test_mode=True, limit_rows=5)
+test_success_count = sum(1 for result in test_results.values() if result['success'])
 
 print(f"\n{'='*70}", flush=True)
 print(f"TEST MIGRATION RESULTS", flush=True)
@@ -748,24 +746,53 @@ print("="*70 + "\n", flush=True)
 print("\n" + "="*70, flush=True)
 print("STEP 3: FULL MIGRATION (All data)", flush=True)
 print("="*70, flush=True)
-print("Migrating all data from SQLite to PostgreSQL...\n", flush=True)
+print(f"Migrating all data from SQLite to PostgreSQL ({MIGRATION_WORKERS} workers, {CHUNK_ROWS} rows per chunk)...\n", flush=True)
 
-success_count = 0
-total_rows_migrated = 0
+migration_start = time.time()
+results = migrate_tables(tables, test_mode=False)
+success_count = sum(1 for result in results.values() if result['success'])
+total_rows_migrated = sum(result['rows_migrated'] for result in results.values())
+migration_seconds = time.time() - migration_start
+
+try:
+    reset_count = reset_sequences()
+    print(f"\n✓ Reset {reset_count} sequences", flush=True)
+except Exception as e:
+    pg_conn.rollback()
+    print(f"\n⚠️  Could not reset sequences: {e}", flush=True)
+
+# Verify row counts and checksums of every migrated table
+print(f"\n{'='*70}", flush=True)
+print(f"VERIFICATION", flush=True)
+print(f"{'='*70}", flush=True)
+print(f"  {'Table':<32} {'SQLite':>9} {'PostgreSQL':>11}  Checksum", flush=True)
+verified_count = 0
 for table in tables:
+    result = results[table]
+    if not result['success']:
+        print(f"  {table:<32} {result['total_rows']:>9} {'-':>11}  ❌ not migrated", flush=True)
+        continue
     try:
-        success, rows_migrated, total_rows = migrate_table(table, test_mode=False)
-        if success:
-            success_count += 1
-            total_rows_migrated += rows_migrated
+        count, checksum = verify_table(table)
     except Exception as e:
-        print(f"❌ Failed to migrate {table}: {e}", flush=True)
+        print(f"  {table:<32} {result['total_rows']:>9} {'-':>11}  ❌ {e}", flush=True)
+        continue
+    expected_count = result['total_rows'] - result['skipped']
+    if count == expected_count and checksum == result['checksum']:
+        verified_count += 1
+        status = "✓ match"
+    elif count != expected_count:
+        status = f"❌ expected {expected_count} rows"
+    else:
+        status = "❌ checksum mismatch"
+    print(f"  {table:<32} {result['total_rows']:>9} {count:>11}  {status}", flush=True)
 
 print(f"\n{'='*70}", flush=True)
 print(f"MIGRATION COMPLETE", flush=True)
 print(f"{'='*70}", flush=True)
 print(f"Successfully migrated {success_count}/{len(tables)} tables", flush=True)
-print(f"Total rows migrated: {total_rows_migrated}", flush=True)
+print(f"Verified {verified_count}/{len(tables)} tables", flush=True)
+print(f"Total rows migrated: {total_rows_migrated} in {migration_seconds:.1f}s", flush=True)
 
 # Close connections
 sqlite_conn.close()
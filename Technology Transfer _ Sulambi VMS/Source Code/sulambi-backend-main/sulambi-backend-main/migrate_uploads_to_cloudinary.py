@@ -2,10 +2,15 @@
 """
 Migrate local uploads to Cloudinary
 This script:
-1. Uploads all files from the uploads folder to Cloudinary
+1. Uploads all files from the uploads folder to Cloudinary, several at a time
 2. Updates database references from local paths to Cloudinary URLs
 3. Creates a mapping file for rollback if needed
 4. Preserves all existing references
+
+Every upload is recorded in the mapping file as soon as it finishes, so an
+interrupted run can simply be started again: files already in the mapping
+file are not uploaded twice. Use --fresh to start over and --workers=N to
+change the number of concurrent uploads.
 """
 
 import os
@@ -15,6 +20,7 @@ from dotenv import load_dotenv
 import cloudinary
 import cloudinary.uploader
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Import database connection utilities
 import sys
@@ -27,9 +33,22 @@ load_dotenv()
 # Uploads folder path
 UPLOADS_DIR = os.path.join("uploads")
 
-# Mapping file for rollback
+# Mapping file for rollback, also the checkpoint for resuming
 MAPPING_FILE = "cloudinary_migration_mapping.json"
 
+# Concurrent uploads (override with --workers=N)
+MIGRATION_WORKERS = int(os.getenv("CLOUDINARY_MIGRATION_WORKERS", 4))
+
+# Working directories of the app that hold no referenced uploads
+SKIPPED_DIRS = {"spool", "variants", "blobs/tmp"}
+
+# Tables and columns that store file paths
+FILE_PATH_COLUMNS = {
+    'requirements': ['medCert', 'waiver', 'curriculum', 'destination', 'firstAid', 'fees'],
+    'internalReport': ['photos'],
+    'externalReport': ['photos']
+}
+
 def configure_cloudinary():
     """Configure Cloudinary with environment variables"""
     cloudinary.config(
@@ -76,206 +95,194 @@ def upload_file_to_cloudinary(file_path, folder="uploads"):
         print(f"  [ERROR] Error uploading {file_path}: {e}")
         raise
 
-def find_database_references(cursor, conn, filename, is_postgresql=False):
+def normalize_reference(value):
+    """Path relative to uploads/ that a stored reference points at ('uploads\\a.png' -> 'a.png')"""
+    reference = str(value).strip().strip('"').replace("\\", "/").lstrip("/")
+    if reference.startswith("uploads/"):
+        reference = reference[len("uploads/"):]
+    return reference
+
+def split_references(value):
     """
-    Find all database references to a filename
-    Returns list of (table, column, row_id, current_value) tuples
+    (parts, is_json) of a stored column value: a JSON array of paths, or a
+    single path / comma-separated paths (report photos)
     """
-    references = []
-    
-    # Clean filename for searching (handle both with and without uploads/ prefix)
-    search_patterns = [
-        filename,
-        f"uploads/{filename}",
-        f"uploads\\{filename}",
-        filename.replace("/", "\\"),
-        filename.replace("\\", "/")
-    ]
-    
-    # Tables and columns that store file paths
-    file_path_tables = {
-        'requirements': ['medCert', 'waiver', 'curriculum', 'destination', 'firstAid', 'fees'],
-        'internalReport': ['photos'],
-        'externalReport': ['photos']
-    }
-    
-    for table_name, columns in file_path_tables.items():
-        quoted_table = quote_identifier(table_name)
-        
-        # Get column list once (with proper error handling)
-        existing_columns = []
+    text = str(value)
+    if text.startswith("["):
         try:
-            if is_postgresql:
-                # PostgreSQL: check table exists and get columns
-                # Handle case sensitivity - PostgreSQL stores unquoted names in lowercase
-                # Use convert_placeholders to convert ? to %s for PostgreSQL
-                query = """
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE LOWER(table_name) = LOWER(%s)
-                    ORDER BY column_name
-                """
-                cursor.execute(query, (table_name,))
-                existing_columns = [row[0] for row in cursor.fetchall()]
-            else:
-                # SQLite: use PRAGMA
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                existing_columns = [col[1] for col in cursor.fetchall()]
-        except Exception as e:
-            # Rollback transaction on error (PostgreSQL) and continue
-            if is_postgresql:
-                try:
-                    conn.rollback()
-                except:
-                    pass
-            print(f"    [WARNING] Error checking table {table_name}: {e}")
-            # Skip this table, continue with next
-            continue
-        
-        # Process each column
+            parts = json.loads(text)
+            if isinstance(parts, list):
+                return [str(part) for part in parts], True
+        except ValueError:
+            pass
+    return text.split(","), False
+
+def existing_columns(cursor, conn, table_name, is_postgresql=False):
+    """Column names of a table, [] when it does not exist"""
+    try:
+        if is_postgresql:
+            cursor.execute("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE LOWER(table_name) = LOWER(%s)
+            """, (table_name,))
+            return [row[0] for row in cursor.fetchall()]
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        return [col[1] for col in cursor.fetchall()]
+    except Exception as e:
+        if is_postgresql:
+            try:
+                conn.rollback()
+            except:
+                pass
+        print(f"    [WARNING] Error checking table {table_name}: {e}")
+        return []
+
+def build_reference_index(cursor, conn, is_postgresql=False):
+    """
+    Reads every file path column once and returns
+    (index, values): index maps a path relative to uploads/ to the
+    (table, column, row_id) cells referencing it, values holds the current
+    value of each of those cells.
+    """
+    index = {}
+    values = {}
+    for table_name, columns in FILE_PATH_COLUMNS.items():
+        columns_by_name = {col.lower(): col for col in existing_columns(cursor, conn, table_name, is_postgresql)}
         for column in columns:
-            # Check if column exists (case-insensitive for PostgreSQL)
-            column_exists = False
-            actual_column_name = column
-            if is_postgresql:
-                # PostgreSQL columns might be case-sensitive
-                for col in existing_columns:
-                    if col.lower() == column.lower():
-                        column_exists = True
-                        actual_column_name = col  # Use actual case
-                        break
-            else:
-                column_exists = column in existing_columns
-            
-            if not column_exists:
+            actual_column_name = columns_by_name.get(column.lower())
+            if actual_column_name == None:
                 continue
-            
             quoted_column = quote_identifier(actual_column_name) if is_postgresql else actual_column_name
-            
-            # Search for filename in column
             try:
-                for pattern in search_patterns:
-                    if is_postgresql:
-                        query = f"SELECT id, {quoted_column} FROM {quoted_table} WHERE {quoted_column}::text LIKE %s"
-                        cursor.execute(query, (f"%{pattern}%",))
-                    else:
-                        query = f"SELECT id, {actual_column_name} FROM {table_name} WHERE {actual_column_name} LIKE ?"
-                        cursor.execute(query, (f"%{pattern}%",))
-                    
-                    rows = cursor.fetchall()
-                    
-                    for row_id, value in rows:
-                        if value and pattern in str(value):
-                            # Avoid duplicates
-                            ref_key = (table_name, actual_column_name, row_id)
-                            if not any(r[:3] == ref_key for r in references):
-                                references.append((table_name, actual_column_name, row_id, value))
+                cursor.execute(
+                    f"SELECT id, {quoted_column} FROM {quote_identifier(table_name)} "
+                    f"WHERE {quoted_column} IS NOT NULL AND {quoted_column} <> ''"
+                )
+                rows = cursor.fetchall()
             except Exception as e:
-                # Rollback on error and continue
                 if is_postgresql:
                     try:
                         conn.rollback()
                     except:
                         pass
-                print(f"    [WARNING] Error searching {table_name}.{actual_column_name}: {e}")
+                print(f"    [WARNING] Error reading {table_name}.{actual_column_name}: {e}")
                 continue
-    
-    return references
 
-def update_references_in_db(cursor, conn, old_path, new_url, mapping_file, is_postgresql=False):
+            for row_id, value in rows:
+                parts, _ = split_references(value)
+                for part in parts:
+                    if not part.strip() or str(part).strip().startswith(("http://", "https://")):
+                        continue
+                    cell = (table_name, actual_column_name, row_id)
+                    values[cell] = value
+                    cells = index.setdefault(normalize_reference(part), [])
+                    if cell not in cells:
+                        cells.append(cell)
+    return index, values
+
+def rewrite_value(value, urls):
+    """The column value with every migrated path replaced by its Cloudinary URL"""
+    parts, is_json = split_references(value)
+    rewritten = [urls.get(normalize_reference(part), part) if part.strip() else part for part in parts]
+    return json.dumps(rewritten) if is_json else ",".join(rewritten)
+
+def migrated_paths(value, urls):
+    """Paths in a column value that have a Cloudinary URL"""
+    parts, _ = split_references(value)
+    return sorted({normalize_reference(part) for part in parts} & set(urls))
+
+def load_checkpoint(mapping_file):
     """
-    Update all database references from old_path to new_url
-    Handles both single values and JSON arrays
+    {path relative to uploads/: Cloudinary URL} of the files a previous run
+    already uploaded, read back from the mapping file
     """
+    urls = {}
+    if not os.path.exists(mapping_file):
+        return urls
+    with open(mapping_file, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut off by a crash
+            if not entry.get("file") or not entry.get("new_value"):
+                continue
+            if entry.get("type") in ("upload", "ui-only"):
+                urls[normalize_reference(entry["file"])] = entry["new_value"]
+            elif entry.get("type") == None:
+                # reference entries of older runs hold whole column values
+                old_parts = str(entry.get("old_value") or "").split(",")
+                added = [part for part in str(entry["new_value"]).split(",")
+                         if part.startswith(("http://", "https://")) and part not in old_parts]
+                if len(added) == 1:
+                    urls[normalize_reference(entry["file"])] = added[0]
+    return urls
+
+def append_mapping(mapping_file, entries):
+    """Appends mapping entries and forces them to disk, so a crash never loses an upload"""
+    with open(mapping_file, 'a') as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+def apply_reference_updates(cursor, conn, index, values, urls, mapping_file, is_postgresql=False):
+    """
+    Rewrites every cell referencing a migrated file, one executemany and
+    commit per table and column. Returns the number of cells updated.
+    """
+    updates = {}
+    for rel_path, url in urls.items():
+        for cell in index.get(rel_path, []):
+            updates.setdefault(cell[:2], set()).add(cell[2])
+
     updated_count = 0
-    
-    # Find all references (pass conn for rollback handling)
-    filename = old_path.replace("uploads/", "").replace("uploads\\", "")
-    references = find_database_references(cursor, conn, filename, is_postgresql)
-    
-    if not references:
-        print(f"  [INFO] No database references found for {filename} (may be UI-only or unused file)")
-        return updated_count
-    
-    for table, column, row_id, current_value in references:
+    for (table, column), row_ids in updates.items():
+        rows = []
+        for row_id in row_ids:
+            current_value = values[(table, column, row_id)]
+            new_value = rewrite_value(current_value, urls)
+            if new_value != current_value:
+                rows.append((row_id, current_value, new_value))
+        if not rows:
+            continue
+
+        quoted_column = quote_identifier(column) if is_postgresql else column
+        query = convert_placeholders(f"UPDATE {quote_identifier(table)} SET {quoted_column} = ? WHERE id = ?")
         try:
-            new_value = None
-            
-            # Check if value is a JSON array (for photos columns)
-            if column == 'photos' and (current_value.startswith('[') or current_value.startswith('"')):
-                try:
-                    photos_array = json.loads(current_value) if isinstance(current_value, str) else current_value
-                    if isinstance(photos_array, list):
-                        # Replace matching paths in array
-                        updated_array = []
-                        for photo in photos_array:
-                            if old_path in str(photo) or filename in str(photo):
-                                updated_array.append(new_url)
-                            else:
-                                updated_array.append(photo)
-                        new_value = json.dumps(updated_array)
-                    else:
-                        # Single value in JSON format
-                        new_value = new_url if (old_path in str(current_value) or filename in str(current_value)) else current_value
-                except:
-                    # Not valid JSON, treat as string
-                    new_value = new_url if (old_path in str(current_value) or filename in str(current_value)) else current_value
-            else:
-                # Single value replacement
-                if old_path in str(current_value) or filename in str(current_value):
-                    new_value = str(current_value).replace(old_path, new_url)
-                    new_value = new_value.replace(f"uploads/{filename}", new_url)
-                    new_value = new_value.replace(f"uploads\\{filename}", new_url)
-                else:
-                    continue
-            
-            if new_value and new_value != current_value:
-                # Update database
-                quoted_table = quote_identifier(table)
-                quoted_column = quote_identifier(column) if is_postgresql else column
-                
-                # Update database with proper error handling
-                try:
-                    if is_postgresql:
-                        query = f"UPDATE {quoted_table} SET {quoted_column} = %s WHERE id = %s"
-                        cursor.execute(query, (new_value, row_id))
-                    else:
-                        query = f"UPDATE {table} SET {column} = ? WHERE id = ?"
-                        cursor.execute(query, (new_value, row_id))
-                except Exception as e:
-                    # Rollback on error (PostgreSQL)
-                    if is_postgresql:
-                        try:
-                            conn.rollback()
-                        except:
-                            pass
-                    print(f"    [ERROR] Error updating {table}.{column} (id: {row_id}): {e}")
-                    continue
-                
-                # Save to mapping file
-                mapping_entry = {
-                    'timestamp': datetime.now().isoformat(),
-                    'table': table,
-                    'column': column,
-                    'row_id': row_id,
-                    'old_value': current_value,
-                    'new_value': new_value,
-                    'file': filename
-                }
-                
-                with open(mapping_file, 'a') as f:
-                    f.write(json.dumps(mapping_entry) + '\n')
-                
-                updated_count += 1
-                print(f"    ✓ Updated {table}.{column} (id: {row_id})")
-        
+            cursor.executemany(query, [(new_value, row_id) for row_id, _, new_value in rows])
+            conn.commit()
         except Exception as e:
-            print(f"    ❌ Error updating {table}.{column} (id: {row_id}): {e}")
+            try:
+                conn.rollback()
+            except:
+                pass
+            print(f"  [ERROR] Error updating {table}.{column}: {e}")
             continue
-    
+
+        timestamp = datetime.now().isoformat()
+        append_mapping(mapping_file, [
+            {
+                'timestamp': timestamp,
+                'table': table,
+                'column': column,
+                'row_id': row_id,
+                'old_value': current_value,
+                'new_value': new_value,
+                'file': ",".join(migrated_paths(current_value, urls)),
+                'type': 'reference'
+            }
+            for row_id, current_value, new_value in rows
+        ])
+        for row_id, _, new_value in rows:
+            values[(table, column, row_id)] = new_value
+        updated_count += len(rows)
+        print(f"  ✓ Updated {len(rows)} row(s) of {table}.{column}")
+
     return updated_count
 
-def migrate_uploads_to_cloudinary():
+def migrate_uploads_to_cloudinary(workers=MIGRATION_WORKERS, fresh=False):
     """
     Main migration function
     """
@@ -296,11 +303,13 @@ def migrate_uploads_to_cloudinary():
         print(f"[ERROR] Uploads folder not found: {UPLOADS_DIR}")
         return
     
-    # Initialize mapping file
-    if os.path.exists(MAPPING_FILE):
+    # The mapping file doubles as the checkpoint: uploads recorded in it are
+    # not repeated. --fresh starts over.
+    if fresh and os.path.exists(MAPPING_FILE):
         os.remove(MAPPING_FILE)
-    with open(MAPPING_FILE, 'w') as f:
-        f.write('')  # Create empty file
+    urls = load_checkpoint(MAPPING_FILE)
+    if urls:
+        print(f"[RESUME] {len(urls)} file(s) already uploaded according to {MAPPING_FILE}")
     
     # Connect to database (supports both SQLite and PostgreSQL)
     try:
@@ -315,6 +324,7 @@ def migrate_uploads_to_cloudinary():
     # Get all files from uploads folder
     upload_files = []
     for root, dirs, files in os.walk(UPLOADS_DIR):
+        dirs[:] = [d for d in dirs if os.path.relpath(os.path.join(root, d), UPLOADS_DIR).replace("\\", "/") not in SKIPPED_DIRS]
         for file in files:
             file_path = os.path.join(root, file)
             # Get relative path from uploads folder
@@ -326,95 +336,70 @@ def migrate_uploads_to_cloudinary():
         conn.close()
         return
     
-    print(f"Found {len(upload_files)} file(s) to migrate\n")
+    print(f"Found {len(upload_files)} file(s) in uploads folder")
     
+    # One pass over the file path columns instead of LIKE queries per file
+    index, values = build_reference_index(cursor, conn, is_postgresql)
+    print(f"[OK] Indexed {len(values)} database cell(s) referencing {len(index)} local path(s)\n")
+    
+    pending = [(rel_path, file_path) for rel_path, file_path in upload_files if rel_path not in urls]
+    skipped_count = len(upload_files) - len(pending)
     uploaded_count = 0
-    updated_count = 0
-    skipped_count = 0
+    ui_only_count = 0
     error_count = 0
     
-    # Process each file
-    for i, (rel_path, file_path) in enumerate(upload_files, 1):
-        print(f"[{i}/{len(upload_files)}] Processing: {rel_path}")
-        
-        try:
-            # Check if file already exists in database as Cloudinary URL
-            filename = rel_path
-            references = find_database_references(cursor, conn, filename, is_postgresql)
-            
-            # Check if already migrated (check if any reference is already a Cloudinary URL)
-            already_cloudinary = False
-            for table, column, row_id, value in references:
-                if value and 'res.cloudinary.com' in str(value):
-                    already_cloudinary = True
-                    break
-            
-            if already_cloudinary:
-                print(f"  [SKIP] Already using Cloudinary URL, skipping")
-                skipped_count += 1
+    print(f"[UPLOAD] Uploading {len(pending)} file(s) with {workers} worker(s)...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(upload_file_to_cloudinary, file_path, "uploads"): rel_path
+            for rel_path, file_path in pending
+        }
+        for i, future in enumerate(as_completed(futures), 1):
+            rel_path = futures[future]
+            try:
+                cloudinary_url = future.result()
+            except Exception as e:
+                print(f"  [{i}/{len(pending)}] [ERROR] Error processing {rel_path}: {e}")
+                error_count += 1
                 continue
             
-            # Upload to Cloudinary
-            print(f"  [UPLOAD] Uploading to Cloudinary...")
-            cloudinary_url = upload_file_to_cloudinary(file_path, folder="uploads")
-            print(f"  [OK] Uploaded: {cloudinary_url[:60]}...")
+            # checkpoint right away; UI-only files are kept for the frontend update script
+            urls[rel_path] = cloudinary_url
+            append_mapping(MAPPING_FILE, [{
+                'timestamp': datetime.now().isoformat(),
+                'table': None,
+                'column': None,
+                'row_id': None,
+                'old_value': f"uploads/{rel_path}",
+                'new_value': cloudinary_url,
+                'file': rel_path,
+                'type': 'upload' if rel_path in index else 'ui-only'
+            }])
             uploaded_count += 1
-            
-            # Update database references
-            print(f"  [UPDATE] Updating database references...")
-            local_path = f"uploads/{rel_path}"
-            updated = update_references_in_db(cursor, conn, local_path, cloudinary_url, MAPPING_FILE, is_postgresql)
-            updated_count += updated
-            
-            if updated > 0:
-                # Commit changes after each successful update
-                try:
-                    conn.commit()
-                    print(f"  [OK] Updated {updated} database reference(s)")
-                except Exception as e:
-                    print(f"  [ERROR] Error committing changes: {e}")
-                    try:
-                        conn.rollback()
-                    except:
-                        pass
-            else:
-                # Save UI-only file to mapping file for frontend update script
-                mapping_entry = {
-                    'timestamp': datetime.now().isoformat(),
-                    'table': None,
-                    'column': None,
-                    'row_id': None,
-                    'old_value': local_path,
-                    'new_value': cloudinary_url,
-                    'file': rel_path,
-                    'type': 'ui-only'  # Mark as UI-only file
-                }
-                
-                with open(MAPPING_FILE, 'a') as f:
-                    f.write(json.dumps(mapping_entry) + '\n')
-                
-                print(f"  [INFO] File uploaded but no database references found (may be UI-only or unused file)")
-                print(f"  [INFO] Saved to mapping file for frontend update script")
-        
-        except Exception as e:
-            print(f"  [ERROR] Error processing {rel_path}: {e}")
-            error_count += 1
-            continue
-        
-        print()
+            ui_only_count += rel_path not in index
+            print(f"  [{i}/{len(pending)}] [OK] {rel_path} -> {cloudinary_url[:60]}...")
+    
+    # Update database references, batched per table and column
+    print(f"\n[UPDATE] Updating database references...")
+    updated_count = apply_reference_updates(cursor, conn, index, values, urls, MAPPING_FILE, is_postgresql)
     
     # Summary
+    print()
     print("=" * 60)
     print("MIGRATION SUMMARY")
     print("=" * 60)
     print(f"[OK] Files uploaded to Cloudinary: {uploaded_count}")
     print(f"[UPDATE] Database references updated: {updated_count}")
-    print(f"[SKIP] Files skipped (already migrated): {skipped_count}")
-    print(f"[INFO] UI-only/unused files (no DB refs): {uploaded_count - updated_count}")
+    print(f"[SKIP] Files skipped (already uploaded by an earlier run): {skipped_count}")
+    print(f"[INFO] UI-only/unused files (no DB refs): {ui_only_count}")
     print(f"[ERROR] Errors: {error_count}")
     print(f"[INFO] Mapping file saved: {MAPPING_FILE}")
     print()
     
+    if error_count > 0:
+        print("[INFO] Run the script again to retry the failed files; uploaded files are not repeated.")
+        print()
+    
     if uploaded_count > 0:
         print("[WARNING] IMPORTANT:")
         print("1. Review the database to ensure all references are updated correctly")
@@ -427,4 +412,8 @@ def migrate_uploads_to_cloudinary():
     conn.close()
 
 if __name__ == "__main__":
-    migrate_uploads_to_cloudinary()
+    workers = MIGRATION_WORKERS
+    for arg in sys.argv[1:]:
+        if arg.startswith("--workers="):
+            workers = max(1, int(arg.split("=", 1)[1]))
+    migrate_uploads_to_cloudinary(workers=workers, fresh="--fresh" in sys.argv)
@@ -1,6 +1,8 @@
-from flask import Flask, send_from_directory, request
+from flask import Flask, send_from_directory, request, abort
 from flask_cors import CORS
 from app.blueprint import ApiBlueprint
+from app.modules import ContentStore, PhotoVariants, UploadPipeline
+from werkzeug.utils import safe_join
 from dotenv import load_dotenv
 import sys
 import os
@@ -123,18 +125,51 @@ def handle_error(error):
 
 @Server.route("/uploads/<path:path>")
 def staticFileHost(path):
-  response = send_from_directory("uploads", path)
+  # strong ETag from the content hash; send_from_directory answers
+  # If-None-Match / If-Modified-Since with 304 and Range with 206
+  filePath = safe_join("uploads", path)
+  if filePath and UploadPipeline.isSpoolPath(filePath):
+    # spooled requirement files wait here for their Cloudinary upload
+    abort(404)
+  variant = request.args.get("variant")
+  if variant and variant not in PhotoVariants.VARIANTS:
+    return ({"message": f"Unknown variant, expected one of: {', '.join(PhotoVariants.VARIANTS)}"}, 400)
+
+  etag, servedPath, fallback = True, path, False
+  if filePath and os.path.isfile(filePath):
+    if variant:
+      variantPath, etag, fallback = PhotoVariants.variantPath(filePath, variant)
+      servedPath = os.path.relpath(variantPath, "uploads")
+      if not fallback:
+        etag = f"{etag}-{variant}"
+    else:
+      etag = ContentStore.digest(filePath)
+  response = send_from_directory("uploads", servedPath, etag=etag)
   response.headers['Access-Control-Allow-Origin'] = '*'
   response.headers['Access-Control-Allow-Methods'] = 'GET'
   response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
-  response.headers['Cache-Control'] = 'public, max-age=3600'
+  if fallback:
+    # the original stands in for a variant that may render on a later request
+    response.headers['Cache-Control'] = 'public, max-age=300'
+  elif ContentStore.isBlob(path):
+    # content-addressed URLs never change content
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+  else:
+    response.headers['Cache-Control'] = 'public, max-age=3600'
   return response
 
 Server.register_blueprint(ApiBlueprint)
 
-# Export app for Gunicorn (production)
+# Exported for the WSGI entry point (wsgi.py)
 app = Server
 
+def startBackgroundServices():
+  # warm-load the latest analytics models and keep retraining off the request path
+  from app.modules.AnalyticsEngine import start_training_scheduler
+  start_training_scheduler()
+  # resume the requirement uploads queued before a restart
+  UploadPipeline.startWorker()
+
 if __name__ == "__main__":
   if ("--init" in sys.argv):
     import app.database.tableInitializer
@@ -155,5 +190,7 @@ if __name__ == "__main__":
   host = os.getenv("HOST", "localhost")
   port = int(os.getenv("PORT", 8000))
   
+  startBackgroundServices()
+
   # Run Flask dev server (only in development)
   Server.run(host=host, port=port, debug=True)
\ No newline at end of file
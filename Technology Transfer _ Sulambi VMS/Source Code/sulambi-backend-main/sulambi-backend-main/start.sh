@@ -24,5 +24,5 @@ fi
 
 # Start the server with Gunicorn
 echo "Starting Gunicorn server..."
-gunicorn --bind 0.0.0.0:$PORT --workers 2 --timeout 120 server:app
+gunicorn --bind 0.0.0.0:$PORT --workers 2 --timeout 120 wsgi:app
 
@@ -0,0 +1,62 @@
+"""
+ColumnarStore Test
+Loads membership rows shaped like the bundled database, where
+volunterismExperience mixes 0/1 integers with 'Yes'/'no' text
+"""
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.modules.ColumnarStore import ColumnarStore, TABLES
+
+MEMBERSHIP_ROWS = [
+    (1, "Cruz, Ana", "ana@example.com", 1, 1, 1),
+    (2, "Reyes, Ben", "ben@example.com", 0, 1, 1),
+    (3, "Santos, Carla", "carla@example.com", "Yes", 1, 0),
+    (4, "Lim, Dan", "dan@example.com", "no", 1, 1),
+    (5, "Tan, Eve", "eve@example.com", None, 1, 1),
+    (6, "Go, Fay", "fay@example.com", "N/A", 0, 1),
+]
+
+def make_cursor():
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE membership(
+            id INTEGER PRIMARY KEY, fullname TEXT, email TEXT,
+            volunterismExperience, accepted BOOLEAN, active BOOLEAN
+        )
+    """)
+    cursor.executemany("INSERT INTO membership VALUES (?, ?, ?, ?, ?, ?)", MEMBERSHIP_ROWS)
+    conn.commit()
+    return conn, cursor
+
+def test_mixed_boolean_values():
+    """0/1 and 'Yes'/'no' load as booleans, other values as missing"""
+    tables = {"membership": ("id", ["id", "fullname", "email", "volunterismExperience", "accepted", "active"],
+                             ["volunterismExperience", "accepted", "active"])}
+    conn, cursor = make_cursor()
+    try:
+        frame = ColumnarStore(tables)._load(cursor, "membership")
+    finally:
+        conn.close()
+
+    assert str(frame["volunterismExperience"].dtype) == "boolean"
+    assert frame["volunterismExperience"].tolist()[:4] == [True, False, True, False]
+    assert frame["volunterismExperience"].isna().tolist() == [False] * 4 + [True, True]
+    assert frame["accepted"].tolist() == [True, True, True, True, True, False]
+    assert frame["active"].tolist() == [True, True, False, True, True, True]
+    print("✓ Mixed 0/1 and Yes/no values load as nullable booleans")
+
+def test_membership_booleans_declared():
+    """the membership columns the analytics filter on are cast"""
+    booleans = TABLES["membership"][2]
+    for column in ("volunterismExperience", "accepted", "active"):
+        assert column in booleans, column
+    print("✓ Membership boolean columns declared")
+
+if __name__ == "__main__":
+    test_mixed_boolean_values()
+    test_membership_booleans_declared()
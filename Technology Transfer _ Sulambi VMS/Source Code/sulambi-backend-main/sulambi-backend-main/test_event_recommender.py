@@ -0,0 +1,88 @@
+"""
+Event Recommender Test
+Recommends events to members stored the way the bundled database stores
+them: volunterismExperience mixes 0/1 with 'Yes'/'no' text
+"""
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# a scratch database, set before the app reads DB_PATH
+os.environ['DB_PATH'] = os.path.join(tempfile.mkdtemp(), 'recommender.db')
+sys.path.insert(0, os.path.dirname(__file__))
+
+import app.database.tableInitializer  # creates the tables
+from app.database.connection import cursorInstance
+from app.modules.EventRecommender import EventRecommender
+from app.modules.LSIAlgorithm import SKLEARN_AVAILABLE
+
+DAY_MS = 24 * 60 * 60 * 1000
+NOW = datetime(2026, 1, 1)
+NOW_MS = int(NOW.timestamp() * 1000)
+
+MEMBERS = [
+    # id, volunterismExperience, areasOfInterest, volunteerExpQ1
+    (1, "Yes", "Environment", "tree planting along the coast"),
+    (2, 0, "Health", "tree planting along the coast"),
+    (3, "no", "Health", None),
+    (4, 1, "Education", "literacy tutoring for children"),
+]
+EVENTS = [
+    # id, title, description
+    (1, "Coastal tree planting", "Mangrove tree planting for the environment"),
+    (2, "Blood donation drive", "Health screening and blood donation"),
+    (3, "Reading camp", "Literacy tutoring for children"),
+]
+
+def _insert(cursor, table, values):
+    """Fills the NOT NULL columns the test does not care about"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    row = {}
+    for _, name, columnType, notNull, default, primaryKey in cursor.fetchall():
+        if notNull and default is None and not primaryKey:
+            row[name] = 0 if columnType.upper() in ("INTEGER", "BOOLEAN") else ""
+    row.update(values)
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(row)}) VALUES ({', '.join(['?'] * len(row))})",
+        tuple(row.values())
+    )
+
+def setup_database():
+    conn, cursor = cursorInstance()
+    for membershipId, experience, interests, answer in MEMBERS:
+        _insert(cursor, "membership", {
+            "id": membershipId, "fullname": f"Member {membershipId}", "email": f"member{membershipId}@example.com",
+            "volunterismExperience": experience, "areasOfInterest": interests,
+            "volunteerExpQ1": answer, "volunteerExpQ2": "nan", "accepted": 1,
+        })
+    for eventId, title, description in EVENTS:
+        _insert(cursor, "internalEvents", {
+            "id": eventId, "title": title, "description": description, "status": "accepted",
+            "durationStart": NOW_MS + eventId * DAY_MS, "durationEnd": NOW_MS + (eventId + 1) * DAY_MS,
+        })
+    conn.commit()
+    conn.close()
+
+setup_database()
+
+def test_recommend_mixed_experience_values():
+    """every member gets recommendations; experience answers count only for experienced members"""
+    if not SKLEARN_AVAILABLE:
+        print("⚠️  scikit-learn not available, skipping")
+        return
+    recommender = EventRecommender()
+    top = {membershipId: recommender.recommend(membershipId, 3, now=NOW) for membershipId, *_ in MEMBERS}
+
+    for membershipId, recommendations in top.items():
+        assert recommendations, membershipId
+    assert top[1][0]["title"] == "Coastal tree planting"
+    # member 2 answered about tree planting but reports no experience ('0')
+    assert top[2][0]["title"] == "Blood donation drive"
+    assert top[3][0]["title"] == "Blood donation drive"
+    assert top[4][0]["title"] == "Reading camp"
+    assert recommender.recommend(99, 3, now=NOW) is None
+    print("✓ Recommendations for members with 0/1 and Yes/no experience values")
+
+if __name__ == "__main__":
+    test_recommend_mixed_experience_values()
@@ -0,0 +1,76 @@
+"""
+Member Import Diff Test
+Matches sheet rows against members stored the way the bundled database
+stores them (datetime-formatted birthdays, 'nan' for blank answers)
+"""
+import sys
+import os
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.tools.import_members import normalize, diff, PROFILE_COLUMNS, SHEET_COLUMNS, _text
+
+def make_sheet(rows):
+    headers = {column: header for header, column in SHEET_COLUMNS.items()}
+    return pd.DataFrame([
+        {**{headers[column]: value for column, value in row.items() if column in headers}, "Gsuite Email": row["email"]}
+        for row in rows
+    ])
+
+def make_existing(rows):
+    """Stored members as load_existing() returns them"""
+    existing = pd.DataFrame([
+        {"id": index + 1, "accepted": 1, "active": 1, **{column: row.get(column) for column in PROFILE_COLUMNS}}
+        for index, row in enumerate(rows)
+    ])
+    existing["emailKey"] = _text(existing["email"]).str.lower()
+    existing["srcodeKey"] = _text(existing["srcode"]).str.lower()
+    return existing
+
+SHEET_ROW = {
+    "email": "22-00001@g.batstate-u.edu.ph", "fullname": "Cruz, Ana B.", "srcode": "22-00001",
+    "applyingAs": "Student", "volunterismExperience": "Yes", "age": 20,
+    "birthday": datetime(2004, 3, 1), "sex": "Female", "campus": "Alangilan",
+    "collegeDept": "CICS", "yrlevelprogram": "2nd Year BSIT", "address": "Batangas City",
+    "contactNum": "09171234567", "fblink": None, "bloodType": "O+", "bloodDonation": "No",
+    "medicalCondition": "N/A", "paymentOption": "GCash",
+    "weekdaysTimeDevotion": "2 hours", "weekendsTimeDevotion": "4 hours", "areasOfInterest": "Environment",
+    "volunteerExpQ1": None, "volunteerExpQ2": None, "volunteerExpProof": None, "reasonQ1": None, "reasonQ2": None,
+}
+
+STORED_ROW = {
+    **SHEET_ROW,
+    "affiliation": "Batangas State University", "volunterismExperience": 1,
+    "birthday": "2004-03-01 00:00:00", "contactNum": 9171234567, "fblink": "nan",
+    "volunteerExpQ1": "nan", "volunteerExpQ2": "nan", "volunteerExpProof": "nan", "reasonQ1": "nan", "reasonQ2": "",
+}
+
+def test_stored_formats_are_not_changes():
+    """datetime-formatted birthdays and 'nan' blanks match the sheet"""
+    members, _, _ = normalize(make_sheet([SHEET_ROW]))
+    inserts, updates, accepts = diff(members, make_existing([STORED_ROW]))
+    assert len(inserts) == 0
+    assert len(updates) == 0, updates[PROFILE_COLUMNS].to_dict("records")
+    assert accepts == []
+    print("✓ Stored-format values are not reported as updates")
+
+def test_real_changes_are_updates():
+    """a changed answer and a changed birthday are still updates"""
+    members, _, _ = normalize(make_sheet([
+        {**SHEET_ROW, "areasOfInterest": "Health"},
+        {**SHEET_ROW, "email": "22-00002@g.batstate-u.edu.ph", "srcode": "22-00002", "birthday": "March 02, 2004"},
+    ]))
+    existing = make_existing([
+        STORED_ROW,
+        {**STORED_ROW, "email": "22-00002@g.batstate-u.edu.ph", "srcode": "22-00002"},
+    ])
+    _, updates, _ = diff(members, existing)
+    assert sorted(updates["id"].tolist()) == [1, 2]
+    print("✓ Real changes are reported as updates")
+
+if __name__ == "__main__":
+    test_stored_formats_are_not_changes()
+    test_real_changes_are_updates()
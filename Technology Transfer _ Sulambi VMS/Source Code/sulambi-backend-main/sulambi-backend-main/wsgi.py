@@ -0,0 +1,9 @@
+"""
+WSGI entry point for Gunicorn (gunicorn wsgi:app).
+
+Importing server only builds the Flask app; the background services are
+started here so CLI tools and scripts that import it do not start them.
+"""
+from server import app, startBackgroundServices
+
+startBackgroundServices()